@@ -36,16 +36,16 @@ class BetAdmin(admin.ModelAdmin):
         """
         Action admin pour forcer la résolution de paris sélectionnés
         """
-        resolved_count = 0
-        for bet in queryset.filter(is_resolved=False):
-            if bet.plant.death_date:
-                bet.resolve_bet()
-                resolved_count += 1
-            else:
-                messages.warning(
-                    request, 
-                    f"Le pari {bet.id} ne peut pas être résolu: la plante n'a pas de date de mort."
-                )
+        from .settlement import settle_bets
+        
+        open_bets = queryset.filter(is_resolved=False)
+        for bet_id in open_bets.filter(plant__death_date__isnull=True).values_list('id', flat=True):
+            messages.warning(
+                request, 
+                f"Le pari {bet_id} ne peut pas être résolu: la plante n'a pas de date de mort."
+            )
+        
+        resolved_count = settle_bets(open_bets).resolved
         
         if resolved_count > 0:
             messages.success(
@@ -59,21 +59,19 @@ class BetAdmin(admin.ModelAdmin):
         """
         Action admin pour annuler des paris et rembourser les points
         """
-        from leaderboard.models import UserScore
+        from django.db import transaction
+        from leaderboard import ledger
+        from leaderboard.models import PointTransaction
         
-        cancelled_count = 0
-        for bet in queryset.filter(is_resolved=False):
-            try:
-                user_score = UserScore.objects.get(user=bet.user)
-                user_score.total_points += bet.bet_amount
-                user_score.save()
-                bet.delete()
-                cancelled_count += 1
-            except UserScore.DoesNotExist:
-                messages.error(
-                    request, 
-                    f"Erreur avec le pari {bet.id}: score utilisateur non trouvé."
-                )
+        with transaction.atomic():
+            open_bets = list(queryset.filter(is_resolved=False).select_for_update())
+            # Remboursements inscrits au journal, soldes mis à jour en UPDATE groupés
+            ledger.post_many(
+                PointTransaction(user_id=bet.user_id, kind='refund', amount=bet.bet_amount, bet=bet)
+                for bet in open_bets
+            )
+            Bet.objects.filter(pk__in=[bet.pk for bet in open_bets]).delete()
+        cancelled_count = len(open_bets)
         
         messages.success(
             request, 
@@ -1,6 +1,8 @@
 from django import forms
 from .models import Bet
 from django.utils import timezone
+from core.models import SiteSettings
+from .placement import InvalidStake, check_stake
 
 class BetForm(forms.ModelForm):
     class Meta:
@@ -22,8 +24,18 @@ class BetForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         user_points = kwargs.pop('user_points', 0)
         super().__init__(*args, **kwargs)
-        max_bet = min(500, user_points)
-        self.fields['bet_amount'].widget.attrs.update({'min': 10, 'max': max_bet})
+        site_settings = SiteSettings.get_instance()
+        max_bet = min(site_settings.max_bet_amount, user_points)
+        self.fields['bet_amount'].widget.attrs.update({'min': site_settings.min_bet_amount, 'max': max_bet})
         
         # Forcer le format de date pour l'affichage
-        self.fields['predicted_death_date'].input_formats = ['%Y-%m-%d']
\ No newline at end of file
+        self.fields['predicted_death_date'].input_formats = ['%Y-%m-%d']
+
+    def clean_bet_amount(self):
+        """Mêmes bornes que place_bet (les attributs min / max ne protègent que le navigateur)"""
+        amount = self.cleaned_data.get('bet_amount')
+        try:
+            check_stake(amount)
+        except InvalidStake as error:
+            raise forms.ValidationError(str(error))
+        return amount
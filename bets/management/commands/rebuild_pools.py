@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from bets import pools
+
+
+class Command(BaseCommand):
+    help = "Recalcule les pools de paris des plantes (nombre, mises, histogramme) depuis les paris"
+
+    def handle(self, *args, **options):
+        rebuilt = pools.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{rebuilt} pool(s) reconstruit(s)."))
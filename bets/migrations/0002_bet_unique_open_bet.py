@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def check_open_bets(apps, schema_editor):
+    """Contrainte refusée tant qu'un joueur a plusieurs paris ouverts sur une même plante"""
+    Bet = apps.get_model('bets', 'Bet')
+    duplicates = list(
+        Bet.objects.filter(is_resolved=False).values('user_id', 'plant_id')
+        .annotate(count=models.Count('id')).filter(count__gt=1)
+        .order_by('user_id', 'plant_id').values_list('user_id', 'plant_id', 'count')[:20]
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Plusieurs paris ouverts pour un même joueur et une même plante, à résoudre "
+            "ou supprimer (en remboursant la mise) avant migration : "
+            + ', '.join(f"joueur {user_id} / plante {plant_id} ({count} paris)"
+                        for user_id, plant_id, count in duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bets', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(check_open_bets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='bet',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_resolved', False)), fields=('user', 'plant'), name='unique_open_bet'),
+        ),
+    ]
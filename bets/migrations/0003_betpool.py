@@ -0,0 +1,67 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:32
+
+from datetime import date
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_pools(apps, schema_editor):
+    """Pools initiaux depuis les paris existants (même calcul que bets.pools.rebuild)"""
+    Bet = apps.get_model('bets', 'Bet')
+    BetPool = apps.get_model('bets', 'BetPool')
+    BetPoolDay = apps.get_model('bets', 'BetPoolDay')
+
+    epoch = date(1970, 1, 1).toordinal()
+    histogram = {}
+    for plant_id, predicted, amount in Bet.objects.values_list('plant_id', 'predicted_death_date', 'bet_amount'):
+        day = timezone.localdate(predicted) if timezone.is_aware(predicted) else predicted.date()
+        count, stake = histogram.get((plant_id, day), (0, 0))
+        histogram[(plant_id, day)] = (count + 1, stake + amount)
+
+    pools = {}
+    for (plant_id, day), (count, stake) in histogram.items():
+        pool = pools.setdefault(plant_id, BetPool(plant_id=plant_id))
+        pool.bet_count += count
+        pool.total_stake += stake
+        pool.stake_day_sum += stake * (day.toordinal() - epoch)
+    BetPool.objects.bulk_create(pools.values(), batch_size=500)
+    BetPoolDay.objects.bulk_create([
+        BetPoolDay(plant_id=plant_id, day=day, bet_count=count, total_stake=stake)
+        for (plant_id, day), (count, stake) in histogram.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bets', '0002_bet_unique_open_bet'),
+        ('plants', '0006_survivalcurve'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BetPool',
+            fields=[
+                ('plant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='bet_pool', serialize=False, to='plants.plant')),
+                ('bet_count', models.IntegerField(default=0)),
+                ('total_stake', models.BigIntegerField(default=0)),
+                ('stake_day_sum', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BetPoolDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('bet_count', models.IntegerField(default=0)),
+                ('total_stake', models.BigIntegerField(default=0)),
+                ('plant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bet_pool_days', to='plants.plant')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('plant', 'day'), name='unique_bet_pool_day')],
+            },
+        ),
+        migrations.RunPython(fill_pools, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,8 @@
+from datetime import date
+
 from django.db import models
 from django.contrib.auth.models import User
 from plants.models import Plant
-from leaderboard.models import UserScore
 
 class Bet(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -13,53 +14,96 @@ class Bet(models.Model):
     won = models.BooleanField(null=True, blank=True)
     points_won = models.IntegerField(null=True, blank=True)
     
+    class Meta:
+        constraints = [
+            # Un seul pari en cours par joueur et par plante
+            models.UniqueConstraint(
+                fields=['user', 'plant'], condition=models.Q(is_resolved=False),
+                name='unique_open_bet',
+            ),
+        ]
+    
     def __str__(self):
         return f"{self.user.username} - {self.plant.name} - {self.bet_amount}pts"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # État connu en base : les compteurs (core.counters) ne reportent que les changements
+        if all(name in instance.__dict__ for name in ('user_id', 'bet_amount', 'is_resolved')):
+            instance._counted_state = instance.counter_state()
+        # ... de même pour le pool de la plante (bets.pools)
+        if all(name in instance.__dict__ for name in ('plant_id', 'predicted_death_date', 'bet_amount')):
+            instance._pooled_state = instance.pool_state()
+        return instance
+    
+    def counter_state(self):
+        """(joueur, mise, ouvert) : ce que comptent les compteurs dénormalisés"""
+        return (self.user_id, self.bet_amount, not self.is_resolved)
+    
+    def pool_state(self):
+        """(plante, jour prédit, mise) : ce qu'agrège le pool de la plante"""
+        from .pools import day_of
+        return (self.plant_id, day_of(self.predicted_death_date), self.bet_amount)
+    
+    @staticmethod
+    def compute_payout(bet_amount, predicted_death_date, death_date, config=None):
+        """Gain d'une mise selon l'écart entre la date prédite et la date de mort"""
+        from .payouts import compute_payouts
+        return int(compute_payouts([predicted_death_date], death_date, [bet_amount], config)[0])
+    
     def calculate_points(self):
         """Calcule les points gagnés lorsque la plante meurt"""
         self.plant.refresh_from_db()
         
         if not self.plant.death_date:
             return 0
-            
-        real_date = self.plant.death_date.date()
-        pred_date = self.predicted_death_date.date()
-        
-        days_diff = abs((pred_date - real_date).days)
         
-        # Jackpot : 0 ou 1 jour d'écart (pour absorber le décalage horaire)
-        if days_diff <= 1:
-            return int(self.bet_amount * 5)
-            
-        # Proche : 2 à 3 jours
-        elif days_diff <= 3:
-            return int(self.bet_amount * 3)
-            
-        # Pas loin : 4 à 7 jours
-        elif days_diff <= 7:
-            return int(self.bet_amount * 1.5)
-            
-        else:
-            return 0
+        return self.compute_payout(self.bet_amount, self.predicted_death_date, self.plant.death_date)
     
     def resolve_bet(self):
-        """Résout le pari lorsque la plante meurt"""
-        self.plant.refresh_from_db()
+        """Résout le pari lorsque la plante meurt (via la résolution groupée)"""
+        from .settlement import settle_bets
+        
+        if self.is_resolved:
+            return
+        settle_bets(Bet.objects.filter(pk=self.pk))
+        self.refresh_from_db(fields=['is_resolved', 'won', 'points_won'])
+
 
-        if self.plant.death_date and not self.is_resolved:
-            self.points_won = self.calculate_points()
-            self.won = self.points_won > 0
-            self.is_resolved = True
-            self.save()
-            
-            # Mettre à jour le score de l'utilisateur
-            user_score, created = UserScore.objects.get_or_create(user=self.user)
-            if self.won:
-                user_score.total_points += self.points_won
-                user_score.bets_won += 1
-            else:
-                user_score.bets_lost += 1
-            
-            user_score.calculate_accuracy()
-            user_score.save()
\ No newline at end of file
+class BetPool(models.Model):
+    """
+    Pool des paris d'une plante : nombre, mises, date moyenne pondérée par
+    la mise. Tenu à jour à chaque pari placé ou annulé (bets.pools).
+    """
+    plant = models.OneToOneField(Plant, on_delete=models.CASCADE, primary_key=True, related_name='bet_pool')
+    bet_count = models.IntegerField(default=0)
+    total_stake = models.BigIntegerField(default=0)
+    # Somme des jours prédits (numéros de jour depuis 1970) pondérés par la mise
+    stake_day_sum = models.BigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.plant_id} : {self.bet_count} pari(s), {self.total_stake} pts"
+    
+    @property
+    def consensus_date(self):
+        """Date prédite moyenne, pondérée par la mise"""
+        from .payouts import EPOCH_ORDINAL
+        if self.total_stake <= 0:
+            return None
+        return date.fromordinal(round(self.stake_day_sum / self.total_stake) + EPOCH_ORDINAL)
+
+class BetPoolDay(models.Model):
+    """Histogramme du pool d'une plante : paris et mises par jour prédit"""
+    plant = models.ForeignKey(Plant, on_delete=models.CASCADE, related_name='bet_pool_days')
+    day = models.DateField()
+    bet_count = models.IntegerField(default=0)
+    total_stake = models.BigIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['plant', 'day'], name='unique_bet_pool_day'),
+        ]
+    
+    def __str__(self):
+        return f"{self.plant_id} {self.day} : {self.bet_count} pari(s), {self.total_stake} pts"
@@ -0,0 +1,130 @@
+"""
+Moteur de calcul des gains.
+
+Les gains d'un lot de paris sont calculés en une seule passe NumPy à partir
+des dates prédites, de la date de mort et des mises. Les fenêtres (en jours)
+et les multiplicateurs proviennent de SiteSettings ; la stratégie de notation
+est choisie dans SiteSettings.scoring_strategy parmi celles enregistrées ici.
+"""
+from collections import namedtuple
+from datetime import date
+
+import numpy as np
+
+PayoutConfig = namedtuple('PayoutConfig', [
+    'exact_days', 'close_days', 'approximate_days',
+    'exact_multiplier', 'close_multiplier', 'approximate_multiplier',
+    'strategy',
+])
+
+# Valeurs historiques (±1 / ±3 / ±7 jours, x5 / x3 / x1.5)
+DEFAULT_CONFIG = PayoutConfig(1, 3, 7, 5.0, 3.0, 1.5, 'tiered')
+
+STRATEGIES = {}
+
+# Les numéros de jour sont comptés depuis le 01/01/1970, comme datetime64[D]
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def register_strategy(name):
+    """
+    Enregistre une stratégie de notation.
+    Une stratégie reçoit le tableau des écarts en jours et la configuration,
+    et retourne le tableau des multiplicateurs correspondants.
+    """
+    def decorator(func):
+        STRATEGIES[name] = func
+        return func
+    return decorator
+
+
+@register_strategy('tiered')
+def tiered(days_diff, config):
+    """Paliers : exact / proche / approximatif, rien au-delà"""
+    return np.select(
+        [
+            days_diff <= config.exact_days,
+            days_diff <= config.close_days,
+            days_diff <= config.approximate_days,
+        ],
+        [config.exact_multiplier, config.close_multiplier, config.approximate_multiplier],
+        default=0.0,
+    )
+
+
+@register_strategy('linear')
+def linear_decay(days_diff, config):
+    """
+    Multiplicateur exact jusqu'à `exact_days`, puis décroissance linéaire
+    jusqu'au multiplicateur approximatif à `approximate_days`, rien au-delà
+    """
+    span = max(config.approximate_days - config.exact_days, 1)
+    ratio = np.clip((days_diff - config.exact_days) / span, 0.0, 1.0)
+    multipliers = config.exact_multiplier + ratio * (config.approximate_multiplier - config.exact_multiplier)
+    return np.where(days_diff <= config.approximate_days, multipliers, 0.0)
+
+
+@register_strategy('gaussian')
+def gaussian(days_diff, config):
+    """
+    Courbe en cloche centrée sur la date réelle (écart-type = `close_days`),
+    coupée au-delà de `approximate_days`
+    """
+    sigma = max(config.close_days, 1)
+    multipliers = config.exact_multiplier * np.exp(-(days_diff ** 2) / (2.0 * sigma ** 2))
+    return np.where(days_diff <= config.approximate_days, multipliers, 0.0)
+
+
+def get_config(site_settings=None):
+    """Construit la configuration de calcul depuis SiteSettings"""
+    if site_settings is None:
+        from core.models import SiteSettings
+        site_settings = SiteSettings.get_instance()
+    return PayoutConfig(
+        exact_days=site_settings.exact_days,
+        close_days=site_settings.close_days,
+        approximate_days=site_settings.approximate_days,
+        exact_multiplier=site_settings.exact_multiplier,
+        close_multiplier=site_settings.close_multiplier,
+        approximate_multiplier=site_settings.approximate_multiplier,
+        strategy=site_settings.scoring_strategy,
+    )
+
+
+def to_day_numbers(dates):
+    """
+    Convertit des dates en numéros de jour (tableau int64).
+    Accepte un tableau datetime64 ou une séquence de date/datetime.
+    """
+    if isinstance(dates, np.ndarray) and np.issubdtype(dates.dtype, np.datetime64):
+        return dates.astype('datetime64[D]').astype(np.int64)
+    return np.fromiter((d.toordinal() for d in dates), dtype=np.int64) - EPOCH_ORDINAL
+
+
+def compute_payouts(predicted_dates, death_date, stakes, config=None):
+    """
+    Calcule les gains d'un lot de paris en une passe vectorisée.
+    Retourne un tableau d'entiers (gain tronqué, 0 si perdu).
+    """
+    if config is None:
+        config = get_config()
+    strategy = STRATEGIES[config.strategy]
+
+    predicted = to_day_numbers(predicted_dates)
+    days_diff = np.abs(predicted - (death_date.toordinal() - EPOCH_ORDINAL))
+    stakes = np.asarray(stakes, dtype=np.float64)
+
+    payouts = stakes * strategy(days_diff, config)
+    return np.trunc(payouts).astype(np.int64)
+
+
+def preview_payouts(queryset, death_date, config=None):
+    """
+    Simulation : gains qu'obtiendraient les paris ouverts du queryset si la
+    plante mourait à `death_date`. Retourne (ids, gains) sans instancier les paris.
+    """
+    rows = list(queryset.filter(is_resolved=False).values_list('id', 'predicted_death_date', 'bet_amount'))
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    ids, predicted, stakes = zip(*rows)
+    return np.asarray(ids, dtype=np.int64), compute_payouts(predicted, death_date, stakes, config)
@@ -0,0 +1,72 @@
+"""
+Placement d'un pari.
+
+Le solde est vérifié et débité par un seul UPDATE conditionnel
+(`SET total_points = total_points - mise WHERE total_points >= mise`), dans la
+même transaction que l'insertion du pari : deux soumissions simultanées ne
+peuvent pas dépenser deux fois les mêmes points, sans verrou applicatif.
+La règle « un seul pari en cours par plante » est garantie par la contrainte
+unique partielle `unique_open_bet`. La mise est contrôlée ici (bornes de
+SiteSettings) : seul point de débit, il ne se fie pas au formulaire.
+"""
+from django.db import IntegrityError, transaction
+
+from leaderboard import ledger
+
+
+class PlacementError(Exception):
+    """Pari refusé ; le message est destiné à l'utilisateur"""
+    message = "Le pari n'a pas pu être placé."
+
+    def __str__(self):
+        return self.message
+
+
+class InsufficientPoints(PlacementError):
+    message = "Vous n'avez pas assez de points pour ce pari."
+
+
+class DuplicateBet(PlacementError):
+    message = "Vous avez déjà un pari actif sur cette plante."
+
+
+class InvalidStake(PlacementError):
+    def __init__(self, minimum, maximum):
+        super().__init__(minimum, maximum)
+        self.message = f"La mise doit être comprise entre {minimum} et {maximum} points."
+
+
+def stake_bounds():
+    """Mise minimum (au moins 1) et maximum des paramètres du site"""
+    from core.models import SiteSettings
+
+    site_settings = SiteSettings.get_instance()
+    return max(site_settings.min_bet_amount, 1), site_settings.max_bet_amount
+
+
+def check_stake(amount):
+    """Lève InvalidStake si la mise n'est pas un entier dans les bornes du site"""
+    minimum, maximum = stake_bounds()
+    if not isinstance(amount, int) or isinstance(amount, bool) or not minimum <= amount <= maximum:
+        raise InvalidStake(minimum, maximum)
+
+
+def place_bet(bet):
+    """
+    Enregistre `bet` (non sauvegardé, user / plant / mise renseignés) et débite
+    la mise. Lève InvalidStake, InsufficientPoints ou DuplicateBet ; rien n'est
+    écrit dans ce cas. Retourne le UserScore à jour.
+    """
+    check_stake(bet.bet_amount)
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                bet.save()
+        except IntegrityError:
+            raise DuplicateBet()
+
+        score = ledger.post(bet.user_id, 'stake', -bet.bet_amount, bet, require_funds=True)
+        if score is None:
+            # Annule l'insertion du pari
+            raise InsufficientPoints()
+    return score
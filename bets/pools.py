@@ -0,0 +1,119 @@
+"""
+Pool des paris de chaque plante (BetPool) et son histogramme par jour
+prédit (BetPoolDay).
+
+Un pari placé, modifié ou annulé applique ses deltas par UPDATE `F()` dans
+la transaction de l'écriture (signaux de Bet) : une ligne du pool et une
+ligne de l'histogramme, quel que soit le nombre de paris de la plante.
+Comme pour core.counters, seul un incrément crée une ligne manquante ;
+`rebuild` recalcule tout depuis la table des paris (commande rebuild_pools).
+Les cotes implicites se lisent dans l'histogramme, façon pari mutuel :
+mises totales / mises sur ce jour.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.bulk import add_deltas
+
+from .models import Bet, BetPool, BetPoolDay
+from .payouts import EPOCH_ORDINAL
+
+TOP_DAYS = 5
+
+# share : part des mises sur ce jour ; odds : cote implicite (mises totales / mises du jour)
+PoolDay = namedtuple('PoolDay', ['day', 'bet_count', 'stake', 'share', 'odds'])
+
+
+def day_of(moment):
+    """Jour prédit d'un pari, dans le fuseau du site"""
+    return timezone.localdate(moment) if timezone.is_aware(moment) else moment.date()
+
+
+def change(old, new):
+    """Applique le passage d'un pari de l'état `old` à l'état `new` (None : absent)"""
+    deltas = {}
+    for state, sign in ((old, -1), (new, 1)):
+        if state is not None:
+            plant_id, day, amount = state
+            count, stake = deltas.get((plant_id, day), (0, 0))
+            deltas[(plant_id, day)] = (count + sign, stake + sign * amount)
+    add(deltas)
+
+
+def add(deltas):
+    """Applique {(plante, jour): (delta de paris, delta de mises)} dans la transaction en cours"""
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    pools = {}
+    for (plant_id, day), (count, stake) in deltas.items():
+        pool = pools.get(plant_id, (0, 0, 0))
+        pools[plant_id] = (pool[0] + count, pool[1] + stake, pool[2] + stake * (day.toordinal() - EPOCH_ORDINAL))
+
+    BetPool.objects.bulk_create(
+        [BetPool(plant_id=plant_id) for plant_id, delta in pools.items() if delta[0] > 0],
+        ignore_conflicts=True,
+    )
+    BetPoolDay.objects.bulk_create(
+        [BetPoolDay(plant_id=plant_id, day=day) for (plant_id, day), delta in deltas.items() if delta[0] > 0],
+        ignore_conflicts=True,
+    )
+    add_deltas(BetPool, 'plant_id', pools, ['bet_count', 'total_stake', 'stake_day_sum'])
+    add_deltas(BetPoolDay, ('plant_id', 'day'), deltas, ['bet_count', 'total_stake'])
+    if any(count < 0 for count, _ in deltas.values()):
+        # Jours vidés par une annulation : retirés de l'histogramme
+        BetPoolDay.objects.filter(plant_id__in=pools, bet_count__lte=0).delete()
+
+
+def days(plant):
+    """Histogramme du pool d'une plante (une requête), trié par jour"""
+    return list(BetPoolDay.objects.filter(plant=plant).order_by('day'))
+
+
+def odds(pool, pool_days):
+    """Cotes implicites de chaque jour de l'histogramme"""
+    if pool is None or pool.total_stake <= 0:
+        return []
+    return [
+        PoolDay(
+            day=row.day, bet_count=row.bet_count, stake=row.total_stake,
+            share=row.total_stake / pool.total_stake,
+            odds=pool.total_stake / row.total_stake if row.total_stake > 0 else None,
+        )
+        for row in pool_days
+    ]
+
+
+def favourites(pool, pool_days, limit=TOP_DAYS):
+    """Jours les plus misés, du plus au moins misé"""
+    return sorted(odds(pool, pool_days), key=lambda row: (-row.stake, row.day))[:limit]
+
+
+def rebuild(batch_size=500):
+    """Recalcule tous les pools depuis la table des paris ; retourne le nombre de pools"""
+    histogram = {}
+    for plant_id, predicted, amount in (
+        Bet.objects.values_list('plant_id', 'predicted_death_date', 'bet_amount').iterator(chunk_size=5000)
+    ):
+        key = (plant_id, day_of(predicted))
+        count, stake = histogram.get(key, (0, 0))
+        histogram[key] = (count + 1, stake + amount)
+
+    pools = {}
+    for (plant_id, day), (count, stake) in histogram.items():
+        pool = pools.setdefault(plant_id, BetPool(plant_id=plant_id))
+        pool.bet_count += count
+        pool.total_stake += stake
+        pool.stake_day_sum += stake * (day.toordinal() - EPOCH_ORDINAL)
+
+    with transaction.atomic():
+        BetPoolDay.objects.all().delete()
+        BetPool.objects.all().delete()
+        BetPool.objects.bulk_create(pools.values(), batch_size=batch_size)
+        BetPoolDay.objects.bulk_create([
+            BetPoolDay(plant_id=plant_id, day=day, bet_count=count, total_stake=stake)
+            for (plant_id, day), (count, stake) in histogram.items()
+        ], batch_size=batch_size)
+    return len(pools)
@@ -0,0 +1,158 @@
+"""
+Résolution groupée des paris.
+
+Tous les paris ouverts d'un lot sont réglés dans une seule transaction :
+les gains sont calculés en une passe vectorisée (bets.payouts), écrits avec `bulk_update`, puis les
+points et compteurs gagnés/perdus de chaque joueur sont appliqués par des
+UPDATE agrégés (core.bulk.add_deltas) et les gains inscrits au journal des points
+(leaderboard.ledger). Les classements sont recalculés une seule fois.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.utils import timezone
+
+from core import counters
+from core.bulk import add_deltas
+from leaderboard import ledger, periods, ranking, snapshot
+from leaderboard.models import PointTransaction, UserScore
+
+from . import payouts
+from .models import Bet
+
+SettlementResult = namedtuple('SettlementResult', ['resolved', 'winners'])
+
+# Taille des lots pour les écritures groupées (limite de paramètres SQLite)
+BATCH_SIZE = 500
+
+
+def _user_deltas(bets):
+    """Agrège par joueur : points gagnés, paris gagnés, paris perdus"""
+    deltas = {}
+    for bet in bets:
+        points, won, lost = deltas.get(bet.user_id, (0, 0, 0))
+        if bet.won:
+            deltas[bet.user_id] = (points + bet.points_won, won + 1, lost)
+        else:
+            deltas[bet.user_id] = (points, won, lost + 1)
+    return deltas
+
+
+def _apply_user_deltas(deltas):
+    """Applique les deltas par UPDATE groupés, sans lecture préalable des scores"""
+    user_ids = list(deltas)
+
+    # Joueurs sans UserScore (équivalent du get_or_create de resolve_bet)
+    existing = set(
+        UserScore.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True)
+    )
+    missing = [UserScore(user_id=user_id) for user_id in user_ids if user_id not in existing]
+    UserScore.objects.bulk_create(missing, ignore_conflicts=True)
+    ledger.record(
+        PointTransaction(user_id=score.user_id, kind='initial', amount=score.total_points)
+        for score in missing
+    )
+
+    add_deltas(
+        UserScore, 'user_id', deltas, ['total_points', 'bets_won', 'bets_lost'],
+        set_values={'last_updated': timezone.now()},
+    )
+
+    # Taux de précision recalculé côté base à partir des nouveaux compteurs
+    UserScore.objects.filter(user_id__in=user_ids).update(
+        accuracy_rate=Case(
+            When(bets_won=0, bets_lost=0, then=Value(0.0)),
+            default=F('bets_won') * 100.0 / (F('bets_won') + F('bets_lost')),
+            output_field=FloatField(),
+        )
+    )
+    # Points affichés à jour sans attendre le recalcul des rangs
+    snapshot.invalidate()
+
+
+def _price_bets(bets):
+    """Calcule les gains en une passe vectorisée par plante (même date de mort)"""
+    config = payouts.get_config()
+    by_plant = {}
+    for bet in bets:
+        by_plant.setdefault(bet.plant_id, []).append(bet)
+
+    for plant_bets in by_plant.values():
+        points = payouts.compute_payouts(
+            [bet.predicted_death_date for bet in plant_bets],
+            plant_bets[0].plant.death_date,
+            [bet.bet_amount for bet in plant_bets],
+            config,
+        )
+        for bet, points_won in zip(plant_bets, points.tolist()):
+            bet.points_won = points_won
+            bet.won = points_won > 0
+            bet.is_resolved = True
+
+
+def settle_bets(queryset, refresh_ranks=True):
+    """
+    Résout tous les paris ouverts du queryset dont la plante a une date de mort.
+    Avec `refresh_ranks=False`, le recalcul des rangs est laissé à l'appelant
+    (tâche de fond séparée).
+    Retourne un SettlementResult (nombre de paris résolus, nombre de gagnants).
+    """
+    with transaction.atomic():
+        bets = list(
+            queryset.filter(is_resolved=False, plant__death_date__isnull=False)
+            .select_related('plant')
+            .select_for_update()
+        )
+        if not bets:
+            return SettlementResult(0, 0)
+
+        _price_bets(bets)
+
+        Bet.objects.bulk_update(bets, ['points_won', 'won', 'is_resolved'], batch_size=BATCH_SIZE)
+        # bulk_update n'émet pas de signaux : paris ouverts décomptés ici
+        counters.add(counters.merge(
+            counters.bet_deltas(((bet.user_id, bet.bet_amount, True) for bet in bets), -1),
+            counters.bet_deltas(((bet.user_id, bet.bet_amount, False) for bet in bets), 1),
+        ))
+        _apply_user_deltas(_user_deltas(bets))
+        ledger.record(
+            PointTransaction(user_id=bet.user_id, kind='payout', amount=bet.points_won, bet=bet)
+            for bet in bets if bet.won
+        )
+        periods.record_settlement(bets)
+        if refresh_ranks:
+            ranking.request_recompute()
+
+    return SettlementResult(len(bets), sum(1 for bet in bets if bet.won))
+
+
+def mark_dead(plant, death_date=None):
+    """Déclare la plante morte si ce n'est pas déjà fait"""
+    if plant.death_date is None or plant.is_active:
+        plant.death_date = plant.death_date or death_date or timezone.now()
+        plant.is_active = False
+        plant.save(update_fields=['death_date', 'is_active'])
+
+
+def settle_plant(plant, death_date=None, refresh_ranks=True):
+    """
+    Déclare la plante morte (si ce n'est pas déjà fait) et résout tous ses paris
+    en attente dans la même transaction.
+    """
+    with transaction.atomic():
+        mark_dead(plant, death_date)
+        return settle_bets(Bet.objects.filter(plant=plant), refresh_ranks)
+
+
+def declare_death(plant, death_date=None):
+    """
+    Déclare la plante morte et confie la résolution de ses paris à la file de
+    tâches (résolution, puis notifications et classement) : retour immédiat.
+    """
+    from core import jobs
+    from .tasks import settle_plant_bets
+
+    with transaction.atomic():
+        mark_dead(plant, death_date)
+        jobs.enqueue(settle_plant_bets, {'plant_id': plant.pk}, key=f"settle-plant:{plant.pk}")
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from bets.models import Bet
+from bets import pools
+
+
+@receiver(post_save, sender=Bet)
+def update_bet_pool(sender, instance, created, **kwargs):
+    """
+    Pool de la plante : un pari placé s'ajoute, un pari modifié remplace son
+    ancien état (état inconnu, instance construite à la main : laissé à rebuild_pools)
+    """
+    if kwargs.get('raw', False):
+        return
+
+    old = None if created else getattr(instance, '_pooled_state', None)
+    new = instance.pool_state()
+    if created or (old is not None and old != new):
+        pools.change(old, new)
+    instance._pooled_state = new
+
+
+@receiver(post_delete, sender=Bet)
+def remove_from_bet_pool(sender, instance, **kwargs):
+    """Pari annulé (ou supprimé avec son joueur) : retiré du pool"""
+    pools.change(getattr(instance, '_pooled_state', None) or instance.pool_state(), None)
@@ -0,0 +1,23 @@
+"""
+Tâches de fond des paris (voir core.jobs)
+"""
+from core import jobs
+from plants.models import Plant
+
+from .settlement import settle_plant
+
+
+@jobs.task(name='bets.settle_plant')
+def settle_plant_bets(plant_id):
+    """
+    Résout les paris d'une plante morte, puis planifie les notifications et le
+    recalcul des rangs. Idempotente : seuls les paris encore ouverts sont réglés.
+    """
+    from core.tasks import notify_plant_death
+    from leaderboard.tasks import refresh_ranks
+
+    plant = Plant.objects.get(pk=plant_id)
+    result = settle_plant(plant, refresh_ranks=False)
+    jobs.enqueue(notify_plant_death, {'plant_id': plant_id}, key=f"notify-plant-death:{plant_id}")
+    if result.resolved:
+        jobs.enqueue(refresh_ranks, key='refresh-ranks')
@@ -1,3 +1,138 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import OperationalError, close_old_connections, connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from core import activity
+from leaderboard.models import PointTransaction, UserScore
+from plants.models import Plant
+
+from .models import Bet
+from .placement import DuplicateBet, InsufficientPoints, InvalidStake, place_bet
+
+
+def make_bet(user, plant, amount):
+    return Bet(
+        user=user, plant=plant, bet_amount=amount,
+        predicted_death_date=timezone.now() + timedelta(days=10),
+    )
+
+
+class PlaceBetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('parieur')
+        owner = User.objects.create_user('proprio')
+        self.plants = [
+            Plant.objects.create(
+                name=f'Plante {i}', species='Ficus', owner=owner,
+                obtaining_date=timezone.now() - timedelta(days=5),
+            )
+            for i in range(3)
+        ]
+
+    def test_debits_stake_and_records_transaction(self):
+        score = place_bet(make_bet(self.user, self.plants[0], 300))
+        self.assertEqual(score.total_points, 700)
+        self.assertTrue(
+            PointTransaction.objects.filter(user=self.user, kind='stake', amount=-300).exists()
+        )
+
+    def test_insufficient_points_writes_nothing(self):
+        UserScore.objects.filter(user=self.user).update(total_points=200)
+        with self.assertRaises(InsufficientPoints):
+            place_bet(make_bet(self.user, self.plants[0], 300))
+        self.assertEqual(UserScore.objects.get(user=self.user).total_points, 200)
+        self.assertFalse(Bet.objects.exists())
+
+    def test_stake_outside_site_bounds_is_rejected(self):
+        for amount in (-1000, 0, 501):
+            with self.assertRaises(InvalidStake):
+                place_bet(make_bet(self.user, self.plants[0], amount))
+        self.assertEqual(UserScore.objects.get(user=self.user).total_points, 1000)
+        self.assertFalse(Bet.objects.exists())
+        self.assertFalse(PointTransaction.objects.filter(user=self.user, kind='stake').exists())
+
+    def test_second_open_bet_on_same_plant_is_rejected(self):
+        place_bet(make_bet(self.user, self.plants[0], 100))
+        with self.assertRaises(DuplicateBet):
+            place_bet(make_bet(self.user, self.plants[0], 100))
+        self.assertEqual(UserScore.objects.get(user=self.user).total_points, 900)
+
+    def test_resolved_bet_does_not_block_a_new_one(self):
+        place_bet(make_bet(self.user, self.plants[0], 100))
+        Bet.objects.update(is_resolved=True)
+        place_bet(make_bet(self.user, self.plants[0], 100))
+        self.assertEqual(Bet.objects.count(), 2)
+
+
+class ConcurrentPlacementTests(TransactionTestCase):
+    """
+    Soumissions simultanées : aucun découvert, aucun doublon de pari ouvert
+    """
+    THREADS = 16
+    ATTEMPTS = 12
+    STAKE = 300
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest("Base SQLite en mémoire : une seule connexion possible")
+        owner = User.objects.create_user('proprio')
+        self.users = [User.objects.create_user(f'joueur{i}') for i in range(2)]
+        self.plants = [
+            Plant.objects.create(
+                name=f'Plante {i}', species='Ficus', owner=owner,
+                obtaining_date=timezone.now() - timedelta(days=5),
+            )
+            for i in range(4)
+        ]
+        # Journal d'activité différé : écrit tant que la base de test existe
+        self.addCleanup(activity.flush)
+
+    def _worker(self, index, barrier, outcomes):
+        close_old_connections()
+        user = self.users[index % len(self.users)]
+        barrier.wait()
+        try:
+            for attempt in range(self.ATTEMPTS):
+                plant = self.plants[(index + attempt) % len(self.plants)]
+                try:
+                    place_bet(make_bet(user, plant, self.STAKE))
+                    outcomes.append('placed')
+                except (InsufficientPoints, DuplicateBet) as error:
+                    outcomes.append(type(error).__name__)
+                except OperationalError:
+                    # Base verrouillée (SQLite) : la tentative échoue sans effet
+                    outcomes.append('locked')
+        finally:
+            connection.close()
+
+    def test_no_overdraft_or_duplicates(self):
+        barrier = threading.Barrier(self.THREADS)
+        outcomes = []
+        threads = [
+            threading.Thread(target=self._worker, args=(i, barrier, outcomes))
+            for i in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(outcomes), self.THREADS * self.ATTEMPTS)
+        self.assertGreater(outcomes.count('placed'), 0)
+        for user in self.users:
+            score = UserScore.objects.get(user=user)
+            bets = Bet.objects.filter(user=user)
+            staked = bets.aggregate(total=Sum('bet_amount'))['total'] or 0
+            self.assertGreaterEqual(score.total_points, 0)
+            self.assertEqual(score.total_points, 1000 - staked)
+            # Un pari ouvert au plus par plante
+            self.assertEqual(bets.count(), bets.values('plant').distinct().count())
+            ledger_total = PointTransaction.objects.filter(user=user).aggregate(
+                total=Sum('amount')
+            )['total']
+            self.assertEqual(ledger_total, score.total_points)
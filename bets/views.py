@@ -5,6 +5,7 @@ from django.utils import timezone
 from plants.models import Plant
 from .models import Bet
 from .forms import BetForm
+from .placement import place_bet, PlacementError
 from leaderboard.models import UserScore
 
 @login_required
@@ -25,21 +26,17 @@ def create_bet(request, plant_id):
             bet.user = request.user
             bet.plant = plant
             
-            # Vérifier que l'utilisateur a assez de points
-            if bet.bet_amount > user_score.total_points:
-                messages.error(request, 'Vous n\'avez pas assez de points pour ce pari.')
+            # Débit conditionnel de la mise et insertion du pari (une transaction)
+            try:
+                place_bet(bet)
+            except PlacementError as error:
+                messages.error(request, str(error))
                 return render(request, 'bets/create_bet.html', {
                     'form': form,
                     'plant': plant,
                     'user_score': user_score
                 })
             
-            bet.save()
-            
-            # Déduire les points
-            user_score.total_points -= bet.bet_amount
-            user_score.save()
-            
             messages.success(request, f'Pari placé avec succès! {bet.bet_amount} points engagés.')
             return redirect('plant_detail', pk=plant.pk)
     else:
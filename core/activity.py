@@ -0,0 +1,159 @@
+"""
+Écriture différée du journal d'activité (ActivityLog).
+
+`log` n'écrit rien en base : l'entrée est ajoutée au tampon du processus
+(après le commit de la transaction en cours, s'il y en a une). Le tampon est
+vidé par un seul `bulk_create` dès qu'il atteint ACTIVITY_LOG_BUFFER_SIZE
+entrées, ou quand la plus ancienne attend depuis ACTIVITY_LOG_FLUSH_INTERVAL
+secondes (vérifié à chaque entrée et en fin de requête), ainsi qu'à l'arrêt
+du processus. Un arrêt brutal peut perdre les entrées en attente : le journal
+d'activité n'est pas une donnée comptable.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from .models import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityBuffer:
+    """Tampon d'entrées ActivityLog d'un processus"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = []
+        self._oldest = None
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'ACTIVITY_LOG_BUFFER_SIZE', 100)
+
+    @property
+    def interval(self):
+        return getattr(settings, 'ACTIVITY_LOG_FLUSH_INTERVAL', 5)
+
+    def add(self, entry):
+        with self._lock:
+            if not self._entries:
+                self._oldest = time.monotonic()
+            self._entries.append(entry)
+        self.flush_if_due()
+
+    def _due(self):
+        return bool(self._entries) and (
+            len(self._entries) >= self.max_size
+            or time.monotonic() - self._oldest >= self.interval
+        )
+
+    def flush_if_due(self):
+        with self._lock:
+            due = self._due()
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Écrit les entrées en attente (une insertion groupée). Retourne leur nombre."""
+        with self._lock:
+            entries, self._entries = self._entries, []
+        if not entries:
+            return 0
+        try:
+            _detach_deleted_users(entries)
+            ActivityLog.objects.bulk_create(entries, batch_size=500)
+        except DatabaseError:
+            logger.exception("Écriture du journal d'activité impossible (%s entrées)", len(entries))
+            return 0
+        return len(entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _detach_deleted_users(entries):
+    """Joueurs supprimés depuis la collecte : user à NULL (comme on_delete=SET_NULL)"""
+    from django.contrib.auth.models import User
+
+    user_ids = {entry.user_id for entry in entries if entry.user_id is not None}
+    if not user_ids:
+        return
+    existing = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+    for entry in entries:
+        if entry.user_id not in existing:
+            entry.user_id = None
+
+
+buffer = ActivityBuffer()
+
+
+def log(activity_type, description, user=None, ip_address=None, user_agent=''):
+    """Ajoute une entrée au journal d'activité (écriture différée)"""
+    created_at = timezone.now()
+    entry = ActivityLog(
+        activity_type=activity_type,
+        # Identifiant seul : l'instance peut être supprimée avant l'écriture
+        user_id=getattr(user, 'pk', None),
+        description=description,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        created_at=created_at,
+        month=ActivityLog.month_key(created_at),
+    )
+    # Une action annulée (rollback) n'est pas journalisée
+    transaction.on_commit(lambda: buffer.add(entry))
+
+
+def flush():
+    return buffer.flush()
+
+
+def _flush_after_request(sender, **kwargs):
+    buffer.flush_if_due()
+
+
+def cutoff_month(keep_months, today=None):
+    """Première clé AAAAMM conservée quand on garde `keep_months` mois (mois courant inclus)"""
+    today = today or timezone.localdate()
+    index = today.year * 12 + today.month - 1 - (keep_months - 1)
+    return (index // 12) * 100 + index % 12 + 1
+
+
+def expired_months(keep_months):
+    """Mois (AAAAMM) antérieurs à la période de rétention, lus sur l'index mensuel"""
+    return list(
+        ActivityLog.objects.filter(month__lt=cutoff_month(keep_months))
+        .order_by('month').values_list('month', flat=True).distinct()
+    )
+
+
+def archive_month(month, output):
+    """Écrit les entrées d'un mois en NDJSON dans le fichier texte `output`"""
+    from .exports import DATASETS, stream_ndjson
+
+    columns = DATASETS['activity'][2]
+    rows = ActivityLog.objects.filter(month=month).order_by('pk').values(*columns)
+    count = 0
+    for line in stream_ndjson(rows):
+        output.write(line)
+        count += 1
+    return count
+
+
+def drop_month(month):
+    """
+    Supprime un mois entier. Sans relation entrante ni signal sur ActivityLog,
+    Django exécute une seule requête DELETE (aucune ligne chargée).
+    """
+    deleted, _ = ActivityLog.objects.filter(month=month).delete()
+    return deleted
+
+
+request_finished.connect(_flush_after_request, dispatch_uid='core.activity.flush')
+atexit.register(flush)
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
-from .models import UserProfile, SiteSettings, Notification, ActivityLog, FAQ
+from .models import UserProfile, SiteSettings, Notification, ActivityLog, FAQ, Job, Counter
 
 class UserProfileInline(admin.StackedInline):
     model = UserProfile
@@ -24,6 +24,9 @@ class SiteSettingsAdmin(admin.ModelAdmin):
         ('Multiplicateurs de gains', {
             'fields': ('exact_multiplier', 'close_multiplier', 'approximate_multiplier')
         }),
+        ('Calcul des gains', {
+            'fields': ('scoring_strategy', 'exact_days', 'close_days', 'approximate_days')
+        }),
     )
 
 @admin.register(Notification)
@@ -46,6 +49,40 @@ class FAQAdmin(admin.ModelAdmin):
     list_filter = ['is_active']
     search_fields = ['question', 'answer']
 
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'key', 'status', 'attempts', 'run_after', 'finished_at']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'key']
+    readonly_fields = ['created_at', 'finished_at', 'locked_by', 'locked_until', 'last_error']
+    actions = ['requeue_jobs']
+    
+    def requeue_jobs(self, request, queryset):
+        """
+        Remet en file les tâches échouées sélectionnées
+        """
+        from django.utils import timezone
+        count = queryset.filter(status='failed').update(
+            status='queued', attempts=0, run_after=timezone.now(), finished_at=None
+        )
+        self.message_user(request, f"{count} tâche(s) remise(s) en file.")
+    
+    requeue_jobs.short_description = "Relancer les tâches échouées"
+
+@admin.register(Counter)
+class CounterAdmin(admin.ModelAdmin):
+    """Lecture seule : valeurs tenues par core.counters (réparation : reconcile_counters)"""
+    list_display = ['name', 'user', 'value']
+    list_filter = ['name']
+    search_fields = ['user__username']
+    raw_id_fields = ['user']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
 # Réenregistrer UserAdmin avec l'inline personnalisé
 admin.site.unregister(User)
 admin.site.register(User, CustomUserAdmin)
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""
+Connexion par email, insensible à la casse.
+
+La clé de recherche `EmailKey` (email en minuscules, NULL si vide) est
+couverte par un index unique sur auth_user (migration core 0007) : une
+connexion fait une seule requête indexée, et deux comptes ne peuvent pas
+partager un email à la casse près. L'index n'est pas suivi par l'état des
+migrations (une reconstruction de la table par SQLite le perd) : le
+contrôle core.E001 vérifie sa présence.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import CharField, Func
+
+EMAIL_KEY_CONSTRAINT = 'auth_user_email_key_uniq'
+
+
+class EmailKey(Func):
+    """LOWER(NULLIF(email, '')) : expression identique à celle de l'index unique"""
+    # Littéral '' dans le gabarit (pas de paramètre) : SQLite ne reconnaît
+    # l'index d'expression que si la requête reproduit exactement son texte
+    template = "LOWER(NULLIF(%(expressions)s, ''))"
+    output_field = CharField()
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def users_by_email(email):
+    """Utilisateurs dont l'email correspond (au plus un, index unique)"""
+    return get_user_model()._default_manager.alias(email_key=EmailKey('email')).filter(
+        email_key=normalize_email(email)
+    )
+
+
+class EmailBackend(ModelBackend):
+    """authenticate(request, email=..., password=...) ; les autres appels sont laissés à ModelBackend"""
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if not normalize_email(email) or password is None:
+            return None
+        try:
+            user = users_by_email(email).get()
+        except get_user_model().DoesNotExist:
+            # Même coût qu'un mot de passe faux (pas d'indice sur l'existence du compte)
+            get_user_model()().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,260 @@
+"""
+Banc d'essai : monde synthétique reproductible et mesure des chemins critiques.
+
+`seed_world` remplit la base (utilisateurs, plantes, paris, mesures) par
+`bulk_create`, à partir d'un générateur pseudo-aléatoire initialisé par
+`seed` : deux exécutions avec les mêmes paramètres produisent les mêmes
+données. `run_scenarios` chronomètre ensuite les vues et opérations sensibles
+(les scénarios qui modifient les données passent en dernier).
+Utilisé par la commande `manage.py bench`.
+"""
+import random
+import statistics
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.db import connection
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+Scale = namedtuple('Scale', ['users', 'plants', 'bets', 'measurements'])
+
+SCALES = {
+    'small': Scale(200, 100, 5_000, 20_000),
+    'medium': Scale(5_000, 1_000, 100_000, 200_000),
+    'large': Scale(50_000, 10_000, 1_000_000, 1_000_000),
+}
+
+BATCH_SIZE = 5000
+# Part des paris placés sur la plante « populaire » (résolution la plus lourde)
+POPULAR_SHARE = 0.05
+# Date de référence fixe : les données ne dépendent pas du jour d'exécution
+REFERENCE_DATE = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+# Cache propre au processus pendant un banc d'essai : l'instantané du
+# classement, les fragments et positions calculés sur le monde synthétique
+# n'atteignent jamais le cache partagé des processus réels
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bench',
+    }
+}
+
+World = namedtuple('World', ['scale', 'user_ids', 'plant_ids', 'popular_plant_id', 'bettor_id'])
+
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _bulk(model, rows):
+    for batch in _batches(rows):
+        model.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+
+
+def seed_world(scale, seed=0):
+    """Crée le monde synthétique ; retourne un World (identifiants utiles aux scénarios)"""
+    from bets import pools
+    from bets.models import Bet
+    from core import counters
+    from core.models import UserProfile
+    from leaderboard import ranking
+    from leaderboard.models import UserScore
+    from plants import rollups
+    from plants.models import Criterion, Plant, PlantMeasurement
+
+    rng = random.Random(seed)
+
+    _bulk(User, (
+        User(username=f'bench{i:07d}', email=f'bench{i}@example.com', password='!')
+        for i in range(scale.users)
+    ))
+    user_ids = list(User.objects.filter(username__startswith='bench').order_by('pk').values_list('pk', flat=True))
+    _bulk(UserProfile, (UserProfile(user_id=user_id) for user_id in user_ids))
+    _bulk(UserScore, (
+        UserScore(user_id=user_id, total_points=rng.randint(0, 5000)) for user_id in user_ids
+    ))
+    ranking.recompute_ranks()
+
+    criteria = Criterion.objects.bulk_create([
+        Criterion(name=name, criterion_type=kind, description=name, unit=unit)
+        for name, kind, unit in [
+            ('Arrosage', 'watering', 'ml'), ('Soleil', 'sunlight', 'h'), ('Insectes', 'insects', 'nb'),
+        ]
+    ])
+
+    species = ['Ficus', 'Monstera', 'Cactus', 'Basilic', 'Orchidée', 'Pothos']
+    _bulk(Plant, (
+        Plant(
+            name=f'Plante {i}', species=rng.choice(species), owner_id=rng.choice(user_ids),
+            obtaining_date=REFERENCE_DATE - timedelta(days=rng.randint(1, 365)),
+        )
+        for i in range(scale.plants)
+    ))
+    plant_ids = list(Plant.objects.order_by('pk').values_list('pk', flat=True))
+    obtaining = dict(Plant.objects.values_list('pk', 'obtaining_date'))
+    popular_plant_id = plant_ids[0]
+
+    # Paris : couples (joueur, plante) uniques (un pari ouvert par plante)
+    def bet(user_id, plant_id):
+        return Bet(
+            user_id=user_id, plant_id=plant_id, bet_amount=rng.randint(10, 500),
+            predicted_death_date=obtaining[plant_id] + timedelta(days=rng.randint(1, 400)),
+        )
+
+    def bets():
+        popular = min(int(scale.bets * POPULAR_SHARE), len(user_ids))
+        for user_id in rng.sample(user_ids, popular):
+            yield bet(user_id, popular_plant_id)
+        seen = set()
+        others = plant_ids[1:]
+        while len(seen) < scale.bets - popular:
+            pair = (rng.choice(user_ids), rng.choice(others))
+            if pair not in seen:
+                seen.add(pair)
+                yield bet(*pair)
+
+    _bulk(Bet, bets())
+
+    criterion_ids = [criterion.pk for criterion in criteria]
+    _bulk(PlantMeasurement, (
+        PlantMeasurement(
+            plant_id=rng.choice(plant_ids), criterion_id=rng.choice(criterion_ids),
+            value=round(rng.uniform(0, 100), 2),
+            measured_at=REFERENCE_DATE - timedelta(seconds=rng.randint(0, 30 * 86400)),
+        )
+        for _ in range(scale.measurements)
+    ))
+    rollups.rebuild_all()
+    # bulk_create n'émet pas de signaux : compteurs et pools recalculés une fois
+    counters.reconcile()
+    pools.rebuild()
+
+    popular_owner = Plant.objects.values_list('owner_id', flat=True).get(pk=popular_plant_id)
+    bettor_id = next(user_id for user_id in user_ids if user_id != popular_owner)
+    return World(scale, user_ids, plant_ids, popular_plant_id, bettor_id)
+
+
+def measure(func, repeat=5, warmup=1):
+    """Exécute `func` et retourne les statistiques de durée (ms) et le nombre de requêtes SQL"""
+    for _ in range(warmup):
+        func()
+    durations, queries = [], []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            func()
+            durations.append((time.perf_counter() - start) * 1000)
+        queries.append(len(context.captured_queries))
+    return _summary(durations, queries)
+
+
+def _summary(durations, queries):
+    ordered = sorted(durations)
+    return {
+        'runs': len(durations),
+        'min_ms': round(ordered[0], 2),
+        'median_ms': round(statistics.median(ordered), 2),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        'max_ms': round(ordered[-1], 2),
+        'queries': int(statistics.median(queries)),
+    }
+
+
+def _admin_request(user):
+    request = RequestFactory().post('/admin/')
+    request.user = user
+    request.session = {}
+    request._messages = FallbackStorage(request)
+    return request
+
+
+def _get(client, url):
+    def view():
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} : HTTP {response.status_code}")
+    return view
+
+
+def run_scenarios(world, repeat=5, seed=0):
+    """Chronomètre les chemins critiques ; retourne {scénario: statistiques}"""
+    from bets.models import Bet
+    from bets.placement import PlacementError, place_bet
+    from bets.settlement import settle_plant
+    from leaderboard.models import UserScore
+    from plants.models import Plant
+
+    rng = random.Random(seed + 1)
+    results = {}
+
+    bettor = User.objects.get(pk=world.bettor_id)
+    client = Client()
+    client.force_login(bettor)
+
+    # Lectures
+    results['view_plant_list'] = measure(_get(client, reverse('plant_list')), repeat)
+    results['view_plant_detail'] = measure(
+        _get(client, reverse('plant_detail', args=[world.popular_plant_id])), repeat
+    )
+    results['view_leaderboard'] = measure(_get(client, reverse('leaderboard')), repeat)
+    results['view_profile'] = measure(_get(client, reverse('profile')), repeat)
+
+    # Placement de paris (couples sans pari ouvert)
+    def place():
+        while True:
+            user_id, plant_id = rng.choice(world.user_ids), rng.choice(world.plant_ids[1:])
+            bet = Bet(
+                user_id=user_id, plant_id=plant_id, bet_amount=10,
+                predicted_death_date=REFERENCE_DATE + timedelta(days=rng.randint(1, 100)),
+            )
+            try:
+                place_bet(bet)
+                return
+            except PlacementError:
+                continue
+
+    results['bet_placement'] = measure(place, repeat)
+
+    # Actions d'administration du classement
+    score_admin = admin.site._registry[UserScore]
+    superuser = User(username='bench-admin', is_staff=True, is_superuser=True)
+    results['admin_update_all_ranks'] = measure(
+        lambda: score_admin.update_all_ranks(_admin_request(superuser), UserScore.objects.all()),
+        repeat,
+    )
+    sample = UserScore.objects.filter(user_id__in=world.user_ids[:100])
+    results['admin_reset_points'] = measure(
+        lambda: score_admin.reset_points(_admin_request(superuser), sample), repeat,
+    )
+
+    # Résolution (destructive : en dernier)
+    popular = Plant.objects.get(pk=world.popular_plant_id)
+    open_bets = Bet.objects.filter(plant=popular, is_resolved=False).count()
+    start = time.perf_counter()
+    with CaptureQueriesContext(connection) as context:
+        settle_plant(popular, death_date=REFERENCE_DATE + timedelta(days=30))
+    results['settle_popular_plant'] = dict(
+        _summary([(time.perf_counter() - start) * 1000], [len(context.captured_queries)]),
+        bets=open_bets,
+    )
+
+    plants = iter(rng.sample(world.plant_ids[1:], min(repeat + 1, len(world.plant_ids) - 1)))
+    results['settle_plant'] = measure(
+        lambda: settle_plant(Plant.objects.get(pk=next(plants)), death_date=REFERENCE_DATE),
+        repeat,
+    )
+    return results
@@ -0,0 +1,100 @@
+"""
+Application groupée de deltas (`colonne = colonne + delta`) à de nombreuses lignes.
+
+Sous SQLite, un seul UPDATE joint une liste VALUES :
+    UPDATE t SET a = t.a + d.column2 ... FROM (VALUES (...), ...) AS d
+    WHERE t.cle = d.column1
+Les autres moteurs passent par un `Case` / `When` par ligne, nettement plus
+coûteux à compiler au-delà de quelques centaines de lignes. (PostgreSQL
+accepte la même forme, mais les colonnes de VALUES y sont typées depuis les
+paramètres : à valider sur une base PostgreSQL avant de l'ajouter à la liste.)
+La base d'écriture est celle du routeur (DATABASE_ROUTERS).
+"""
+from django.db import connections, router
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+UPDATE_FROM_VENDORS = ('sqlite',)
+
+
+def add_deltas(model, key_fields, deltas, fields, set_values=None):
+    """
+    Ajoute à chaque ligne identifiée par `key_fields` les deltas donnés.
+    `deltas` : {clé (tuple, ou valeur seule si une seule colonne de clé): tuple de deltas},
+    dans l'ordre de `fields`. `set_values` : {champ: valeur} affecté tel quel.
+    Retourne le nombre de lignes modifiées.
+    """
+    if not deltas:
+        return 0
+    if isinstance(key_fields, str):
+        key_fields = (key_fields,)
+        deltas = {(key,): values for key, values in deltas.items()}
+    set_values = set_values or {}
+
+    connection = connections[router.db_for_write(model)]
+    if connection.vendor not in UPDATE_FROM_VENDORS:
+        return _add_deltas_case(model, key_fields, deltas, fields, set_values)
+
+    meta = model._meta
+    qn = connection.ops.quote_name
+    table = qn(meta.db_table)
+    key_columns = [meta.get_field(name) for name in key_fields]
+    width = len(key_fields) + len(fields)
+
+    assignments = [
+        f"{qn(meta.get_field(name).column)} = {table}.{qn(meta.get_field(name).column)} + d.column{len(key_fields) + i + 1}"
+        for i, name in enumerate(fields)
+    ]
+    set_params = []
+    for name, value in set_values.items():
+        field = meta.get_field(name)
+        assignments.append(f"{qn(field.column)} = %s")
+        set_params.append(field.get_db_prep_value(value, connection))
+    where = ' AND '.join(
+        f"{table}.{qn(field.column)} = d.column{i + 1}" for i, field in enumerate(key_columns)
+    )
+
+    max_params = connection.features.max_query_params or 10000
+    chunk_size = max((max_params - len(set_params)) // width, 1)
+    items = list(deltas.items())
+    updated = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            rows = ', '.join(['(' + ', '.join(['%s'] * width) + ')'] * len(chunk))
+            params = list(set_params)
+            for key, values in chunk:
+                params.extend(
+                    field.get_db_prep_value(value, connection) for field, value in zip(key_columns, key)
+                )
+                params.extend(values)
+            cursor.execute(
+                f"UPDATE {table} SET {', '.join(assignments)} "
+                f"FROM (VALUES {rows}) AS d WHERE {where}",
+                params,
+            )
+            updated += cursor.rowcount
+    return updated
+
+
+def _add_deltas_case(model, key_fields, deltas, fields, set_values, batch_size=500):
+    items = list(deltas.items())
+    updated = 0
+    for start in range(0, len(items), batch_size):
+        chunk = items[start:start + batch_size]
+        match = [Q(**dict(zip(key_fields, key))) for key, _ in chunk]
+        condition = Q()
+        for q in match:
+            condition |= q
+
+        def case(index):
+            return Case(
+                *[When(q, then=Value(values[index])) for q, (_, values) in zip(match, chunk)],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+
+        updated += model.objects.filter(condition).update(
+            **{name: F(name) + case(i) for i, name in enumerate(fields)},
+            **set_values,
+        )
+    return updated
@@ -0,0 +1,35 @@
+"""
+Contrôles système (`manage.py check --database default`, et avant `migrate`).
+"""
+from django.contrib.auth import get_user_model
+from django.core.checks import Error, Tags, register
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+
+from .backends import EMAIL_KEY_CONSTRAINT
+
+EMAIL_KEY_MIGRATION = ('core', '0007_user_email_key')
+
+
+@register(Tags.database)
+def check_email_key_index(app_configs, databases=None, **kwargs):
+    """
+    L'index unique sur l'email normalisé (migration core 0007) est posé hors
+    de l'état des migrations : une AlterField sur auth.User sous SQLite
+    reconstruit la table sans lui, sans erreur.
+    """
+    errors = []
+    for alias in databases or []:
+        connection = connections[alias]
+        if EMAIL_KEY_MIGRATION not in MigrationRecorder(connection).applied_migrations():
+            continue
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, get_user_model()._meta.db_table)
+        if EMAIL_KEY_CONSTRAINT not in constraints:
+            errors.append(Error(
+                f"Index unique {EMAIL_KEY_CONSTRAINT} absent de la base '{alias}' "
+                "(emails insensibles à la casse non garantis uniques, connexion par email non indexée).",
+                hint="Rejouer la migration : manage.py migrate core 0006 --skip-checks, puis manage.py migrate core.",
+                id='core.E001',
+            ))
+    return errors
@@ -0,0 +1,14 @@
+from django.utils.functional import SimpleLazyObject
+
+from .notifications import unread_count
+
+
+def notifications(request):
+    """
+    Nombre de notifications non lues pour le badge de navigation
+    (évalué seulement si le template l'affiche ; lu dans la table des compteurs)
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'unread_notifications': SimpleLazyObject(lambda: unread_count(user))}
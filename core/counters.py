@@ -0,0 +1,176 @@
+"""
+Compteurs dénormalisés (table Counter) : globaux et par joueur.
+
+Les signaux de Plant et Bet, la résolution des paris et les actions
+d'administration appliquent des deltas par UPDATE `F()` dans la transaction
+de l'écriture d'origine. Seul un incrément crée une ligne manquante ; un
+décrément sur une ligne absente est ignoré. `reconcile` recalcule tout depuis
+les tables sources et corrige les écarts (commande reconcile_counters).
+La page d'accueil lit ses compteurs en une requête de quelques lignes.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .bulk import add_deltas
+from .models import Counter
+
+PLANTS = 'plants'
+ACTIVE_PLANTS = 'active_plants'
+DEAD_PLANTS = 'dead_plants'
+OPEN_BETS = 'open_bets'
+TOTAL_STAKED = 'total_staked'
+UNREAD_NOTIFICATIONS = 'unread_notifications'
+
+SITE_COUNTERS = (PLANTS, ACTIVE_PLANTS, DEAD_PLANTS, OPEN_BETS, TOTAL_STAKED)
+USER_COUNTERS = (PLANTS, OPEN_BETS, TOTAL_STAKED, UNREAD_NOTIFICATIONS)
+
+Counts = namedtuple('Counts', ['site', 'user'])
+Drift = namedtuple('Drift', ['name', 'user_id', 'stored', 'expected'])
+
+
+def add(deltas):
+    """Applique {(compteur, user_id ou None): delta} dans la transaction en cours"""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    Counter.objects.bulk_create(
+        [Counter(name=name, user_id=user_id) for (name, user_id), delta in deltas.items() if delta > 0],
+        ignore_conflicts=True,
+    )
+    for (name, user_id), delta in deltas.items():
+        if user_id is None:
+            Counter.objects.filter(name=name, user__isnull=True).update(value=F('value') + delta)
+    add_deltas(
+        Counter, ('name', 'user_id'),
+        {key: (delta,) for key, delta in deltas.items() if key[1] is not None},
+        ['value'],
+    )
+
+
+def plant_deltas(plants, sign=1):
+    """
+    Deltas de plantes (propriétaire, active, morte) qui apparaissent (sign=1)
+    ou disparaissent (sign=-1). Un changement d'état : ancien état retiré, nouveau ajouté.
+    """
+    deltas = {}
+    for owner_id, active, dead in plants:
+        for key, delta in [
+            ((PLANTS, None), sign), ((PLANTS, owner_id), sign),
+            ((ACTIVE_PLANTS, None), sign if active else 0),
+            ((DEAD_PLANTS, None), sign if dead else 0),
+        ]:
+            deltas[key] = deltas.get(key, 0) + delta
+    return deltas
+
+
+def bet_deltas(bets, sign=1):
+    """Deltas de paris (joueur, mise, ouvert) qui apparaissent (sign=1) ou disparaissent (sign=-1)"""
+    deltas = {}
+    for user_id, amount, is_open in bets:
+        for key, delta in [
+            ((OPEN_BETS, None), sign if is_open else 0),
+            ((OPEN_BETS, user_id), sign if is_open else 0),
+            ((TOTAL_STAKED, None), sign * amount),
+            ((TOTAL_STAKED, user_id), sign * amount),
+        ]:
+            deltas[key] = deltas.get(key, 0) + delta
+    return deltas
+
+
+def change(deltas_func, old, new):
+    """Deltas du passage de l'état `old` à l'état `new` (None : absent)"""
+    return merge(
+        deltas_func([old], -1) if old is not None else {},
+        deltas_func([new], 1) if new is not None else {},
+    )
+
+
+def merge(*deltas):
+    merged = {}
+    for part in deltas:
+        for key, delta in part.items():
+            merged[key] = merged.get(key, 0) + delta
+    return merged
+
+
+def read(user=None):
+    """Compteurs globaux et ceux du joueur (une requête) ; 0 pour une ligne absente"""
+    scope = Q(user__isnull=True)
+    if user is not None and user.is_authenticated:
+        scope |= Q(user_id=user.pk)
+    site = dict.fromkeys(SITE_COUNTERS, 0)
+    mine = dict.fromkeys(USER_COUNTERS, 0)
+    for name, user_id, value in Counter.objects.filter(scope).values_list('name', 'user_id', 'value'):
+        (site if user_id is None else mine)[name] = value
+    return Counts(site, mine)
+
+
+def expected():
+    """Valeurs recalculées depuis Plant, Bet et Notification : {(compteur, user_id ou None): valeur}"""
+    from bets.models import Bet
+    from plants.models import Plant
+
+    from .models import Notification
+
+    plants = Plant.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        dead=Count('id', filter=Q(death_date__isnull=False)),
+    )
+    bets = Bet.objects.aggregate(
+        open=Count('id', filter=Q(is_resolved=False)), staked=Sum('bet_amount'),
+    )
+    values = {
+        (PLANTS, None): plants['total'],
+        (ACTIVE_PLANTS, None): plants['active'],
+        (DEAD_PLANTS, None): plants['dead'],
+        (OPEN_BETS, None): bets['open'],
+        (TOTAL_STAKED, None): bets['staked'] or 0,
+    }
+    for owner_id, count in Plant.objects.values_list('owner_id').annotate(count=Count('id')).order_by():
+        values[(PLANTS, owner_id)] = count
+    for user_id, count in (
+        Bet.objects.filter(is_resolved=False).values_list('user_id').annotate(count=Count('id')).order_by()
+    ):
+        values[(OPEN_BETS, user_id)] = count
+    for user_id, staked in Bet.objects.values_list('user_id').annotate(staked=Sum('bet_amount')).order_by():
+        values[(TOTAL_STAKED, user_id)] = staked
+    for user_id, count in (
+        Notification.objects.filter(is_read=False).values_list('user_id').annotate(count=Count('id')).order_by()
+    ):
+        values[(UNREAD_NOTIFICATIONS, user_id)] = count
+    return values
+
+
+def reconcile(dry_run=False, batch_size=500):
+    """Compare les compteurs stockés aux tables sources et corrige les écarts ; retourne les Drift"""
+    with transaction.atomic():
+        values = expected()
+        stored = {
+            (counter.name, counter.user_id): counter
+            for counter in Counter.objects.select_for_update()
+        }
+        drifts = []
+        for key in values.keys() | stored.keys():
+            counter = stored.get(key)
+            current = counter.value if counter else 0
+            target = values.get(key, 0)
+            if current != target:
+                drifts.append(Drift(key[0], key[1], current, target))
+        drifts.sort(key=lambda drift: (drift.name, drift.user_id or 0))
+        if dry_run or not drifts:
+            return drifts
+
+        changed, missing = [], []
+        for drift in drifts:
+            counter = stored.get((drift.name, drift.user_id))
+            if counter is None:
+                missing.append(Counter(name=drift.name, user_id=drift.user_id, value=drift.expected))
+            else:
+                counter.value = drift.expected
+                changed.append(counter)
+        Counter.objects.bulk_update(changed, ['value'], batch_size=batch_size)
+        Counter.objects.bulk_create(missing, batch_size=batch_size)
+    return drifts
@@ -0,0 +1,113 @@
+"""
+Exports en flux (NDJSON / CSV) des paris, scores et journaux d'activité.
+
+Les lignes sont lues par lots avec `QuerySet.iterator(chunk_size=...)` sur des
+`values()` (pas d'instanciation de modèles) et sérialisées au fil de l'eau :
+la mémoire reste constante et le premier octet part avant la fin de la requête.
+"""
+import csv
+from datetime import datetime, time
+
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from bets.models import Bet
+from leaderboard.models import UserScore
+
+from .models import ActivityLog
+
+CHUNK_SIZE = 2000
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Jeu de données -> (modèle, champ de date pour le filtre temporel, colonnes)
+DATASETS = {
+    'bets': (Bet, 'bet_date', [
+        'id', 'user_id', 'user__username', 'plant_id', 'bet_amount', 'predicted_death_date',
+        'bet_date', 'is_resolved', 'won', 'points_won',
+    ]),
+    'scores': (UserScore, 'last_updated', [
+        'id', 'user_id', 'user__username', 'total_points', 'bets_won', 'bets_lost',
+        'accuracy_rate', 'rank', 'last_updated',
+    ]),
+    'activity': (ActivityLog, 'created_at', [
+        'id', 'activity_type', 'user_id', 'user__username', 'description', 'ip_address',
+        'created_at',
+    ]),
+}
+
+
+def _parse_moment(value):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Date invalide : {value}")
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def parse_filters(since=None, until=None, user=None):
+    """
+    Convertit les filtres texte (dates ISO, id ou nom d'utilisateur) pour
+    export_queryset. Lève ValueError si un filtre est invalide.
+    """
+    filters = {}
+    if since:
+        filters['since'] = _parse_moment(since)
+    if until:
+        filters['until'] = _parse_moment(until)
+    if user:
+        lookup = {'pk': user} if str(user).isdigit() else {'username': user}
+        try:
+            filters['user'] = User.objects.get(**lookup)
+        except User.DoesNotExist:
+            raise ValueError(f"Utilisateur inconnu : {user}")
+    return filters
+
+
+def export_queryset(dataset, since=None, until=None, user=None):
+    """Lignes (dict) du jeu de données, filtrées par période et par utilisateur"""
+    model, date_field, columns = DATASETS[dataset]
+    queryset = model.objects.all()
+    if since is not None:
+        queryset = queryset.filter(**{f'{date_field}__gte': since})
+    if until is not None:
+        queryset = queryset.filter(**{f'{date_field}__lt': until})
+    if user is not None:
+        queryset = queryset.filter(user=user)
+    return queryset.order_by('pk').values(*columns)
+
+
+class _Echo:
+    """Pseudo-fichier : csv.writer retourne directement la ligne écrite"""
+    def write(self, value):
+        return value
+
+
+def stream_ndjson(rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield encoder.encode(row) + '\n'
+
+
+def stream_csv(rows, columns):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield writer.writerow([row[column] for column in columns])
+
+
+def stream_export(dataset, fmt, **filters):
+    """Générateur des lignes sérialisées au format demandé"""
+    rows = export_queryset(dataset, **filters)
+    if fmt == 'csv':
+        return stream_csv(rows, DATASETS[dataset][2])
+    return stream_ndjson(rows)
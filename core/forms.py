@@ -3,6 +3,8 @@ from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 
+from .backends import users_by_email
+
 # --- Formulaire d'inscription ---
 class CustomUserCreationForm(UserCreationForm):
     email = forms.EmailField(
@@ -35,10 +37,10 @@ class CustomUserCreationForm(UserCreationForm):
         })
         self.fields['username'].help_text = 'Requis. 150 caractères maximum.'
 
-    # IMPORTANT : On vérifie que l'email n'est pas déjà pris
+    # IMPORTANT : On vérifie que l'email n'est pas déjà pris (à la casse près, index unique)
     def clean_email(self):
         email = self.cleaned_data.get('email')
-        if User.objects.filter(email=email).exists():
+        if users_by_email(email).exists():
             raise ValidationError("Cet email est déjà utilisé par un autre compte.")
         return email
 
@@ -79,4 +81,10 @@ class ProfileUpdateForm(forms.ModelForm):
                 'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-green-500 focus:border-transparent',
                 'placeholder': 'votre@email.com'
             }),
-        }
\ No newline at end of file
+        }
+
+    def clean_email(self):
+        email = self.cleaned_data.get('email')
+        if email and users_by_email(email).exclude(pk=self.instance.pk).exists():
+            raise ValidationError("Cet email est déjà utilisé par un autre compte.")
+        return email
@@ -0,0 +1,150 @@
+"""
+File de tâches de fond stockée en base (modèle Job), sans broker externe.
+
+- `enqueue` insère la tâche dans la transaction courante : elle n'est visible
+  des workers qu'après le commit des écritures qui l'ont déclenchée. Une clé
+  (`key`) rend l'ajout idempotent tant qu'une tâche de même clé est en attente
+  ou en cours (contrainte unique partielle).
+- `claim` réserve une tâche par un UPDATE conditionnel (pas de SELECT ... FOR
+  UPDATE SKIP LOCKED, indisponible sous SQLite) : un seul worker gagne.
+  La réservation expire après le délai de visibilité ; une tâche dont le worker
+  a disparu est alors reprise, tant qu'il lui reste des tentatives (sinon elle
+  est marquée échouée : une tâche qui tue son worker n'est pas rejouée sans fin).
+- En cas d'erreur, la tâche est replanifiée avec un délai croissant jusqu'à
+  `max_attempts`, puis marquée échouée.
+
+Les tâches sont des fonctions déclarées avec `@task` dans les modules
+`<app>/tasks.py`, chargés à la demande. Elles doivent être idempotentes
+(une tâche reprise après expiration peut s'exécuter deux fois).
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+VISIBILITY_TIMEOUT = timedelta(minutes=5)
+RETRY_DELAY = timedelta(seconds=30)
+
+_tasks = {}
+_discovered = False
+
+
+def task(name=None, max_attempts=3):
+    """Déclare une fonction comme tâche de fond (arguments : payload JSON)"""
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__name__}"
+        func.task_name = task_name
+        func.max_attempts = max_attempts
+        _tasks[task_name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    global _discovered
+    if name not in _tasks and not _discovered:
+        autodiscover_modules('tasks')
+        _discovered = True
+    return _tasks[name]
+
+
+def enqueue(func_or_name, payload=None, key=None, delay=None, max_attempts=None):
+    """
+    Ajoute une tâche à la file. Retourne le Job, ou None si une tâche de même
+    clé est déjà en attente / en cours.
+    """
+    name = getattr(func_or_name, 'task_name', func_or_name)
+    if max_attempts is None:
+        max_attempts = getattr(func_or_name, 'max_attempts', 3)
+    job = Job(
+        name=name,
+        payload=payload or {},
+        key=key,
+        max_attempts=max_attempts,
+        run_after=timezone.now() + (delay or timedelta(0)),
+    )
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        if key is None:
+            raise
+        return None
+    return job
+
+
+def _claimable(now):
+    return Q(status='queued', run_after__lte=now) | Q(
+        status='running', locked_until__lt=now, attempts__lt=F('max_attempts'),
+    )
+
+
+def _fail_exhausted(now):
+    """Réservations expirées sur la dernière tentative (worker tué : OOM, SIGKILL...) : tâches échouées"""
+    return Job.objects.filter(
+        status='running', locked_until__lt=now, attempts__gte=F('max_attempts'),
+    ).update(
+        status='failed', locked_until=None, finished_at=now,
+        last_error="Réservation expirée à la dernière tentative (worker disparu pendant l'exécution)",
+    )
+
+
+def claim(worker_id, visibility_timeout=VISIBILITY_TIMEOUT, limit=10):
+    """Réserve jusqu'à `limit` tâches prêtes pour `worker_id`"""
+    now = timezone.now()
+    _fail_exhausted(now)
+    candidates = list(
+        Job.objects.filter(_claimable(now)).order_by('run_after', 'id').values_list('id', flat=True)[:limit]
+    )
+    claimed = []
+    for job_id in candidates:
+        # Seul le premier worker à passer l'UPDATE obtient la tâche
+        won = Job.objects.filter(_claimable(now), pk=job_id).update(
+            status='running',
+            locked_by=worker_id,
+            locked_until=now + visibility_timeout,
+            attempts=F('attempts') + 1,
+        )
+        if won:
+            claimed.append(Job.objects.get(pk=job_id))
+    return claimed
+
+
+def run_job(job):
+    """Exécute une tâche réservée et enregistre son issue. Retourne True si réussie."""
+    owned = Job.objects.filter(pk=job.pk, status='running', locked_by=job.locked_by)
+    try:
+        func = get_task(job.name)
+        with transaction.atomic():
+            func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception("Échec de la tâche %s (tentative %s)", job, job.attempts)
+        if job.attempts >= job.max_attempts:
+            owned.update(status='failed', last_error=error, locked_until=None,
+                         finished_at=timezone.now())
+        else:
+            owned.update(
+                status='queued', last_error=error, locked_until=None,
+                run_after=timezone.now() + RETRY_DELAY * 2 ** (job.attempts - 1),
+            )
+        return False
+
+    owned.update(status='done', locked_until=None, finished_at=timezone.now())
+    return True
+
+
+def run_pending(worker_id, visibility_timeout=VISIBILITY_TIMEOUT, limit=5):
+    """Réserve et exécute un lot de tâches prêtes. Retourne le nombre traité."""
+    jobs = claim(worker_id, visibility_timeout, limit)
+    for job in jobs:
+        run_job(job)
+    return len(jobs)
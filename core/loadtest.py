@@ -0,0 +1,325 @@
+"""
+Rejeu de trafic HTTP : toute la pile (middlewares, sessions, gabarits, verrous
+SQLite) sous une charge concurrente réaliste.
+
+`start_server` sert l'application WSGI dans un serveur multi-thread local
+(celui de runserver), instrumenté pour signaler les erreurs de verrouillage de
+la base (en-tête ERROR_HEADER). Des processus clients (`run_client`) y jouent
+des parcours scriptés : connexion par email, navigation, pari, classement,
+déclaration de mort. Les clients n'importent pas Django : les chemins sont
+résolus par le parent (`resolve_paths`), quelle que soit la méthode de
+démarrage des processus (fork, spawn, forkserver). Chaque requête HTTP est
+chronométrée côté client ; `summarize` en tire débit, p50/p95/p99 et taux
+d'erreurs par point d'accès.
+Utilisé par la commande `manage.py loadtest`.
+"""
+import http.client
+import random
+import signal
+import sys
+import threading
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+
+ERROR_HEADER = 'X-Load-Error'
+_ERROR_ENVIRON_KEY = 'loadtest.error'
+
+# Poids relatifs des parcours (tirage à chaque itération d'un client)
+JOURNEY_WEIGHTS = {
+    'browse': 40,
+    'bet': 25,
+    'leaderboard': 20,
+    'login': 10,
+    'declare_death': 5,
+}
+
+ClientPlan = namedtuple('ClientPlan', [
+    'index', 'host', 'port', 'email', 'password', 'owned_plant_ids', 'plant_ids',
+    'min_bet', 'duration', 'think_time', 'weights', 'seed', 'timeout', 'paths',
+])
+
+# Une requête HTTP mesurée ; error : None, 'lock_timeout', 'server', 'client',
+# 'unexpected_status' ou 'connection'
+Sample = namedtuple('Sample', ['endpoint', 'status', 'ms', 'error'])
+
+
+# --- Serveur ---
+
+def is_lock_error(exc):
+    """Attente de verrou expirée (SQLite : « database is locked », PostgreSQL : lock timeout)"""
+    from django.db import OperationalError
+
+    return isinstance(exc, OperationalError) and 'lock' in str(exc).lower()
+
+
+def _flag_exception(sender, request=None, **kwargs):
+    if request is not None:
+        exc = sys.exc_info()[1]
+        request.environ[_ERROR_ENVIRON_KEY] = 'lock_timeout' if is_lock_error(exc) else 'server'
+
+
+def instrument(app):
+    """Application WSGI qui ajoute ERROR_HEADER aux réponses issues d'une exception"""
+    def wrapper(environ, start_response):
+        def start(status, headers, exc_info=None):
+            error = environ.get(_ERROR_ENVIRON_KEY)
+            if error:
+                headers = [*headers, (ERROR_HEADER, error)]
+            return start_response(status, headers, exc_info)
+        return app(environ, start)
+    return wrapper
+
+
+def create_server(host='127.0.0.1', port=0):
+    """Serveur WSGI multi-thread lié au port (0 : port libre), pas encore démarré"""
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.signals import got_request_exception
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    got_request_exception.connect(_flag_exception, dispatch_uid='core.loadtest.flag')
+    server = ThreadedWSGIServer((host, port), QuietHandler)
+    server.set_app(instrument(WSGIHandler()))
+    return server
+
+
+def start_server(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+
+def start_job_workers(count, stop, poll_interval=0.2):
+    """Threads qui exécutent la file de tâches (résolution des paris après une mort)"""
+    from django.db import connection
+
+    from . import jobs
+
+    def loop(index):
+        worker_id = f'loadtest:{index}'
+        visibility_timeout = timedelta(minutes=5)
+        while not stop.is_set():
+            if not jobs.run_pending(worker_id, visibility_timeout):
+                stop.wait(poll_interval)
+        connection.close()
+
+    threads = [threading.Thread(target=loop, args=(index,), daemon=True) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def prepare_accounts(world, clients, password, owned_per_client=3):
+    """
+    Comptes des clients (les mieux dotés en points) : mot de passe connu et
+    quelques plantes à eux, pour les déclarations de mort.
+    Retourne ([(email, plantes possédées)], plantes ouvertes aux paris).
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+
+    from leaderboard.models import UserScore
+    from plants.models import Plant
+
+    from . import counters
+
+    user_ids = list(
+        UserScore.objects.order_by('-total_points', 'user_id').values_list('user_id', flat=True)[:clients]
+    )
+    User.objects.filter(pk__in=user_ids).update(password=make_password(password))
+    emails = dict(User.objects.filter(pk__in=user_ids).values_list('pk', 'email'))
+
+    # La plante populaire (la plus pariée) reste ouverte aux paris
+    candidates = world.plant_ids[1:]
+    owned_per_client = min(owned_per_client, len(candidates) // (2 * len(user_ids)))
+    accounts, owned_ids = [], set()
+    for index, user_id in enumerate(user_ids):
+        owned = candidates[index * owned_per_client:(index + 1) * owned_per_client]
+        Plant.objects.filter(pk__in=owned).update(owner_id=user_id)
+        owned_ids.update(owned)
+        accounts.append((emails[user_id], owned))
+    counters.reconcile()
+    return accounts, [pk for pk in world.plant_ids if pk not in owned_ids]
+
+
+def resolve_paths(plant_ids):
+    """Chemins des parcours, résolus une fois dans le parent : {nom: chemin}, 'plant_detail' : {pk: chemin}"""
+    from django.urls import reverse
+
+    return {
+        'login': reverse('login'),
+        'plant_list': reverse('plant_list'),
+        'leaderboard': reverse('leaderboard'),
+        'plant_detail': {pk: reverse('plant_detail', args=[pk]) for pk in plant_ids},
+    }
+
+
+# --- Clients ---
+
+class Session:
+    """
+    Utilisateur virtuel : cookies conservés, jeton CSRF repris du cookie,
+    redirections non suivies (chaque requête est mesurée séparément)
+    """
+
+    def __init__(self, host, port, timeout=30):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.cookies = {}
+        self.samples = []
+
+    def request(self, endpoint, method, path, data=None, expect=(200,)):
+        """Retourne (statut, en-tête Location) ; (0, None) si la connexion échoue"""
+        headers = {'Host': f'{self.host}:{self.port}', 'Connection': 'close'}
+        body = None
+        if data is not None:
+            body = urlencode({**data, 'csrfmiddlewaretoken': self.cookies.get('csrftoken', '')})
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, body, headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self._add(endpoint, 0, start, 'connection')
+            return 0, None
+        finally:
+            connection.close()
+
+        for header in response.headers.get_all('Set-Cookie') or []:
+            for name, morsel in SimpleCookie(header).items():
+                if morsel.value and morsel['max-age'] != '0':
+                    self.cookies[name] = morsel.value
+                else:
+                    self.cookies.pop(name, None)
+
+        status = response.status
+        error = response.getheader(ERROR_HEADER)
+        if error is None and status not in expect:
+            if status >= 500:
+                error = 'server'
+            elif status >= 400:
+                error = 'client'
+            else:
+                error = 'unexpected_status'
+        self._add(endpoint, status, start, error)
+        return status, response.getheader('Location')
+
+    def _add(self, endpoint, status, start, error):
+        self.samples.append(Sample(endpoint, status, (time.perf_counter() - start) * 1000, error))
+
+
+def journey_login(session, plan, rng):
+    session.cookies.clear()
+    session.request('login', 'GET', plan.paths['login'])
+    session.request('login_submit', 'POST', plan.paths['login'], {
+        'email': plan.email, 'password': plan.password,
+    }, expect=(302,))
+
+
+def journey_browse(session, plan, rng):
+    session.request('plant_list', 'GET', plan.paths['plant_list'])
+    session.request('plant_detail', 'GET', plan.paths['plant_detail'][rng.choice(plan.plant_ids)])
+
+
+def journey_bet(session, plan, rng):
+    url = plan.paths['plant_detail'][rng.choice(plan.plant_ids)]
+    session.request('plant_detail', 'GET', url)
+    # 200 : pari refusé (doublon, solde insuffisant), réponse métier attendue
+    session.request('place_bet', 'POST', url, {
+        'place_bet': '1',
+        'predicted_death_date': (date.today() + timedelta(days=rng.randint(1, 365))).isoformat(),
+        'bet_amount': plan.min_bet,
+    }, expect=(200, 302))
+
+
+def journey_leaderboard(session, plan, rng):
+    session.request('leaderboard', 'GET', plan.paths['leaderboard'])
+
+
+def journey_declare_death(session, plan, rng):
+    if not plan.owned_plant_ids:
+        return journey_browse(session, plan, rng)
+    url = plan.paths['plant_detail'][plan.owned_plant_ids.pop()]
+    session.request('plant_detail', 'GET', url)
+    session.request('declare_death', 'POST', url, {'declare_death': '1'}, expect=(302,))
+
+
+JOURNEYS = {
+    'browse': journey_browse,
+    'bet': journey_bet,
+    'leaderboard': journey_leaderboard,
+    'login': journey_login,
+    'declare_death': journey_declare_death,
+}
+
+
+def run_client(plan, start_event, results):
+    """Processus client : se connecte puis enchaîne des parcours jusqu'à l'échéance"""
+    # Le processus parent gère l'arrêt (Ctrl+C)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    rng = random.Random(plan.seed)
+    session = Session(plan.host, plan.port, plan.timeout)
+    names, weights = zip(*plan.weights.items())
+    plan = plan._replace(owned_plant_ids=list(plan.owned_plant_ids))
+
+    start_event.wait()
+    journey_login(session, plan, rng)
+    deadline = time.monotonic() + plan.duration
+    while time.monotonic() < deadline:
+        JOURNEYS[rng.choices(names, weights)[0]](session, plan, rng)
+        if plan.think_time:
+            time.sleep(rng.uniform(0, 2 * plan.think_time))
+    results.put((plan.index, [tuple(sample) for sample in session.samples]))
+
+
+# --- Résultats ---
+
+def _percentile(ordered, q):
+    """Rang le plus proche sur une liste triée"""
+    return ordered[min(len(ordered) - 1, max(int(round(q * len(ordered))) - 1, 0))]
+
+
+def _stats(samples, wall_seconds):
+    ordered = sorted(sample.ms for sample in samples)
+    errors = {}
+    for sample in samples:
+        if sample.error:
+            errors[sample.error] = errors.get(sample.error, 0) + 1
+    count = len(samples)
+    return {
+        'requests': count,
+        'throughput_rps': round(count / wall_seconds, 2) if wall_seconds else None,
+        'p50_ms': round(_percentile(ordered, 0.50), 2),
+        'p95_ms': round(_percentile(ordered, 0.95), 2),
+        'p99_ms': round(_percentile(ordered, 0.99), 2),
+        'max_ms': round(ordered[-1], 2),
+        'error_rate': round(sum(errors.values()) / count, 4),
+        'lock_timeout_rate': round(errors.get('lock_timeout', 0) / count, 4),
+        'errors': errors,
+    }
+
+
+def summarize(samples, wall_seconds):
+    """Statistiques par point d'accès et globales : {'endpoints': {...}, 'total': {...}}"""
+    samples = [Sample(*sample) for sample in samples]
+    by_endpoint = {}
+    for sample in samples:
+        by_endpoint.setdefault(sample.endpoint, []).append(sample)
+    return {
+        'endpoints': {
+            endpoint: _stats(rows, wall_seconds) for endpoint, rows in sorted(by_endpoint.items())
+        },
+        'total': _stats(samples, wall_seconds) if samples else None,
+    }
@@ -0,0 +1,92 @@
+import json
+import platform
+import subprocess
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from core import bench
+
+
+class Command(BaseCommand):
+    help = (
+        "Crée un monde synthétique reproductible dans une base dédiée (base de test) "
+        "et chronomètre les chemins critiques ; résultats en JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(bench.SCALES), default='small',
+                            help="Taille prédéfinie (large : 1 million de paris)")
+        parser.add_argument('--users', type=int)
+        parser.add_argument('--plants', type=int)
+        parser.add_argument('--bets', type=int)
+        parser.add_argument('--measurements', type=int)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=5, help="Exécutions mesurées par scénario")
+        parser.add_argument('--output', '-o', help="Fichier JSON (sortie standard par défaut)")
+
+    def handle(self, *args, **options):
+        scale = bench.SCALES[options['scale']]._replace(**{
+            field: options[field] for field in bench.Scale._fields if options[field] is not None
+        })
+        if scale.users < 2 or scale.plants < 2:
+            raise CommandError("Il faut au moins 2 utilisateurs et 2 plantes.")
+        if scale.bets > scale.users * (scale.plants - 1):
+            raise CommandError("Trop de paris pour le nombre de couples (utilisateur, plante).")
+
+        # Base et cache dédiés : les données réelles ne sont jamais touchées
+        old_name = connection.settings_dict['NAME']
+        verbosity = options['verbosity']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                CACHES=bench.CACHES,
+                DEBUG=False,
+                REQUEST_METRICS_ENABLED=False,
+            ):
+                start = time.perf_counter()
+                world = bench.seed_world(scale, seed=options['seed'])
+                seed_seconds = time.perf_counter() - start
+                if verbosity:
+                    self.stderr.write(f"Monde créé en {seed_seconds:.1f} s : {scale}")
+                results = bench.run_scenarios(world, repeat=options['repeat'], seed=options['seed'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            'meta': {
+                'commit': _git_commit(),
+                'date': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'scale': scale._asdict(),
+                'seed': options['seed'],
+                'repeat': options['repeat'],
+                'seed_seconds': round(seed_seconds, 2),
+            },
+            'results': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+            if verbosity:
+                self.stderr.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
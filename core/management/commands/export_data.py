@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import exports
+
+
+class Command(BaseCommand):
+    help = "Exporte en flux les paris, scores ou journaux d'activité (NDJSON ou CSV)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(exports.DATASETS))
+        parser.add_argument('--format', dest='fmt', choices=sorted(exports.FORMATS), default='ndjson')
+        parser.add_argument('--since', help="Date/heure ISO de début (incluse)")
+        parser.add_argument('--until', help="Date/heure ISO de fin (exclue)")
+        parser.add_argument('--user', help="Id ou nom d'utilisateur")
+        parser.add_argument('--output', '-o', help="Fichier de sortie (sortie standard par défaut)")
+
+    def handle(self, *args, **options):
+        try:
+            filters = exports.parse_filters(
+                since=options['since'], until=options['until'], user=options['user']
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        chunks = exports.stream_export(options['dataset'], options['fmt'], **filters)
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
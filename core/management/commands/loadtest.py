@@ -0,0 +1,173 @@
+import json
+import multiprocessing
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import override_settings
+
+from core import bench, loadtest
+from core.models import SiteSettings
+
+PASSWORD = 'charge-test-2025'
+HOST = '127.0.0.1'
+
+
+class Command(BaseCommand):
+    help = (
+        "Rejoue des parcours utilisateurs concurrents (processus clients) contre l'application "
+        "servie localement, sur un monde synthétique dans une base dédiée ; "
+        "débit, p50/p95/p99 et taux d'erreurs par point d'accès"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(bench.SCALES), default='small',
+                            help="Taille du monde synthétique (voir la commande bench)")
+        parser.add_argument('--clients', '-c', type=int, default=8,
+                            help="Processus clients (un utilisateur connecté chacun)")
+        parser.add_argument('--duration', type=float, default=30, help="Durée du rejeu (secondes)")
+        parser.add_argument('--think-time', type=float, default=0,
+                            help="Pause moyenne entre deux parcours (secondes)")
+        parser.add_argument('--journey', action='append', choices=sorted(loadtest.JOURNEYS),
+                            help="Limite le rejeu à ces parcours (option répétable)")
+        parser.add_argument('--job-workers', type=int, default=1,
+                            help="Threads exécutant la file de tâches pendant le rejeu (0 : aucun)")
+        parser.add_argument('--timeout', type=float, default=30, help="Délai d'attente HTTP (secondes)")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', action='store_true', help="Sortie JSON")
+        parser.add_argument('--output', '-o', help="Fichier JSON (implique --json)")
+
+    def handle(self, *args, **options):
+        clients = options['clients']
+        if clients < 1 or options['duration'] <= 0:
+            raise CommandError("Il faut au moins un client et une durée positive.")
+        weights = {
+            name: weight for name, weight in loadtest.JOURNEY_WEIGHTS.items()
+            if not options['journey'] or name in options['journey']
+        }
+        scale = bench.SCALES[options['scale']]
+
+        # Base dédiée (fichier : partagée par les threads du serveur)
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+                raise CommandError("La base de test SQLite doit être un fichier (DATABASES TEST NAME).")
+            # Cache dédié, mesures par vue coupées : rien du trafic synthétique n'atteint le cache partagé
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, HOST],
+                CACHES=bench.CACHES,
+                DEBUG=False,
+                REQUEST_METRICS_ENABLED=False,
+            ):
+                report = self._run(scale, clients, weights, options)
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report['meta'].update(scale=scale._asdict(), seed=options['seed'], database=connection.vendor)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(json.dumps(report, indent=2) + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}"))
+        elif options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print(report)
+
+    def _run(self, scale, clients, weights, options):
+        verbosity = options['verbosity']
+        world = bench.seed_world(scale, seed=options['seed'])
+        accounts, plant_ids = loadtest.prepare_accounts(world, clients, PASSWORD)
+        min_bet = SiteSettings.get_instance().min_bet_amount
+        paths = loadtest.resolve_paths(world.plant_ids)
+
+        # Serveur lié avant la création des clients ; aucune connexion partagée avec eux
+        server = loadtest.create_server(HOST)
+        port = server.server_address[1]
+        connections.close_all()
+        start_event = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(
+                target=loadtest.run_client,
+                args=(loadtest.ClientPlan(
+                    index=index, host=HOST, port=port, email=email, password=PASSWORD,
+                    owned_plant_ids=owned, plant_ids=plant_ids, min_bet=min_bet,
+                    duration=options['duration'], think_time=options['think_time'],
+                    weights=weights, seed=options['seed'] * 1000 + index, timeout=options['timeout'],
+                    paths=paths,
+                ), start_event, results),
+                daemon=True,
+            )
+            for index, (email, owned) in enumerate(accounts)
+        ]
+        for process in processes:
+            process.start()
+
+        loadtest.start_server(server)
+        stop = threading.Event()
+        workers = loadtest.start_job_workers(options['job_workers'], stop)
+        if verbosity:
+            self.stderr.write(
+                f"{len(processes)} client(s) contre http://{HOST}:{port}/ pendant {options['duration']:g} s…"
+            )
+
+        samples = []
+        start = time.perf_counter()
+        start_event.set()
+        try:
+            # Vider la file avant join : un processus ne se termine pas tant que ses résultats y sont
+            deadline = time.monotonic() + options['duration'] + 2 * options['timeout'] + 30
+            for _ in processes:
+                samples.extend(results.get(timeout=max(deadline - time.monotonic(), 1))[1])
+        except queue.Empty:
+            raise CommandError("Des clients n'ont pas rendu leurs résultats à temps.")
+        finally:
+            wall_seconds = time.perf_counter() - start
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            stop.set()
+            for worker in workers:
+                worker.join()
+            server.shutdown()
+            server.server_close()
+
+        report = loadtest.summarize(samples, wall_seconds)
+        report['meta'] = {
+            'clients': len(processes),
+            'duration': options['duration'],
+            'wall_seconds': round(wall_seconds, 2),
+            'think_time': options['think_time'],
+            'journeys': weights,
+            'job_workers': options['job_workers'],
+        }
+        return report
+
+    def _print(self, report):
+        meta = report['meta']
+        self.stdout.write(
+            f"{meta['clients']} clients, {meta['wall_seconds']} s, base {meta['database']}"
+        )
+        label = "point d'accès"
+        self.stdout.write(
+            f"{label:<16} {'req':>7} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} "
+            f"{'erreurs':>8} {'verrous':>8}"
+        )
+        rows = list(report['endpoints'].items())
+        if report['total']:
+            rows.append(('TOTAL', report['total']))
+        for endpoint, row in rows:
+            self.stdout.write(
+                f"{endpoint:<16} {row['requests']:>7} {row['throughput_rps']:>8} "
+                f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8} "
+                f"{row['error_rate']:>8.2%} {row['lock_timeout_rate']:>8.2%}"
+            )
+        errors = (report['total'] or {}).get('errors')
+        if errors:
+            self.stdout.write("Erreurs : " + ', '.join(f"{kind} {count}" for kind, count in sorted(errors.items())))
@@ -0,0 +1,42 @@
+import gzip
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import activity
+
+
+class Command(BaseCommand):
+    help = "Supprime (et archive éventuellement) les mois de journal d'activité hors rétention"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-months', type=int, default=12,
+                            help="Nombre de mois conservés, mois courant inclus")
+        parser.add_argument('--archive-dir',
+                            help="Archive chaque mois en activity-AAAAMM.ndjson.gz avant suppression")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Affiche les mois concernés sans rien supprimer")
+
+    def handle(self, *args, **options):
+        if options['keep_months'] < 1:
+            raise CommandError("--keep-months doit être au moins 1.")
+        archive_dir = options['archive_dir']
+        if archive_dir and not os.path.isdir(archive_dir):
+            raise CommandError(f"Dossier d'archive introuvable : {archive_dir}")
+
+        # Les entrées encore en tampon dans ce processus sont écrites d'abord
+        activity.flush()
+        months = activity.expired_months(options['keep_months'])
+        for month in months:
+            if options['dry_run']:
+                self.stdout.write(f"{month} : à supprimer")
+                continue
+            if archive_dir:
+                path = os.path.join(archive_dir, f"activity-{month}.ndjson.gz")
+                with gzip.open(path, 'wt', encoding='utf-8') as output:
+                    archived = activity.archive_month(month, output)
+                self.stdout.write(f"{month} : {archived} entrée(s) archivée(s) dans {path}")
+            deleted = activity.drop_month(month)
+            self.stdout.write(f"{month} : {deleted} entrée(s) supprimée(s)")
+
+        self.stdout.write(self.style.SUCCESS(f"{len(months)} mois traité(s)."))
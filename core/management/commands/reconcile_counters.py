@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core import counters
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs dénormalisés depuis les plantes et les paris et corrige les écarts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Affiche les écarts sans les corriger")
+
+    def handle(self, *args, **options):
+        drifts = counters.reconcile(dry_run=options['dry_run'])
+        for drift in drifts:
+            scope = f"utilisateur {drift.user_id}" if drift.user_id else "site"
+            self.stdout.write(
+                f"{drift.name} ({scope}) : {drift.stored} stocké, {drift.expected} attendu"
+            )
+        if not drifts:
+            self.stdout.write(self.style.SUCCESS("Compteurs à jour."))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"{len(drifts)} écart(s) (non corrigés)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{len(drifts)} compteur(s) corrigé(s)."))
@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core import metrics
+
+
+class Command(BaseCommand):
+    help = "Affiche les histogrammes par vue (latence, requêtes SQL, doublons N+1)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help="Sortie JSON")
+        parser.add_argument('--reset', action='store_true', help="Remet les compteurs à zéro")
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            metrics.reset()
+            self.stdout.write(self.style.SUCCESS("Mesures remises à zéro."))
+            return
+
+        rows = []
+        for view, histograms in sorted(metrics.snapshot().items()):
+            latency = histograms['latency_ms']
+            rows.append({
+                'view': view,
+                'requests': latency.count,
+                'latency_p50_ms': latency.percentile(0.50),
+                'latency_p95_ms': latency.percentile(0.95),
+                'latency_p99_ms': latency.percentile(0.99),
+                'latency_avg_ms': round(latency.mean, 1),
+                'queries_avg': round(histograms['queries'].mean, 1),
+                'queries_p95': histograms['queries'].percentile(0.95),
+                'sql_avg_ms': round(histograms['sql_ms'].mean, 1),
+                'duplicates_avg': round(histograms['duplicates'].mean, 1),
+            })
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'vue':<32} {'req':>6} {'p50':>6} {'p95':>6} {'p99':>6} "
+            f"{'SQL moy':>8} {'SQL p95':>8} {'dupl.':>6}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['view']:<32} {row['requests']:>6} {_fmt(row['latency_p50_ms']):>6} "
+                f"{_fmt(row['latency_p95_ms']):>6} {_fmt(row['latency_p99_ms']):>6} "
+                f"{row['queries_avg']:>8} {_fmt(row['queries_p95']):>8} {row['duplicates_avg']:>6}"
+            )
+
+
+def _fmt(bound):
+    """Borne de case d'histogramme (None : au-delà du dernier seuil)"""
+    return '>max' if bound is None else str(bound)
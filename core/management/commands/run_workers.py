@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import jobs
+
+
+def _worker_loop(index, stop, options):
+    """Boucle d'un processus worker : réserve et exécute les tâches prêtes"""
+    # Le processus parent gère l'arrêt (Ctrl+C / SIGTERM) via l'événement `stop`
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    visibility_timeout = timedelta(seconds=options['visibility_timeout'])
+
+    while not stop.is_set():
+        processed = jobs.run_pending(worker_id, visibility_timeout, options['batch_size'])
+        if not processed:
+            if options['burst']:
+                break
+            stop.wait(options['poll_interval'])
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Lance les workers de la file de tâches de fond (base de données, sans broker)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', '-p', type=int, default=2,
+                            help="Nombre de processus workers")
+        parser.add_argument('--visibility-timeout', type=int, default=300,
+                            help="Secondes avant qu'une tâche réservée non terminée soit reprise")
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Attente (secondes) quand la file est vide")
+        parser.add_argument('--batch-size', type=int, default=5,
+                            help="Tâches réservées à la fois par un worker")
+        parser.add_argument('--burst', action='store_true',
+                            help="Vide la file puis s'arrête")
+
+    def handle(self, *args, **options):
+        # Les connexions ouvertes ne doivent pas être partagées avec les processus fils
+        connections.close_all()
+        stop = multiprocessing.Event()
+        workers = [
+            multiprocessing.Process(target=_worker_loop, args=(index, stop, options), daemon=True)
+            for index in range(max(options['processes'], 1))
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"{len(workers)} worker(s) démarré(s).")
+
+        def request_stop(signum, frame):
+            stop.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        try:
+            while any(worker.is_alive() for worker in workers):
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            stop.set()
+        for worker in workers:
+            worker.join()
+        self.stdout.write(self.style.SUCCESS("Workers arrêtés."))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "Recopie la base principale SQLite dans les réplicas de READ_REPLICAS ; "
+        "avec --interval, en boucle (réplicas en retard d'au plus cet intervalle)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help="Recopie toutes les N secondes jusqu'à interruption (0 : une fois)")
+
+    def handle(self, *args, **options):
+        aliases = replicas.replica_aliases()
+        if not aliases:
+            raise CommandError("Aucun réplica déclaré (variable d'environnement READ_REPLICAS).")
+        if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+            raise CommandError("Seuls les réplicas SQLite locaux sont recopiés ; ailleurs, réplication du serveur.")
+
+        while True:
+            for alias in aliases:
+                replicas.copy_sqlite(alias)
+            if options['verbosity']:
+                self.stdout.write(self.style.SUCCESS(f"{len(aliases)} réplica(s) à jour."))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,214 @@
+"""
+Mesures par vue : latence, nombre de requêtes SQL, temps SQL, doublons.
+
+Chaque processus agrège ses mesures dans des histogrammes à seuils fixes
+(`record`) et publie toutes les REQUEST_METRICS_FLUSH_INTERVAL secondes ses
+totaux cumulés sous sa propre clé du cache Django partagé : aucun compteur
+n'est incrémenté à plusieurs (FileBasedCache n'a pas d'incrément atomique).
+`snapshot` additionne les clés de tous les processus (commande
+request_metrics). `reset` change de génération : chaque processus repart de
+zéro à son envoi suivant.
+"""
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Seuils (bornes supérieures incluses) ; une dernière case compte le dépassement
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+METRICS = {
+    'latency_ms': LATENCY_BUCKETS_MS,
+    'sql_ms': LATENCY_BUCKETS_MS,
+    'queries': COUNT_BUCKETS,
+    'duplicates': COUNT_BUCKETS,
+}
+
+_IN_LIST = re.compile(r'\((?:%s, )+%s\)')
+
+
+def fingerprint(sql):
+    """Empreinte d'une requête : les listes IN (%s, %s, ...) sont ramenées à une forme unique"""
+    return _IN_LIST.sub('(%s...)', sql)
+
+
+class QueryCollector:
+    """
+    Enveloppe d'exécution SQL (connection.execute_wrapper) : compte les
+    requêtes, leur durée et les requêtes répétées (empreintes identiques, N+1)
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    def fingerprints(self):
+        counts = Counter()
+        for sql, count in self.statements.items():
+            counts[fingerprint(sql)] += count
+        return counts
+
+    @property
+    def duplicates(self):
+        """Requêtes exécutées plus d'une fois (au-delà de la première)"""
+        return sum(count - 1 for count in self.fingerprints().values() if count > 1)
+
+    def top_duplicates(self, limit=3):
+        return [(sql, count) for sql, count in self.fingerprints().most_common(limit) if count > 1]
+
+
+class Histogram:
+    def __init__(self, bounds, counts=None, total=0):
+        self.bounds = bounds
+        self.counts = counts or [0] * (len(bounds) + 1)
+        self.total = total
+
+    def observe(self, value):
+        index = len(self.bounds)
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.total += value
+
+    def merge(self, other):
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.total += other.total
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def percentile(self, q):
+        """Borne supérieure de la case contenant le quantile `q` (None au-delà du dernier seuil)"""
+        target = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if count and cumulative >= target:
+                return self.bounds[i] if i < len(self.bounds) else None
+        return None
+
+
+class MetricsStore:
+    """Histogrammes par vue d'un processus, publiés périodiquement dans le cache"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._totals = {}
+        self._generation = None
+        self._process = uuid.uuid4().hex
+        self._last_flush = time.monotonic()
+
+    @property
+    def interval(self):
+        return getattr(settings, 'REQUEST_METRICS_FLUSH_INTERVAL', 10)
+
+    def record(self, view, **values):
+        with self._lock:
+            histograms = self._pending.setdefault(view, _empty())
+            for name, value in values.items():
+                histograms[name].observe(value)
+            due = time.monotonic() - self._last_flush >= self.interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        generation = _generation()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+            if generation != self._generation:
+                # Remise à zéro depuis le dernier envoi
+                self._totals, self._generation = {}, generation
+            for view, histograms in pending.items():
+                totals = self._totals.setdefault(view, _empty())
+                for name, histogram in histograms.items():
+                    totals[name].merge(histogram)
+            data = {
+                view: {name: (histogram.counts[:], histogram.total) for name, histogram in histograms.items()}
+                for view, histograms in self._totals.items()
+            }
+        if not data:
+            return
+        cache.set(_process_key(generation, self._process), data, timeout=None)
+        # Inscription refaite à chaque envoi : une écriture concurrente perdue est réparée au suivant
+        processes = set(cache.get(_processes_key(generation), []))
+        if self._process not in processes:
+            cache.set(_processes_key(generation), sorted(processes | {self._process}), timeout=None)
+
+
+def _empty():
+    return {name: Histogram(bounds) for name, bounds in METRICS.items()}
+
+
+def _generation_key():
+    return 'reqmetrics:generation'
+
+
+def _processes_key(generation):
+    return f'reqmetrics:{generation}:processes'
+
+
+def _process_key(generation, process):
+    return f'reqmetrics:{generation}:{process}'
+
+
+def _generation():
+    generation = cache.get(_generation_key())
+    if generation is None:
+        cache.add(_generation_key(), 1, timeout=None)
+        generation = cache.get(_generation_key(), 1)
+    return generation
+
+
+store = MetricsStore()
+
+
+def record(view, latency_ms, queries, sql_ms, duplicates):
+    store.record(view, latency_ms=latency_ms, queries=queries, sql_ms=sql_ms, duplicates=duplicates)
+
+
+def snapshot():
+    """Histogrammes agrégés (tous processus) : {vue: {mesure: Histogram}}"""
+    generation = _generation()
+    processes = cache.get(_processes_key(generation), [])
+    result = {}
+    for data in cache.get_many([_process_key(generation, process) for process in processes]).values():
+        for view, histograms in data.items():
+            totals = result.setdefault(view, _empty())
+            for name, (counts, total) in histograms.items():
+                if name in totals:
+                    totals[name].merge(Histogram(METRICS[name], counts, total))
+    return result
+
+
+def reset():
+    """Passe à une nouvelle génération et supprime les clés de l'ancienne"""
+    generation = _generation()
+    processes = cache.get(_processes_key(generation), [])
+    cache.set(_generation_key(), generation + 1, timeout=None)
+    cache.delete_many(
+        [_processes_key(generation)] + [_process_key(generation, process) for process in processes]
+    )
@@ -1,6 +1,16 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
 from django.shortcuts import redirect
 from django.urls import reverse
 
+from . import metrics, replicas
+
+logger = logging.getLogger(__name__)
+
 class AuthRequiredMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -19,4 +29,66 @@ class AuthRequiredMiddleware:
                 return redirect(f"{reverse('login')}?next={request.path}")
         
         response = self.get_response(request)
-        return response
\ No newline at end of file
+        return response
+
+class QueryMetricsMiddleware:
+    """
+    Mesure chaque requête HTTP : nombre de requêtes SQL, temps SQL, requêtes
+    répétées (empreintes N+1) et latence de la vue.
+    En DEBUG, les mesures sont renvoyées dans les en-têtes de la réponse ;
+    sinon elles alimentent les histogrammes par vue (core.metrics).
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        collector = metrics.QueryCollector()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(collector))
+            response = self.get_response(request)
+        latency_ms = (time.perf_counter() - start) * 1000
+        sql_ms = collector.duration * 1000
+        duplicates = collector.duplicates
+
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(collector.count)
+            response['X-Query-Time-Ms'] = f"{sql_ms:.1f}"
+            response['X-Query-Duplicates'] = str(duplicates)
+            response['X-View-Time-Ms'] = f"{latency_ms:.1f}"
+            response['Server-Timing'] = f"db;dur={sql_ms:.1f}, total;dur={latency_ms:.1f}"
+            for sql, count in collector.top_duplicates():
+                logger.debug("%s : requête répétée %s fois : %s", view, count, sql)
+        else:
+            metrics.record(view, latency_ms, collector.count, sql_ms, duplicates)
+        return response
+
+class ReplicaPinningMiddleware:
+    """
+    Lire ses propres écritures avec des réplicas (core.replicas) : une requête
+    d'écriture pose un cookie qui ramène le client sur la base principale
+    pendant REPLICA_STICKY_SECONDS
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replicas.replica_aliases():
+            return self.get_response(request)
+
+        with replicas.pinned(replicas.pinned_until(request) > time.time()):
+            response = self.get_response(request)
+        if request.method not in replicas.SAFE_METHODS:
+            seconds = replicas.sticky_seconds()
+            response.set_cookie(
+                replicas.PIN_COOKIE, str(int(time.time() + seconds)), max_age=seconds,
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sitesettings',
+            name='approximate_days',
+            field=models.PositiveIntegerField(default=7, verbose_name='Fenêtre approximative (jours)'),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='close_days',
+            field=models.PositiveIntegerField(default=3, verbose_name='Fenêtre proche (jours)'),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='exact_days',
+            field=models.PositiveIntegerField(default=1, verbose_name='Fenêtre exacte (jours)'),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='scoring_strategy',
+            field=models.CharField(choices=[('tiered', 'Paliers'), ('linear', 'Décroissance linéaire'), ('gaussian', 'Courbe gaussienne')], default='tiered', max_length=20, verbose_name='Stratégie de calcul des gains'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations, models
+from django.db.models.functions import ExtractMonth, ExtractYear
+import django.utils.timezone
+
+
+def fill_month(apps, schema_editor):
+    """Clé AAAAMM des entrées existantes (fuseau courant, comme ActivityLog.month_key)"""
+    ActivityLog = apps.get_model('core', 'ActivityLog')
+    ActivityLog.objects.update(
+        month=ExtractYear('created_at') * 100 + ExtractMonth('created_at')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_notification_notif_user_created_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activitylog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='activitylog',
+            name='month',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_month, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='activitylog',
+            name='month',
+            field=models.PositiveIntegerField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['month', 'created_at'], name='activity_month_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['-created_at'], name='activity_created_idx'),
+        ),
+    ]
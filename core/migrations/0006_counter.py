@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def fill_counters(apps, schema_editor):
+    """Valeurs initiales depuis Plant et Bet (même calcul que core.counters.expected)"""
+    Counter = apps.get_model('core', 'Counter')
+    Plant = apps.get_model('plants', 'Plant')
+    Bet = apps.get_model('bets', 'Bet')
+
+    plants = Plant.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        dead=Count('id', filter=Q(death_date__isnull=False)),
+    )
+    bets = Bet.objects.aggregate(open=Count('id', filter=Q(is_resolved=False)), staked=Sum('bet_amount'))
+    rows = [
+        Counter(name='plants', value=plants['total']),
+        Counter(name='active_plants', value=plants['active']),
+        Counter(name='dead_plants', value=plants['dead']),
+        Counter(name='open_bets', value=bets['open']),
+        Counter(name='total_staked', value=bets['staked'] or 0),
+    ]
+    per_user = [
+        ('plants', Plant.objects.values_list('owner_id').annotate(value=Count('id'))),
+        ('open_bets', Bet.objects.filter(is_resolved=False).values_list('user_id').annotate(value=Count('id'))),
+        ('total_staked', Bet.objects.values_list('user_id').annotate(value=Sum('bet_amount'))),
+    ]
+    for name, queryset in per_user:
+        rows.extend(Counter(name=name, user_id=user_id, value=value) for user_id, value in queryset.order_by())
+    Counter.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_activitylog_month_partition'),
+        ('plants', '0005_measurementrollup'),
+        ('bets', '0002_bet_unique_open_bet'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='Compteur')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Valeur')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Compteur',
+                'verbose_name_plural': 'Compteurs',
+                'constraints': [models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('name',), name='unique_site_counter'), models.UniqueConstraint(condition=models.Q(('user__isnull', False)), fields=('name', 'user'), name='unique_user_counter')],
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations, models
+
+# Index hors de l'état des migrations (auth.User n'appartient pas au projet) :
+# le contrôle core.E001 (core.checks) signale sa disparition
+EMAIL_KEY_CONSTRAINT = 'auth_user_email_key_uniq'
+
+
+class EmailKey(models.Func):
+    """Copie figée de core.backends.EmailKey (même texte SQL que l'index)"""
+    template = "LOWER(NULLIF(%(expressions)s, ''))"
+    output_field = models.CharField()
+
+
+def _constraint():
+    return models.UniqueConstraint(EmailKey('email'), name=EMAIL_KEY_CONSTRAINT)
+
+
+def add_email_key(apps, schema_editor):
+    """Index unique sur l'email normalisé ; refusé tant que des doublons existent"""
+    User = apps.get_model('auth', 'User')
+    duplicates = list(
+        User.objects.annotate(email_key=EmailKey('email')).exclude(email='')
+        .values('email_key').annotate(count=models.Count('id')).filter(count__gt=1)
+        .values_list('email_key', flat=True)
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Emails partagés par plusieurs comptes (à la casse près), à corriger avant migration : "
+            + ', '.join(duplicates)
+        )
+    schema_editor.add_constraint(User, _constraint())
+
+
+def remove_email_key(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    # Index déjà perdu (contrôle core.E001) : le retour arrière le laisse recréer
+    with schema_editor.connection.cursor() as cursor:
+        constraints = schema_editor.connection.introspection.get_constraints(cursor, User._meta.db_table)
+    if EMAIL_KEY_CONSTRAINT in constraints:
+        schema_editor.remove_constraint(User, _constraint())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0006_counter'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_email_key, remove_email_key),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:05
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def fill_unread(apps, schema_editor):
+    """Compteurs de notifications non lues (même calcul que core.counters.expected)"""
+    Counter = apps.get_model('core', 'Counter')
+    Notification = apps.get_model('core', 'Notification')
+    unread = Notification.objects.filter(is_read=False).values_list('user_id').annotate(value=Count('id'))
+    Counter.objects.filter(name='unread_notifications').delete()
+    Counter.objects.bulk_create(
+        [Counter(name='unread_notifications', user_id=user_id, value=value) for user_id, value in unread.order_by()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_user_email_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_unread, migrations.RunPython.noop),
+    ]
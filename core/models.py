@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 class UserProfile(models.Model):
@@ -58,6 +59,22 @@ class SiteSettings(models.Model):
     close_multiplier = models.FloatField(default=3.0, verbose_name="Multiplicateur proche (±3 jours)")
     approximate_multiplier = models.FloatField(default=1.5, verbose_name="Multiplicateur approximatif (±7 jours)")
     
+    # Fenêtres de gain (écart en jours entre la date prédite et la date de mort)
+    SCORING_STRATEGIES = [
+        ('tiered', 'Paliers'),
+        ('linear', 'Décroissance linéaire'),
+        ('gaussian', 'Courbe gaussienne'),
+    ]
+    exact_days = models.PositiveIntegerField(default=1, verbose_name="Fenêtre exacte (jours)")
+    close_days = models.PositiveIntegerField(default=3, verbose_name="Fenêtre proche (jours)")
+    approximate_days = models.PositiveIntegerField(default=7, verbose_name="Fenêtre approximative (jours)")
+    scoring_strategy = models.CharField(
+        max_length=20,
+        choices=SCORING_STRATEGIES,
+        default='tiered',
+        verbose_name="Stratégie de calcul des gains"
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -74,9 +91,9 @@ class SiteSettings(models.Model):
     
     @classmethod
     def get_instance(cls):
-        """Retourne l'instance unique des paramètres du site"""
-        obj, created = cls.objects.get_or_create(pk=1)
-        return obj
+        """Retourne l'instance unique des paramètres du site (cache de référence, lecture seule)"""
+        from .refdata import site_settings
+        return site_settings.get()
 
 class Notification(models.Model):
     """
@@ -105,6 +122,8 @@ class Notification(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', 'is_read', 'created_at']),
+            # Boîte de réception « toutes » : pagination (created_at, id) par utilisateur
+            models.Index(fields=['user', 'created_at', 'id'], name='notif_user_created_idx'),
         ]
     
     def __str__(self):
@@ -112,12 +131,18 @@ class Notification(models.Model):
     
     def mark_as_read(self):
         """Marque la notification comme lue"""
+        from .notifications import adjust_unread
+        if self.is_read:
+            return
         self.is_read = True
-        self.save()
+        # UPDATE conditionnel : le compteur n'est décrémenté qu'une fois
+        with transaction.atomic():
+            if Notification.objects.filter(pk=self.pk, is_read=False).update(is_read=True):
+                adjust_unread({self.user_id: -1})
     
     @classmethod
-    def create_notification(cls, user, notification_type, title, message, related_object=None):
-        """Méthode utilitaire pour créer une notification"""
+    def build(cls, user, notification_type, title, message, related_object=None):
+        """Prépare une notification (non sauvegardée)"""
         notification = cls(
             user=user,
             notification_type=notification_type,
@@ -129,8 +154,38 @@ class Notification(models.Model):
             notification.related_object_id = related_object.pk
             notification.related_object_type = related_object.__class__.__name__
         
-        notification.save()
         return notification
+    
+    @classmethod
+    def create_notification(cls, user, notification_type, title, message, related_object=None):
+        """Méthode utilitaire pour créer une notification"""
+        return cls.send_many([
+            cls.build(user, notification_type, title, message, related_object)
+        ])[0]
+    
+    @classmethod
+    def send_many(cls, notifications, batch_size=500):
+        """
+        Enregistre un lot de notifications préparées avec `build` (bulk_create)
+        et met à jour les compteurs de non lues de chaque destinataire
+        """
+        from .notifications import adjust_unread
+        with transaction.atomic():
+            notifications = cls.objects.bulk_create(notifications, batch_size=batch_size)
+            deltas = {}
+            for notification in notifications:
+                if not notification.is_read:
+                    deltas[notification.user_id] = deltas.get(notification.user_id, 0) + 1
+            adjust_unread(deltas)
+        return notifications
+    
+    @classmethod
+    def notify_users(cls, users, notification_type, title, message, related_object=None):
+        """Envoie la même notification à plusieurs utilisateurs en une seule insertion"""
+        return cls.send_many([
+            cls.build(user, notification_type, title, message, related_object)
+            for user in users
+        ])
 
 class ActivityLog(models.Model):
     """
@@ -151,15 +206,32 @@ class ActivityLog(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
     
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Horodatage fixé à la collecte (les entrées sont écrites en différé, voir core.activity)
+    created_at = models.DateTimeField(default=timezone.now)
+    # Clé de partition mensuelle AAAAMM : purge et archivage par mois entier
+    month = models.PositiveIntegerField(editable=False)
     
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Journal d'activité"
         verbose_name_plural = "Journaux d'activité"
+        indexes = [
+            models.Index(fields=['month', 'created_at'], name='activity_month_idx'),
+            models.Index(fields=['-created_at'], name='activity_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_activity_type_display()} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
+    
+    @staticmethod
+    def month_key(moment):
+        """Clé de partition (AAAAMM, heure locale) d'un horodatage"""
+        moment = timezone.localtime(moment)
+        return moment.year * 100 + moment.month
+    
+    def save(self, *args, **kwargs):
+        self.month = self.month_key(self.created_at)
+        super().save(*args, **kwargs)
 
 class FAQ(models.Model):
     """
@@ -179,4 +251,79 @@ class FAQ(models.Model):
         verbose_name_plural = "FAQs"
     
     def __str__(self):
-        return self.question
\ No newline at end of file
+        return self.question
+
+class Job(models.Model):
+    """
+    Tâche de fond stockée en base (file d'attente sans broker externe).
+    Traitée par `manage.py run_workers` ; voir core.jobs.
+    """
+    STATUSES = [
+        ('queued', 'En attente'),
+        ('running', 'En cours'),
+        ('done', 'Terminée'),
+        ('failed', 'Échouée'),
+    ]
+    
+    name = models.CharField(max_length=100, verbose_name="Tâche")
+    payload = models.JSONField(default=dict, blank=True)
+    # Clé d'idempotence : une seule tâche en attente / en cours par clé
+    key = models.CharField(max_length=200, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    # Délai de visibilité : passé ce moment, une tâche « en cours » est reprise
+    locked_until = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['run_after', 'id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['key'], condition=models.Q(status__in=['queued', 'running']),
+                name='unique_pending_job_key',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_ready_idx'),
+        ]
+        verbose_name = "Tâche de fond"
+        verbose_name_plural = "Tâches de fond"
+    
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.get_status_display()})"
+
+class Counter(models.Model):
+    """
+    Compteur dénormalisé, global (user vide) ou par joueur.
+    Tenu à jour par incréments `F()` (voir core.counters) ; réparé par
+    `manage.py reconcile_counters`.
+    """
+    name = models.CharField(max_length=50, verbose_name="Compteur")
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, null=True, blank=True, related_name='counters'
+    )
+    value = models.BigIntegerField(default=0, verbose_name="Valeur")
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name'], condition=models.Q(user__isnull=True),
+                name='unique_site_counter',
+            ),
+            models.UniqueConstraint(
+                fields=['name', 'user'], condition=models.Q(user__isnull=False),
+                name='unique_user_counter',
+            ),
+        ]
+        verbose_name = "Compteur"
+        verbose_name_plural = "Compteurs"
+    
+    def __str__(self):
+        scope = self.user_id or 'site'
+        return f"{self.name} ({scope}) = {self.value}"
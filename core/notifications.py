@@ -0,0 +1,44 @@
+"""
+Compteurs de notifications non lues, tenus en base (core.counters).
+
+Le compteur d'un joueur (ligne Counter `unread_notifications`) est
+incrémenté à la création et décrémenté à la lecture par des UPDATE `F()`,
+dans la transaction qui écrit les notifications : aucun incrément perdu
+entre processus, aucun écart entre le compteur et la table. Le badge de la
+barre de navigation coûte une lecture par clé unique. Une modification
+faite hors de ces fonctions (admin) est rattrapée par reconcile_counters.
+"""
+from django.db import transaction
+
+from . import counters
+from .models import Counter
+
+
+def unread_count(user):
+    """Nombre de notifications non lues (une requête sur la contrainte unique du compteur)"""
+    user_id = getattr(user, 'pk', user)
+    count = (
+        Counter.objects.filter(name=counters.UNREAD_NOTIFICATIONS, user_id=user_id)
+        .values_list('value', flat=True).first()
+    )
+    return max(count or 0, 0)
+
+
+def adjust_unread(deltas):
+    """Applique {user_id: delta} aux compteurs, dans la transaction en cours"""
+    counters.add({(counters.UNREAD_NOTIFICATIONS, user_id): delta for user_id, delta in dict(deltas).items()})
+
+
+def mark_read(user, ids=None):
+    """
+    Marque comme lues toutes les notifications de `user` (ou celles de `ids`)
+    en un seul UPDATE. Retourne le nombre de notifications modifiées.
+    """
+    from .models import Notification
+    notifications = Notification.objects.filter(user=user, is_read=False)
+    if ids is not None:
+        notifications = notifications.filter(pk__in=ids)
+    with transaction.atomic():
+        updated = notifications.update(is_read=True)
+        adjust_unread({user.pk: -updated})
+    return updated
@@ -0,0 +1,101 @@
+"""
+Pagination par curseur (keyset).
+
+Au lieu d'un OFFSET (dont le coût grandit avec le numéro de page), chaque page
+reprend après la dernière ligne de la précédente : `WHERE (created_at, id) < curseur`.
+Le coût d'une page reste constant quelle que soit la taille de la table, à
+condition qu'un index couvre les champs de tri.
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, pk):
+    """Curseur opaque (base64 url) pour la ligne (created_at, pk)"""
+    raw = json.dumps([created_at.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Retourne (created_at, pk) ou lève InvalidCursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, pk = json.loads(raw)
+        created_at = parse_datetime(created_at)
+        if created_at is None:
+            raise ValueError
+        return created_at, int(pk)
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+
+
+class KeysetPage:
+    """
+    Page de résultats, exposant l'interface utilisée par les templates
+    (has_next, has_previous, next_cursor, previous_cursor)
+    """
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def paginate_keyset(queryset, per_page, after=None, before=None, field='created_at'):
+    """
+    Pagine `queryset` par ordre décroissant de (`field`, id).
+    `after` : curseur de la dernière ligne de la page précédente.
+    `before` : curseur de la première ligne de la page suivante (retour arrière).
+    """
+    if before:
+        value, pk = decode_cursor(before)
+        rows = list(
+            queryset.filter(Q(**{f'{field}__gt': value}) | Q(**{field: value, 'pk__gt': pk}))
+            .order_by(field, 'pk')[:per_page + 1]
+        )
+        has_more = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_previous, has_next = has_more, True
+    else:
+        if after:
+            value, pk = decode_cursor(after)
+            queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk}))
+        rows = list(queryset.order_by(f'-{field}', '-pk')[:per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = bool(after)
+
+    if not rows:
+        return KeysetPage([], None, None)
+
+    first, last = rows[0], rows[-1]
+    return KeysetPage(
+        rows,
+        encode_cursor(getattr(last, field), last.pk) if has_next else None,
+        encode_cursor(getattr(first, field), first.pk) if has_previous else None,
+    )
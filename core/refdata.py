@@ -0,0 +1,116 @@
+"""
+Cache des données de référence (SiteSettings, critères actifs, FAQ).
+
+Chaque processus garde sa propre copie en mémoire pendant REFDATA_CACHE_TTL
+secondes. Une clé de version partagée (cache Django par défaut) est
+incrémentée à chaque post_save/post_delete : à l'expiration du TTL, un
+processus ne recharge ses données que si la version a changé. Le processus
+qui a écrit invalide sa copie immédiatement.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .replicas import use_primary
+
+_registry = {}
+
+
+class ReferenceCache:
+    """Copie locale d'un jeu de données de référence, avec TTL et version partagée"""
+
+    def __init__(self, name, loader, models):
+        self.name = name
+        self.loader = loader
+        self.models = models
+        self._lock = threading.Lock()
+        self._value = None
+        self._version = None
+        self._expires_at = 0.0
+        _registry[name] = self
+
+    @property
+    def version_key(self):
+        return f"refdata:{self.name}:version"
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'REFDATA_CACHE_TTL', 60)
+
+    def _shared_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, 1, timeout=None)
+            version = cache.get(self.version_key, 1)
+        return version
+
+    def get(self):
+        """Retourne les données (à traiter en lecture seule)"""
+        now = time.monotonic()
+        if now < self._expires_at:
+            return self._value
+
+        with self._lock:
+            if now < self._expires_at:
+                return self._value
+            version = self._shared_version()
+            if version != self._version:
+                # Copie partagée par tout le processus : jamais lue sur un réplica en retard
+                with use_primary():
+                    self._value = self.loader()
+                self._version = version
+            self._expires_at = time.monotonic() + self.ttl
+            return self._value
+
+    def clear_local(self):
+        """Oublie la copie locale (rechargée au prochain accès)"""
+        self._expires_at = 0.0
+        self._version = None
+
+    def invalidate(self):
+        """Invalide la copie locale et celle des autres processus"""
+        self.clear_local()
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.add(self.version_key, 1, timeout=None)
+
+
+def _load_site_settings():
+    from .models import SiteSettings
+    obj, created = SiteSettings.objects.get_or_create(pk=1)
+    return obj
+
+
+def _load_active_criteria():
+    from plants.models import Criterion
+    return list(Criterion.objects.filter(is_active=True))
+
+
+def _load_active_faqs():
+    from .models import FAQ
+    return list(FAQ.objects.filter(is_active=True))
+
+
+site_settings = ReferenceCache('site_settings', _load_site_settings, ['core.SiteSettings'])
+active_criteria = ReferenceCache('active_criteria', _load_active_criteria, ['plants.Criterion'])
+active_faqs = ReferenceCache('active_faqs', _load_active_faqs, ['core.FAQ'])
+
+
+def connect_signals():
+    """Branche l'invalidation sur post_save/post_delete des modèles concernés"""
+    for ref in _registry.values():
+        def invalidate(sender, ref=ref, **kwargs):
+            ref.clear_local()
+            # Les autres processus ne doivent recharger qu'après le commit
+            transaction.on_commit(ref.invalidate)
+
+        for model in ref.models:
+            post_save.connect(invalidate, sender=model, weak=False,
+                              dispatch_uid=f"refdata:{ref.name}:{model}:save")
+            post_delete.connect(invalidate, sender=model, weak=False,
+                                dispatch_uid=f"refdata:{ref.name}:{model}:delete")
@@ -0,0 +1,140 @@
+"""
+Lectures sur réplicas (settings.READ_REPLICAS), écritures sur la base principale.
+
+Seules les vues décorées par `replica_reads` lisent sur un réplica, pour
+les requêtes GET/HEAD ; un réplica est tiré au sort pour toute la requête.
+Tout le reste lit sur `default`, de même que les lectures faites dans une
+transaction ouverte sur la base principale.
+
+Lire ses propres écritures : après une requête d'écriture (méthode autre que
+GET/HEAD/OPTIONS), core.middleware.ReplicaPinningMiddleware pose un cookie qui ramène ce
+client sur la base principale pendant REPLICA_STICKY_SECONDS, le temps que
+les réplicas rattrapent leur retard. Les caches partagés (instantané du
+classement, données de référence) se rechargent sous `use_primary()` : un
+réplica en retard n'y fige pas de données périmées.
+"""
+import random
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = threading.local()
+
+
+def replica_aliases():
+    return list(getattr(settings, 'READ_REPLICAS', []))
+
+
+def sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+
+def _current_replica():
+    if getattr(_state, 'primary_depth', 0) or getattr(_state, 'pinned', False):
+        return None
+    return getattr(_state, 'replica', None)
+
+
+@contextmanager
+def use_replicas():
+    """Lectures de ce bloc sur un réplica tiré au sort (sans effet sans réplica)"""
+    aliases = replica_aliases()
+    previous = getattr(_state, 'replica', None)
+    _state.replica = random.choice(aliases) if aliases else None
+    try:
+        yield _state.replica
+    finally:
+        _state.replica = previous
+
+
+@contextmanager
+def use_primary():
+    """Lectures de ce bloc sur la base principale, même dans une vue `replica_reads`"""
+    _state.primary_depth = getattr(_state, 'primary_depth', 0) + 1
+    try:
+        yield
+    finally:
+        _state.primary_depth -= 1
+
+
+def replica_reads(view):
+    """Vue en lecture seule : ses requêtes GET/HEAD lisent sur un réplica"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        with use_replicas():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Routeur de settings.DATABASE_ROUTERS"""
+
+    def db_for_read(self, model, **hints):
+        replica = _current_replica()
+        if replica is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Mêmes données partout : relations permises entre principale et réplicas
+        aliases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Les réplicas sont des copies : jamais migrés directement
+        if db in replica_aliases():
+            return False
+        return None
+
+
+@contextmanager
+def pinned(flag=True):
+    """Client revenu récemment d'une écriture : toutes ses lectures sur la base principale"""
+    previous = getattr(_state, 'pinned', False)
+    _state.pinned = flag
+    try:
+        yield
+    finally:
+        _state.pinned = previous
+
+
+def pinned_until(request):
+    """Échéance (secondes epoch) du cookie PIN_COOKIE ; 0 sans cookie"""
+    try:
+        return int(request.COOKIES.get(PIN_COOKIE, 0))
+    except ValueError:
+        return 0
+
+
+def copy_sqlite(alias):
+    """
+    Réplica SQLite local : copie cohérente de la base principale (API de
+    sauvegarde de sqlite3), substituée atomiquement au fichier du réplica
+    """
+    import os
+    import sqlite3
+
+    source = connections[DEFAULT_DB_ALIAS]
+    target = str(connections[alias].settings_dict['NAME'])
+    connections[alias].close()
+    source.ensure_connection()
+    temporary = f'{target}.tmp'
+    destination = sqlite3.connect(temporary)
+    try:
+        source.connection.backup(destination)
+    finally:
+        destination.close()
+    os.replace(temporary, target)
@@ -1,8 +1,10 @@
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.contrib.auth.models import User
+from bets.models import Bet
+from plants.models import Plant
 from .models import UserProfile
-from .models import ActivityLog
+from . import activity, counters
 
 
 @receiver(post_save, sender=User)
@@ -29,8 +31,32 @@ def log_user_registration(sender, instance, created, **kwargs):
     Log l'inscription d'un nouvel utilisateur
     """
     if created:
-        ActivityLog.objects.create(
-            activity_type='user_registered',
+        activity.log(
+            'user_registered',
+            f"Nouvel utilisateur inscrit: {instance.username}",
             user=instance,
-            description=f"Nouvel utilisateur inscrit: {instance.username}"
-        )
\ No newline at end of file
+        )
+
+@receiver(post_save, sender=Plant)
+@receiver(post_save, sender=Bet)
+def count_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Compteurs dénormalisés : un changement d'état retire l'ancien et ajoute le
+    nouveau (état inconnu, instance construite à la main : laissé à reconcile_counters)
+    """
+    if raw:
+        return
+    old = None if created else getattr(instance, '_counted_state', None)
+    new = instance.counter_state()
+    if created or old is not None:
+        counters.add(counters.change(_deltas_for(sender), old, new))
+    instance._counted_state = new
+
+@receiver(post_delete, sender=Plant)
+@receiver(post_delete, sender=Bet)
+def count_deleted(sender, instance, **kwargs):
+    old = getattr(instance, '_counted_state', None) or instance.counter_state()
+    counters.add(counters.change(_deltas_for(sender), old, None))
+
+def _deltas_for(model):
+    return counters.plant_deltas if model is Plant else counters.bet_deltas
@@ -0,0 +1,52 @@
+"""
+Tâches de fond du noyau (voir core.jobs)
+"""
+from bets.models import Bet
+from plants.models import Plant
+
+from . import jobs
+from .models import Notification
+
+
+@jobs.task(name='core.notify_plant_death')
+def notify_plant_death(plant_id):
+    """
+    Prévient le propriétaire et les parieurs d'une plante morte (paris résolus).
+    Idempotente : les paris déjà notifiés sont ignorés.
+    """
+    plant = Plant.objects.select_related('owner').get(pk=plant_id)
+    bets = Bet.objects.filter(plant=plant, is_resolved=True).select_related('user')
+    already_notified = set(
+        Notification.objects.filter(
+            related_object_type='Bet', related_object_id__in=bets.values('pk'),
+        ).values_list('related_object_id', flat=True)
+    )
+
+    notifications = []
+    if not Notification.objects.filter(
+        user=plant.owner, notification_type='plant_died',
+        related_object_type='Plant', related_object_id=plant.pk,
+    ).exists():
+        notifications.append(Notification.build(
+            plant.owner, 'plant_died', f"{plant.name} est morte",
+            f"Votre plante {plant.name} a été déclarée morte.", related_object=plant,
+        ))
+
+    for bet in bets.iterator(chunk_size=2000):
+        if bet.pk in already_notified:
+            continue
+        if bet.won:
+            notifications.append(Notification.build(
+                bet.user, 'bet_won', "Pari gagné !",
+                f"{plant.name} est morte : votre pari vous rapporte {bet.points_won} points.",
+                related_object=bet,
+            ))
+        else:
+            notifications.append(Notification.build(
+                bet.user, 'bet_lost', "Pari perdu",
+                f"{plant.name} est morte : votre pari de {bet.bet_amount} points est perdu.",
+                related_object=bet,
+            ))
+
+    # Une insertion groupée pour tous les destinataires
+    Notification.send_many(notifications)
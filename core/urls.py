@@ -10,4 +10,7 @@ urlpatterns = [
     path('profile/change-password/', views.change_password, name='change_password'),
     path('rules/', views.rules, name='rules'),
     path('leaderboard/', views.leaderboard, name='leaderboard'),
+    path('notifications/', views.notifications_inbox, name='notifications'),
+    path('notifications/api/', views.notifications_api, name='notifications_api'),
+    path('exports/<str:dataset>.<str:fmt>', views.export_data, name='export_data'),
 ]
\ No newline at end of file
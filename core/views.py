@@ -4,35 +4,43 @@ from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import update_session_auth_hash
 from django.contrib import messages
-from django.contrib.auth.models import User
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_http_methods
+import json
 
 # Imports des modèles externes
 from plants.models import Plant
 from bets.models import Bet
 from leaderboard.models import UserScore
+from leaderboard import snapshot as leaderboard_snapshot
 
 # Imports des modèles locaux (CORE)
 # IMPORTANT : On doit importer UserProfile pour l'afficher
-from .models import UserProfile 
+from .models import UserProfile, Notification
+from . import refdata
+from . import exports
+from . import counters
+from .notifications import mark_read, unread_count
+from .pagination import paginate_keyset, InvalidCursor
+from .replicas import replica_reads
 
 # Imports des formulaires
 from .forms import CustomUserCreationForm, ProfileUpdateForm, CustomAuthenticationForm
 
 def home(request):
-    active_plants = Plant.objects.filter(is_active=True).order_by('-created_at')[:6]
-    total_plants = Plant.objects.count()
+    active_plants = (
+        Plant.objects.filter(is_active=True).select_related('owner').with_days_alive()
+        .order_by('-created_at')[:6]
+    )
     
-    # CORRECTION : On compte uniquement les paris actifs de L'UTILISATEUR connecté
-    # Si l'utilisateur n'est pas connecté, on met 0
-    if request.user.is_authenticated:
-        active_bets = Bet.objects.filter(user=request.user, is_resolved=False).count()
-    else:
-        active_bets = 0
+    # Compteurs dénormalisés : globaux + ceux du joueur connecté, en une requête
+    counts = counters.read(request.user)
     
     context = {
         'active_plants': active_plants,
-        'total_plants': total_plants,
-        'active_bets': active_bets,
+        'total_plants': counts.site[counters.PLANTS],
+        'active_bets': counts.user[counters.OPEN_BETS],
     }
     return render(request, 'core/home.html', context)
 
@@ -52,25 +60,18 @@ def login_view(request):
     if request.method == 'POST':
         form = CustomAuthenticationForm(data=request.POST)
         if form.is_valid():
-            email = form.cleaned_data.get('email')
-            password = form.cleaned_data.get('password')
-            
-            # 1. Connexion par Email
-            try:
-                user_obj = User.objects.get(email=email)
-                # 2. Authentification via username (mécanisme interne Django)
-                user = authenticate(username=user_obj.username, password=password)
-                
-                if user is not None:
-                    login(request, user)
-                    messages.success(request, f'Ravi de vous revoir, {user.username} !')
-                    next_url = request.POST.get('next') or request.GET.get('next')
-                    return redirect(next_url if next_url else 'home')
-                else:
-                    messages.error(request, 'Mot de passe incorrect.')
-            
-            except User.DoesNotExist:
-                messages.error(request, 'Aucun compte ne correspond à cet email.')
+            # Une seule requête indexée (core.backends.EmailBackend)
+            user = authenticate(
+                request,
+                email=form.cleaned_data.get('email'),
+                password=form.cleaned_data.get('password'),
+            )
+            if user is not None:
+                login(request, user)
+                messages.success(request, f'Ravi de vous revoir, {user.username} !')
+                next_url = request.POST.get('next') or request.GET.get('next')
+                return redirect(next_url if next_url else 'home')
+            messages.error(request, 'Email ou mot de passe incorrect.')
     else:
         form = CustomAuthenticationForm()
     
@@ -137,21 +138,133 @@ def change_password(request):
     return render(request, 'core/change_password.html', {'form': form})
 
 @login_required
+@replica_reads
 def leaderboard(request):
     """ PAGE 3 : Le classement """
-    leaders = UserScore.objects.select_related('user').order_by('-total_points')[:50]
-    
-    user_rank = 0
-    try:
-        current_score = UserScore.objects.get(user=request.user)
-        user_rank = UserScore.objects.filter(total_points__gt=current_score.total_points).count() + 1
-    except UserScore.DoesNotExist:
-        pass
+    # Instantané versionné en cache : aucune requête tant que les scores ne changent pas
+    snapshot = leaderboard_snapshot.get()
+    position = leaderboard_snapshot.position(request.user, snapshot)
 
     return render(request, 'core/leaderboard.html', {
-        'leaders': leaders,
-        'user_rank': user_rank
+        'leaders': snapshot.rows,
+        'user_rank': position.rank,
+        'user_points': position.points,
+        'snapshot_version': snapshot.version,
+        'highlight_user_id': leaderboard_snapshot.highlighted_user_id(request.user, snapshot),
+        'fragment_ttl': leaderboard_snapshot.ttl(),
     })
 
+@replica_reads
 def rules(request):
-    return render(request, 'core/rules.html')
\ No newline at end of file
+    return render(request, 'core/rules.html', {'faqs': refdata.active_faqs.get()})
+
+@staff_member_required
+def export_data(request, dataset, fmt):
+    """ Export en flux (NDJSON ou CSV) : ?since=&until=&user= """
+    if dataset not in exports.DATASETS or fmt not in exports.FORMATS:
+        return HttpResponseBadRequest("Export inconnu.")
+    try:
+        filters = exports.parse_filters(
+            since=request.GET.get('since'),
+            until=request.GET.get('until'),
+            user=request.GET.get('user'),
+        )
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    
+    response = StreamingHttpResponse(
+        exports.stream_export(dataset, fmt, **filters),
+        content_type=exports.FORMATS[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{fmt}"'
+    return response
+
+NOTIFICATIONS_PER_PAGE = 20
+
+def _notifications_page(request):
+    """ Page de notifications (curseur (created_at, id)) ; ?filter=unread pour les non lues """
+    notifications = Notification.objects.filter(user=request.user)
+    unread_only = request.GET.get('filter') == 'unread'
+    if unread_only:
+        # Index (user, is_read, created_at)
+        notifications = notifications.filter(is_read=False)
+    page_obj = paginate_keyset(
+        notifications,
+        NOTIFICATIONS_PER_PAGE,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    return page_obj, unread_only
+
+def _selected_ids(values):
+    return [int(value) for value in values if str(value).isdigit()]
+
+@login_required
+def notifications_inbox(request):
+    """ Boîte de réception : lecture paginée, marquage groupé (un seul UPDATE) """
+    if request.method == 'POST':
+        if 'mark_all' in request.POST:
+            count = mark_read(request.user)
+        else:
+            count = mark_read(request.user, _selected_ids(request.POST.getlist('ids')))
+        messages.success(request, f"{count} notification(s) marquée(s) comme lue(s).")
+        return redirect(request.get_full_path())
+    
+    try:
+        page_obj, unread_only = _notifications_page(request)
+    except InvalidCursor:
+        return redirect('notifications')
+    
+    return render(request, 'core/notifications.html', {
+        'notifications': page_obj.object_list,
+        'page_obj': page_obj,
+        'is_paginated': page_obj.has_other_pages,
+        'unread_only': unread_only,
+    })
+
+@login_required
+@require_http_methods(['GET', 'POST'])
+def notifications_api(request):
+    """
+    GET : page de notifications en JSON (?after=, ?before=, ?filter=unread).
+    POST : {"all": true} ou {"ids": [...]} pour marquer comme lues.
+    """
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'error': 'JSON invalide.'}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({'error': 'JSON invalide.'}, status=400)
+        if data.get('all'):
+            updated = mark_read(request.user)
+        else:
+            ids = data.get('ids')
+            if not isinstance(ids, list):
+                return JsonResponse({'error': 'Paramètre "ids" ou "all" requis.'}, status=400)
+            updated = mark_read(request.user, _selected_ids(ids))
+        return JsonResponse({'updated': updated})
+    
+    try:
+        page_obj, unread_only = _notifications_page(request)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Curseur invalide.'}, status=400)
+    
+    return JsonResponse({
+        'results': [
+            {
+                'id': notification.pk,
+                'type': notification.notification_type,
+                'title': notification.title,
+                'message': notification.message,
+                'is_read': notification.is_read,
+                'related_object_type': notification.related_object_type,
+                'related_object_id': notification.related_object_id,
+                'created_at': notification.created_at.isoformat(),
+            }
+            for notification in page_obj
+        ],
+        'next': page_obj.next_cursor,
+        'previous': page_obj.previous_cursor,
+        'unread_count': unread_count(request.user),
+    })
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import UserScore
+from .models import BalanceCheckpoint, PointTransaction, UserScore
+from . import ledger, ranking
 from django.db.models import F
 from django.contrib import messages
 
@@ -50,15 +51,26 @@ class UserScoreAdmin(admin.ModelAdmin):
         """
         Réinitialise les points des utilisateurs sélectionnés
         """
+        from django.db import transaction
         from core.models import SiteSettings
         site_settings = SiteSettings.get_instance()
+        starting_points = site_settings.starting_points
         
-        updated_count = queryset.update(
-            total_points=site_settings.starting_points,
-            bets_won=0,
-            bets_lost=0,
-            accuracy_rate=0.0
-        )
+        with transaction.atomic():
+            balances = list(
+                queryset.select_for_update().values_list('user_id', 'total_points')
+            )
+            # Écart au solde de départ inscrit au journal des points
+            ledger.record(
+                PointTransaction(user_id=user_id, kind='reset', amount=starting_points - points)
+                for user_id, points in balances
+            )
+            updated_count = queryset.update(
+                total_points=starting_points,
+                bets_won=0,
+                bets_lost=0,
+                accuracy_rate=0.0
+            )
         
         # Mettre à jour les rangs
         self.update_all_ranks(request, UserScore.objects.all())
@@ -75,11 +87,7 @@ class UserScoreAdmin(admin.ModelAdmin):
         Met à jour tous les classements
         """
         # Cette action fonctionne sur tout le queryset, pas seulement la sélection
-        scores = UserScore.objects.all().order_by('-total_points')
-        for rank, score in enumerate(scores, 1):
-            if score.rank != rank:
-                score.rank = rank
-                score.save()
+        ranking.recompute_ranks()
         
         messages.success(request, "Tous les classements ont été mis à jour.")
     
@@ -98,4 +106,36 @@ class UserScoreAdmin(admin.ModelAdmin):
         actions = super().get_actions(request)
         return actions
 
-admin.site.register(UserScore, UserScoreAdmin)
\ No newline at end of file
+admin.site.register(UserScore, UserScoreAdmin)
+
+class PointTransactionAdmin(admin.ModelAdmin):
+    """
+    Journal des points : consultation seule (append-only)
+    """
+    list_display = ['id', 'user', 'kind', 'amount', 'bet_id', 'created_at']
+    list_filter = ['kind', 'created_at']
+    search_fields = ['user__username']
+    list_per_page = 50
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+class BalanceCheckpointAdmin(admin.ModelAdmin):
+    list_display = ['user', 'balance', 'last_transaction_id', 'updated_at']
+    search_fields = ['user__username']
+    readonly_fields = ['user', 'balance', 'last_transaction_id', 'updated_at']
+    
+    def has_add_permission(self, request):
+        return False
+
+admin.site.register(PointTransaction, PointTransactionAdmin)
+admin.site.register(BalanceCheckpoint, BalanceCheckpointAdmin)
@@ -0,0 +1,172 @@
+"""
+Journal des points (PointTransaction).
+
+Tout mouvement de points est inscrit dans le journal (append-only) et appliqué
+au solde `UserScore.total_points` par un UPDATE `F()` dans la même
+transaction : pas de lecture-modification-écriture, donc pas de mise à jour
+perdue entre deux requêtes concurrentes.
+
+`compact` fige périodiquement le solde de chaque joueur (BalanceCheckpoint) :
+le solde issu du journal se recalcule à partir du dernier point de contrôle,
+sans rejouer tout l'historique.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Max, Sum
+from django.utils import timezone
+
+from core.bulk import add_deltas
+
+from . import ranking
+from .models import BalanceCheckpoint, PointTransaction, UserScore
+
+# Taille des lots pour les écritures groupées (limite de paramètres SQLite)
+BATCH_SIZE = 500
+# Les transactions plus récentes ne sont pas compactées : un identifiant plus
+# petit peut encore appartenir à une transaction SQL non validée
+# (identifiants attribués à l'insertion, visibles au commit). À garder
+# au-dessus de la durée de la plus longue transaction qui écrit au journal.
+COMPACT_MARGIN = timedelta(minutes=5)
+
+
+def record(entries):
+    """
+    Inscrit des PointTransaction (non sauvegardées) dans le journal, sans
+    toucher aux soldes : l'appelant applique lui-même les deltas dans la même
+    transaction (résolution groupée, réinitialisation)
+    """
+    entries = [entry for entry in entries if entry.amount]
+    PointTransaction.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+    return entries
+
+
+def post(user, kind, amount, bet=None, require_funds=False):
+    """
+    Inscrit un mouvement et l'applique au solde du joueur.
+    Avec `require_funds`, le débit est conditionnel (`WHERE total_points >= montant`,
+    vérifié par la base) : retourne None sans rien écrire si le solde est insuffisant.
+    Retourne le UserScore à jour (solde et rang).
+    """
+    user_id = getattr(user, 'pk', user)
+    with transaction.atomic():
+        scores = UserScore.objects.filter(user_id=user_id)
+        if require_funds:
+            scores = scores.filter(total_points__gte=-amount)
+        updated = scores.update(
+            total_points=F('total_points') + amount,
+            last_updated=timezone.now(),
+        )
+        if not updated:
+            return None
+        PointTransaction.objects.create(user_id=user_id, kind=kind, amount=amount, bet=bet)
+        score = UserScore.objects.get(user_id=user_id)
+        ranking.score_changed(score, score.total_points - amount)
+    return score
+
+
+def post_many(entries):
+    """
+    Inscrit un lot de mouvements et applique les deltas cumulés par joueur
+    (UPDATE groupés, core.bulk.add_deltas), puis recalcule les rangs une fois
+    """
+    with transaction.atomic():
+        entries = record(entries)
+        deltas = {}
+        for entry in entries:
+            deltas[entry.user_id] = deltas.get(entry.user_id, 0) + entry.amount
+
+        user_ids = list(deltas)
+        add_deltas(
+            UserScore, 'user_id', {user_id: (delta,) for user_id, delta in deltas.items()},
+            ['total_points'], set_values={'last_updated': timezone.now()},
+        )
+        if user_ids:
+            ranking.request_recompute()
+    return entries
+
+
+def compact():
+    """
+    Fige le solde de chaque joueur jusqu'à la dernière transaction du journal
+    antérieure à COMPACT_MARGIN. Seules les transactions postérieures au
+    précédent point de contrôle sont agrégées (une requête GROUP BY).
+    Retourne le nombre de joueurs mis à jour.
+    """
+    with transaction.atomic():
+        # Parcours de la clé primaire depuis la fin : quelques lignes récentes seulement
+        watermark = (
+            PointTransaction.objects.filter(created_at__lt=timezone.now() - COMPACT_MARGIN)
+            .order_by('-id').values_list('id', flat=True).first()
+        )
+        if watermark is None:
+            return 0
+        previous = BalanceCheckpoint.objects.aggregate(last=Max('last_transaction_id'))['last'] or 0
+        if watermark <= previous:
+            return 0
+
+        deltas = dict(
+            PointTransaction.objects.filter(id__gt=previous, id__lte=watermark)
+            .order_by().values('user_id').annotate(total=Sum('amount'))
+            .values_list('user_id', 'total')
+        )
+        checkpoints = {
+            checkpoint.user_id: checkpoint
+            for checkpoint in BalanceCheckpoint.objects.select_for_update()
+        }
+
+        to_create = []
+        for user_id, total in deltas.items():
+            checkpoint = checkpoints.get(user_id)
+            if checkpoint is None:
+                to_create.append(BalanceCheckpoint(
+                    user_id=user_id, balance=total, last_transaction_id=watermark,
+                ))
+            else:
+                checkpoint.balance += total
+
+        now = timezone.now()
+        for checkpoint in checkpoints.values():
+            checkpoint.last_transaction_id = watermark
+            checkpoint.updated_at = now
+
+        BalanceCheckpoint.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        BalanceCheckpoint.objects.bulk_update(
+            checkpoints.values(), ['balance', 'last_transaction_id', 'updated_at'],
+            batch_size=BATCH_SIZE,
+        )
+    return len(deltas)
+
+
+def balance(user):
+    """Solde d'un joueur recalculé depuis son point de contrôle et le journal"""
+    user_id = getattr(user, 'pk', user)
+    checkpoint = BalanceCheckpoint.objects.filter(user_id=user_id).first()
+    base, last_id = (checkpoint.balance, checkpoint.last_transaction_id) if checkpoint else (0, 0)
+    tail = PointTransaction.objects.filter(user_id=user_id, id__gt=last_id).aggregate(
+        total=Sum('amount')
+    )['total'] or 0
+    return base + tail
+
+
+def audit():
+    """
+    Compare les soldes issus du journal aux soldes courants.
+    Retourne la liste des écarts (user_id, solde journal, total_points).
+    """
+    checkpoints = dict(
+        BalanceCheckpoint.objects.values_list('user_id', 'balance')
+    )
+    last_id = BalanceCheckpoint.objects.aggregate(last=Max('last_transaction_id'))['last'] or 0
+    tails = dict(
+        PointTransaction.objects.filter(id__gt=last_id)
+        .order_by().values('user_id').annotate(total=Sum('amount'))
+        .values_list('user_id', 'total')
+    )
+
+    mismatches = []
+    for user_id, total_points in UserScore.objects.values_list('user_id', 'total_points').iterator():
+        expected = checkpoints.get(user_id, 0) + tails.get(user_id, 0)
+        if expected != total_points:
+            mismatches.append((user_id, expected, total_points))
+    return mismatches
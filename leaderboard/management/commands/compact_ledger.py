@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from leaderboard import ledger
+
+
+class Command(BaseCommand):
+    help = "Fige les soldes du journal des points (à lancer périodiquement, ex. cron quotidien)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--audit', action='store_true',
+            help="Compare ensuite les soldes du journal aux soldes courants",
+        )
+
+    def handle(self, *args, **options):
+        updated = ledger.compact()
+        self.stdout.write(self.style.SUCCESS(f"{updated} solde(s) compacté(s)."))
+
+        if options['audit']:
+            mismatches = ledger.audit()
+            for user_id, expected, total_points in mismatches:
+                self.stdout.write(self.style.WARNING(
+                    f"Utilisateur {user_id} : journal {expected} pts, solde {total_points} pts"
+                ))
+            if not mismatches:
+                self.stdout.write(self.style.SUCCESS("Journal et soldes concordent."))
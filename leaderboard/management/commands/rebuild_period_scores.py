@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from leaderboard import periods
+
+
+class Command(BaseCommand):
+    help = "Recalcule les classements hebdomadaires et mensuels à partir des paris résolus"
+
+    def handle(self, *args, **options):
+        created = periods.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{created} score(s) de période recalculé(s)."))
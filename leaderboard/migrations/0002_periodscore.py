@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_type', models.CharField(choices=[('week', 'Semaine'), ('month', 'Mois')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('points_won', models.IntegerField(default=0)),
+                ('bets_won', models.IntegerField(default=0)),
+                ('bets_lost', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_scores', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period_type', 'period_start', '-points_won'], name='period_score_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('period_type', 'period_start', 'user'), name='unique_period_score')],
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_initial_balances(apps, schema_editor):
+    """Ouvre le journal avec le solde actuel de chaque joueur"""
+    UserScore = apps.get_model('leaderboard', 'UserScore')
+    PointTransaction = apps.get_model('leaderboard', 'PointTransaction')
+    PointTransaction.objects.bulk_create(
+        (
+            PointTransaction(user_id=user_id, kind='initial', amount=points)
+            for user_id, points in UserScore.objects.values_list('user_id', 'total_points').iterator()
+            if points
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bets', '0001_initial'),
+        ('leaderboard', '0002_periodscore'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.IntegerField()),
+                ('last_transaction_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='balance_checkpoint', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PointTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('initial', 'Dotation initiale'), ('stake', 'Mise'), ('payout', 'Gain'), ('refund', 'Remboursement'), ('reset', 'Réinitialisation')], max_length=20)),
+                ('amount', models.IntegerField(verbose_name='Montant (signé)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('bet', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='bets.bet')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='point_transactions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['user', 'id'], name='point_tx_user_idx')],
+            },
+        ),
+        migrations.RunPython(seed_initial_balances, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from . import ranking
+
 class UserScore(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     total_points = models.IntegerField(default=1000)
@@ -12,6 +14,14 @@ class UserScore(models.Model):
     
     def __str__(self):
         return f"{self.user.username} - {self.total_points}pts"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Total connu en base : permet au moteur de classement de ne décaler
+        # que la tranche de joueurs concernée lors de la sauvegarde
+        instance._loaded_points = instance.__dict__.get('total_points')
+        return instance
     
     def calculate_accuracy(self):
         total_bets = self.bets_won + self.bets_lost
@@ -22,9 +32,9 @@ class UserScore(models.Model):
     
     def update_rank(self):
         """Met à jour le classement de l'utilisateur"""
-        scores = UserScore.objects.filter(total_points__gt=self.total_points)
-        self.rank = scores.count() + 1
         self.save()
+        self.rank = ranking.rank_for_points(self.total_points)
+        UserScore.objects.filter(pk=self.pk).update(rank=self.rank)
     
     
     @property
@@ -38,3 +48,97 @@ class UserScore(models.Model):
             self.accuracy_rate = (self.bets_won / self.total_bets) * 100
         else:
             self.accuracy_rate = 0.0
+
+
+class PeriodScore(models.Model):
+    """
+    Points gagnés par un joueur sur une période (semaine ou mois).
+    Alimenté à la résolution des paris (leaderboard.periods), selon la date de
+    mort de la plante ; sert les classements hebdomadaires et mensuels.
+    """
+    PERIOD_TYPES = [
+        ('week', 'Semaine'),
+        ('month', 'Mois'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='period_scores')
+    period_type = models.CharField(max_length=10, choices=PERIOD_TYPES)
+    period_start = models.DateField()
+    points_won = models.IntegerField(default=0)
+    bets_won = models.IntegerField(default=0)
+    bets_lost = models.IntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period_type', 'period_start', 'user'], name='unique_period_score'),
+        ]
+        indexes = [
+            # Classement d'une période : une lecture d'index ordonnée
+            models.Index(fields=['period_type', 'period_start', '-points_won'], name='period_score_rank_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.get_period_type_display()} du {self.period_start} - {self.points_won}pts"
+    
+    # Même interface que UserScore pour le template du classement
+    @property
+    def total_points(self):
+        return self.points_won
+    
+    @property
+    def total_bets(self):
+        return self.bets_won + self.bets_lost
+    
+    @property
+    def accuracy_rate(self):
+        if self.total_bets > 0:
+            return (self.bets_won / self.total_bets) * 100
+        return 0.0
+
+
+class PointTransaction(models.Model):
+    """
+    Journal append-only des mouvements de points.
+    Chaque mouvement est appliqué au solde (UserScore.total_points) par un
+    UPDATE atomique `F()` dans la même transaction (leaderboard.ledger).
+    """
+    KINDS = [
+        ('initial', 'Dotation initiale'),
+        ('stake', 'Mise'),
+        ('payout', 'Gain'),
+        ('refund', 'Remboursement'),
+        ('reset', 'Réinitialisation'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='point_transactions')
+    kind = models.CharField(max_length=20, choices=KINDS)
+    amount = models.IntegerField(verbose_name="Montant (signé)")
+    # Pas de contrainte en base : l'identifiant du pari reste inscrit au
+    # journal même si le pari est supprimé (annulation)
+    bet = models.ForeignKey(
+        'bets.Bet', on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, related_name='+',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['user', 'id'], name='point_tx_user_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} {self.get_kind_display()} {self.amount:+d}"
+
+class BalanceCheckpoint(models.Model):
+    """
+    Solde compacté d'un joueur jusqu'à la transaction `last_transaction_id`
+    incluse : le solde courant se recalcule sans rejouer tout le journal
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='balance_checkpoint')
+    balance = models.IntegerField()
+    last_transaction_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.balance}pts (tx {self.last_transaction_id})"
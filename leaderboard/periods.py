@@ -0,0 +1,119 @@
+"""
+Agrégats de points par période (PeriodScore).
+
+À chaque résolution groupée, les gains de chaque joueur sont ventilés par
+semaine (lundi) et par mois de la date de mort de la plante, puis appliqués
+par des UPDATE groupés (core.bulk.add_deltas). `rebuild` recalcule tout depuis les paris.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from core.bulk import add_deltas
+
+from .models import PeriodScore
+
+PERIOD_TYPES = ('week', 'month')
+BATCH_SIZE = 500
+
+
+def period_start(day, period_type):
+    """Premier jour de la semaine (lundi) ou du mois contenant `day`"""
+    if period_type == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def current_period_start(period_type):
+    return period_start(timezone.localdate(), period_type)
+
+
+def record_settlement(bets):
+    """Ventile des paris résolus (avec leur plante chargée) sur les périodes"""
+    deltas = {}
+    for bet in bets:
+        day = timezone.localdate(bet.plant.death_date)
+        for period_type in PERIOD_TYPES:
+            key = (period_type, period_start(day, period_type), bet.user_id)
+            points, won, lost = deltas.get(key, (0, 0, 0))
+            if bet.won:
+                deltas[key] = (points + bet.points_won, won + 1, lost)
+            else:
+                deltas[key] = (points, won, lost + 1)
+    if deltas:
+        _apply(deltas)
+
+
+def _apply(deltas):
+    keys = list(deltas)
+    with transaction.atomic():
+        PeriodScore.objects.bulk_create(
+            [PeriodScore(period_type=t, period_start=s, user_id=u) for t, s, u in keys],
+            ignore_conflicts=True,
+            batch_size=BATCH_SIZE,
+        )
+        add_deltas(
+            PeriodScore, ('period_type', 'period_start', 'user_id'), deltas,
+            ['points_won', 'bets_won', 'bets_lost'],
+        )
+
+
+def top_scores(period_type, limit=50, start=None):
+    """Meilleurs joueurs d'une période (une requête sur l'index de classement)"""
+    start = start or current_period_start(period_type)
+    return (
+        PeriodScore.objects.filter(period_type=period_type, period_start=start)
+        .select_related('user')
+        .order_by('-points_won', 'id')[:limit]
+    )
+
+
+def rank_of(user, period_type, start=None):
+    """Rang du joueur sur la période (0 s'il n'a encore rien gagné ni perdu)"""
+    start = start or current_period_start(period_type)
+    try:
+        mine = PeriodScore.objects.get(period_type=period_type, period_start=start, user=user)
+    except PeriodScore.DoesNotExist:
+        return 0
+    return PeriodScore.objects.filter(
+        period_type=period_type, period_start=start, points_won__gt=mine.points_won
+    ).count() + 1
+
+
+def rebuild():
+    """Recalcule toutes les périodes à partir des paris résolus"""
+    from bets.models import Bet
+
+    truncs = {'week': TruncWeek, 'month': TruncMonth}
+    created = 0
+    with transaction.atomic():
+        PeriodScore.objects.all().delete()
+        for period_type, trunc in truncs.items():
+            rows = (
+                Bet.objects.filter(is_resolved=True, plant__death_date__isnull=False)
+                .annotate(start=trunc('plant__death_date'))
+                .values('start', 'user_id')
+                .annotate(
+                    points=Sum(Case(When(won=True, then=F('points_won')), default=Value(0))),
+                    won_count=Count('id', filter=Q(won=True)),
+                    lost_count=Count('id', filter=~Q(won=True)),
+                )
+                .order_by()
+            )
+            scores = [
+                PeriodScore(
+                    period_type=period_type,
+                    period_start=timezone.localtime(row['start']).date(),
+                    user_id=row['user_id'],
+                    points_won=row['points'] or 0,
+                    bets_won=row['won_count'],
+                    bets_lost=row['lost_count'],
+                )
+                for row in rows.iterator()
+            ]
+            PeriodScore.objects.bulk_create(scores, batch_size=BATCH_SIZE)
+            created += len(scores)
+    return created
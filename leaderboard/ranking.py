@@ -0,0 +1,128 @@
+"""
+Moteur de classement des UserScore.
+
+Le rang suit la règle « 1 + nombre de joueurs ayant strictement plus de points »
+(les ex-aequo partagent le même rang), comme le calcul de `user_rank` dans
+core.views.leaderboard.
+
+- Quand un seul score change, seule la tranche de joueurs située entre
+  l'ancien et le nouveau total est décalée (un UPDATE) au lieu de tout re-classer.
+- En mode groupé (`bulk_ranking`), les mises à jour incrémentales sont
+  suspendues et un seul UPDATE ensembliste (fonction de fenêtre RANK())
+  recalcule les rangs en sortie de bloc.
+
+Chaque changement périme l'instantané du classement (module snapshot).
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import F
+
+from . import snapshot
+
+_state = threading.local()
+
+
+def _bulk_depth():
+    return getattr(_state, 'depth', 0)
+
+
+def is_bulk_mode():
+    """Indique si l'on est à l'intérieur d'un bloc `bulk_ranking()`"""
+    return _bulk_depth() > 0
+
+
+@contextmanager
+def bulk_ranking():
+    """
+    Suspend le classement incrémental le temps d'un lot de modifications,
+    puis recalcule tous les rangs une seule fois à la sortie du bloc.
+    """
+    _state.depth = _bulk_depth() + 1
+    try:
+        yield
+    finally:
+        _state.depth -= 1
+    if _state.depth == 0:
+        recompute_ranks()
+
+
+def recompute_ranks():
+    """
+    Recalcule tous les rangs en une seule requête ensembliste.
+    Seules les lignes dont le rang change sont réécrites.
+    """
+    from .models import UserScore
+
+    qn = connection.ops.quote_name
+    table = qn(UserScore._meta.db_table)
+    sql = (
+        f"UPDATE {table} SET {qn('rank')} = ranked.new_rank "
+        f"FROM (SELECT {qn('id')} AS score_id, "
+        f"RANK() OVER (ORDER BY {qn('total_points')} DESC) AS new_rank "
+        f"FROM {table}) AS ranked "
+        f"WHERE {table}.{qn('id')} = ranked.score_id "
+        f"AND {table}.{qn('rank')} <> ranked.new_rank"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        updated = cursor.rowcount
+    snapshot.invalidate()
+    return updated
+
+
+def request_recompute():
+    """
+    Recalcule les rangs après des écritures qui ne déclenchent pas de signaux
+    (update(), bulk_update...). Dans un bloc `bulk_ranking`, le recalcul est
+    laissé à la sortie du bloc.
+    """
+    if not is_bulk_mode():
+        recompute_ranks()
+
+
+def rank_for_points(points):
+    """Rang qu'obtiendrait un joueur possédant `points`"""
+    from .models import UserScore
+
+    return UserScore.objects.filter(total_points__gt=points).count() + 1
+
+
+def score_changed(score, old_points):
+    """
+    Répercute le passage de `old_points` à `score.total_points`.
+    `old_points` vaut None pour un score qui vient d'être créé.
+    """
+    from .models import UserScore
+
+    new_points = score.total_points
+    if old_points == new_points or is_bulk_mode():
+        return
+
+    others = UserScore.objects.exclude(pk=score.pk)
+    with transaction.atomic():
+        if old_points is None:
+            others.filter(total_points__lt=new_points).update(rank=F('rank') + 1)
+        elif new_points > old_points:
+            others.filter(
+                total_points__gte=old_points, total_points__lt=new_points
+            ).update(rank=F('rank') + 1)
+        else:
+            others.filter(
+                total_points__gte=new_points, total_points__lt=old_points
+            ).update(rank=F('rank') - 1)
+
+        score.rank = rank_for_points(new_points)
+        UserScore.objects.filter(pk=score.pk).update(rank=score.rank)
+    snapshot.invalidate()
+
+
+def score_removed(points):
+    """Remonte d'un rang les joueurs qui étaient derrière un score supprimé"""
+    from .models import UserScore
+
+    if is_bulk_mode():
+        return
+    UserScore.objects.filter(total_points__lt=points).update(rank=F('rank') - 1)
+    snapshot.invalidate()
@@ -1,24 +1,45 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from leaderboard.models import UserScore
-from django.utils import timezone
+from leaderboard.models import PointTransaction, UserScore
+from leaderboard import ledger, ranking, snapshot
 
 
 @receiver(post_save, sender=User)
 def create_user_score(sender, instance, created, **kwargs):
     if created:
-        UserScore.objects.create(user=instance)
+        score = UserScore.objects.create(user=instance)
+        # Dotation initiale inscrite au journal des points
+        ledger.record([PointTransaction(user=instance, kind='initial', amount=score.total_points)])
+
+@receiver(post_save, sender=User)
+def refresh_leaderboard_names(sender, instance, created, update_fields=None, **kwargs):
+    """Nom affiché dans le classement : la connexion (last_login seul) ne compte pas"""
+    if not created and update_fields != frozenset(['last_login']):
+        snapshot.invalidate()
 
 @receiver(post_save, sender=UserScore)
-def update_all_ranks(sender, instance, **kwargs):
+def update_all_ranks(sender, instance, created, **kwargs):
     """
-    Met à jour tous les classements quand un score change
+    Met à jour les classements quand un score change : seule la tranche
+    de joueurs entre l'ancien et le nouveau total est décalée
     """
     # Éviter les appels récursifs
     if kwargs.get('raw', False):
         return
-        
-    scores = UserScore.objects.all().order_by('-total_points')
-    for rank, score in enumerate(scores, 1):
-        UserScore.objects.filter(id=score.id).update(rank=rank)
\ No newline at end of file
+
+    old_points = None if created else getattr(instance, '_loaded_points', None)
+    if old_points is None and not created:
+        # Ancien total inconnu (instance construite à la main) : recalcul ensembliste
+        if not ranking.is_bulk_mode():
+            ranking.recompute_ranks()
+    else:
+        ranking.score_changed(instance, old_points)
+    instance._loaded_points = instance.total_points
+
+@receiver(post_delete, sender=UserScore)
+def release_rank(sender, instance, **kwargs):
+    """
+    Remonte les joueurs classés derrière un score supprimé
+    """
+    ranking.score_removed(instance.total_points)
@@ -0,0 +1,137 @@
+"""
+Instantané du classement général, servi depuis le cache.
+
+Les TOP_SIZE premières lignes, avec tout ce qu'affiche le gabarit, sont lues
+en une requête et stockées dans le cache Django sous une clé versionnée. La
+version partagée est incrémentée après le commit de chaque changement de
+score ou de rang (module ranking, résolution des paris, comptes) :
+l'instantané n'est reconstruit qu'au premier affichage qui suit. Chaque
+processus garde en mémoire le dernier instantané lu, et la position d'un
+visiteur hors du top est mise en cache par (version, joueur).
+"""
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.replicas import use_primary
+
+TOP_SIZE = 50
+VERSION_KEY = 'leaderboard:snapshot:version'
+
+LeaderUser = namedtuple('LeaderUser', ['id', 'username', 'date_joined'])
+LeaderRow = namedtuple('LeaderRow', [
+    'user_id', 'user', 'total_points', 'total_bets', 'accuracy_rate', 'rank',
+])
+Snapshot = namedtuple('Snapshot', ['version', 'rows'])
+# rank vaut 0 (et points None) pour un visiteur sans score
+Position = namedtuple('Position', ['rank', 'points'])
+
+_latest = Snapshot(None, [])
+
+
+def ttl():
+    return getattr(settings, 'LEADERBOARD_CACHE_TTL', 3600)
+
+
+def _initial_version():
+    # Jamais réutilisée, même si la clé de version a été évincée du cache
+    return time.time_ns()
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _initial_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, _initial_version(), timeout=None)
+
+
+def invalidate():
+    """Périme l'instantané après le commit de la transaction en cours"""
+    transaction.on_commit(bump)
+
+
+def build(limit=TOP_SIZE):
+    """Lit le top du classement (une requête) ; rangs « 1 + joueurs ayant strictement plus »"""
+    from .models import UserScore
+
+    scores = (
+        UserScore.objects.select_related('user')
+        .only('user_id', 'total_points', 'bets_won', 'bets_lost', 'accuracy_rate',
+              'user__username', 'user__date_joined')
+        .order_by('-total_points', 'id')[:limit]
+    )
+    rows = []
+    # Instantané partagé via le cache : lu sur la base principale, jamais sur un réplica
+    with use_primary():
+        scores = list(scores)
+    for index, score in enumerate(scores):
+        if rows and rows[-1].total_points == score.total_points:
+            rank = rows[-1].rank
+        else:
+            rank = index + 1
+        rows.append(LeaderRow(
+            user_id=score.user_id,
+            user=LeaderUser(score.user_id, score.user.username, score.user.date_joined),
+            total_points=score.total_points,
+            total_bets=score.total_bets,
+            accuracy_rate=score.accuracy_rate,
+            rank=rank,
+        ))
+    return rows
+
+
+def get():
+    """Instantané courant ; reconstruit seulement si la version a changé"""
+    global _latest
+    version = current_version()
+    latest = _latest
+    if latest.version == version:
+        return latest
+    key = f'leaderboard:snapshot:{version}'
+    rows = cache.get(key)
+    if rows is None:
+        rows = build()
+        cache.set(key, rows, timeout=ttl())
+    _latest = Snapshot(version, rows)
+    return _latest
+
+
+def position(user, snapshot=None):
+    """Rang et points du joueur, lus dans l'instantané ou mis en cache pour cette version"""
+    from . import ranking
+    from .models import UserScore
+
+    if not user.is_authenticated:
+        return Position(0, None)
+    snapshot = snapshot or get()
+    for row in snapshot.rows:
+        if row.user_id == user.pk:
+            return Position(row.rank, row.total_points)
+
+    key = f'leaderboard:position:{snapshot.version}:{user.pk}'
+    cached = cache.get(key)
+    if cached is not None:
+        return Position(*cached)
+    with use_primary():
+        points = UserScore.objects.filter(user=user).values_list('total_points', flat=True).first()
+        result = Position(0, None) if points is None else Position(ranking.rank_for_points(points), points)
+    cache.set(key, tuple(result), timeout=ttl())
+    return result
+
+
+def highlighted_user_id(user, snapshot):
+    """Joueur mis en avant dans le fragment de lignes (0 si le visiteur est hors du top)"""
+    if user.is_authenticated and any(row.user_id == user.pk for row in snapshot.rows):
+        return user.pk
+    return 0
@@ -0,0 +1,12 @@
+"""
+Tâches de fond du classement (voir core.jobs)
+"""
+from core import jobs
+
+from . import ranking
+
+
+@jobs.task(name='leaderboard.refresh_ranks')
+def refresh_ranks():
+    """Recalcule tous les rangs (une requête ensembliste)"""
+    ranking.recompute_ranks()
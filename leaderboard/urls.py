@@ -2,5 +2,5 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
-    path('', views.leaderboard, name='leaderboard'),
-]
\ No newline at end of file
+    path('periods/', views.leaderboard, name='period_leaderboard'),
+]
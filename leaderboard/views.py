@@ -1,23 +1,26 @@
-from django.shortcuts import render
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render, redirect
+from core.replicas import replica_reads
+from . import periods
 from .models import UserScore
 
+@login_required
+@replica_reads
 def leaderboard(request):
+    """ Classement de la semaine ou du mois en cours (agrégats PeriodScore) """
     period = request.GET.get('period', 'all')
     
-    scores = UserScore.objects.all()
-    
-    # Filtrer par période (simplifié)
-    if period == 'week':
-        # Implémenter la logique de filtrage par semaine
-        pass
-    elif period == 'month':
-        # Implémenter la logique de filtrage par mois
-        pass
-    
-    top_users = scores.order_by('-total_points')[:10]
+    # Le classement général est servi par core.views.leaderboard
+    if period not in periods.PERIOD_TYPES:
+        return redirect('leaderboard')
     
+    start = periods.current_period_start(period)
     context = {
-        'top_users': top_users,
+        'leaders': periods.top_scores(period, start=start),
+        'user_rank': periods.rank_of(request.user, period, start=start),
+        # Total du joueur (une ligne) : inutile de reconstruire l'instantané du classement général
+        'user_points': UserScore.objects.filter(user=request.user).values_list('total_points', flat=True).first(),
         'period': period,
+        'period_start': start,
     }
-    return render(request, 'leaderboard/leaderboard.html', context)
\ No newline at end of file
+    return render(request, 'core/leaderboard.html', context)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # En premier : les requêtes SQL des middlewares (session, auth) sont comptées
+    'core.middleware.QueryMetricsMiddleware',
+    # Avant les middlewares qui lisent en base (session, auth) : clients « épinglés »
+    'core.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,6 +71,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.notifications',
             ],
         },
     },
@@ -81,9 +87,65 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Les transactions d'écriture prennent le verrou dès BEGIN et
+            # attendent (timeout) au lieu d'échouer en pleine transaction
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        'TEST': {
+            # Base de test sur disque : plusieurs connexions (tests concurrents)
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    }
+}
+
+# Réplicas en lecture (core.replicas) : READ_REPLICAS=2 déclare replica1 et replica2.
+# En local, copies SQLite de la base principale rafraîchies par `manage.py sync_replicas`.
+READ_REPLICAS = [
+    f'replica{index}' for index in range(1, int(os.environ.get('READ_REPLICAS', '0')) + 1)
+]
+for alias in READ_REPLICAS:
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / f'db_{alias}.sqlite3',
+        # Tests : les réplicas désignent la base de test principale
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+
+# Après une écriture, lectures du client sur la base principale pendant ce délai
+# (à garder supérieur au retard des réplicas, ici l'intervalle de sync_replicas)
+REPLICA_STICKY_SECONDS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Cache fichier : partagé entre les processus locaux sans serveur externe
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache',
     }
 }
 
+# Durée de vie (secondes) de la copie locale des données de référence (core.refdata)
+REFDATA_CACHE_TTL = 60
+
+# Instantané du classement et fragments de gabarit versionnés (leaderboard.snapshot)
+LEADERBOARD_CACHE_TTL = 3600  # secondes
+
+# Journal d'activité : écriture groupée par lots (voir core.activity)
+ACTIVITY_LOG_BUFFER_SIZE = 100
+ACTIVITY_LOG_FLUSH_INTERVAL = 5  # secondes
+
+# Mesures par vue (core.middleware.QueryMetricsMiddleware) : en-têtes en DEBUG,
+# histogrammes reportés dans le cache sinon (manage.py request_metrics)
+REQUEST_METRICS_ENABLED = True
+REQUEST_METRICS_FLUSH_INTERVAL = 10  # secondes
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -129,6 +191,12 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Connexion par email (index unique insensible à la casse) ; identifiant pour l'admin
+AUTHENTICATION_BACKENDS = [
+    'core.backends.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
 LOGIN_URL = '/login/'
\ No newline at end of file
@@ -1,8 +1,11 @@
 from django.contrib import admin
-from .models import Plant, Criterion, PlantMeasurement
+from .models import Plant, Criterion, PlantMeasurement, SensorGateway, SurvivalCurve
 from django.utils import timezone
+from django.db import transaction
 from django.contrib import messages
 from django.utils.html import format_html
+from core import counters
+from . import survival
 
 class PlantMeasurementInline(admin.TabularInline):
     """
@@ -53,24 +56,22 @@ class PlantAdmin(admin.ModelAdmin):
         """
         Marquer les plantes sélectionnées comme mortes
         """
-        from bets.models import Bet
+        from bets.settlement import settle_plant
+        from leaderboard import ranking
         
         updated_count = 0
-        for plant in queryset.filter(is_active=True):
-            plant.death_date = timezone.now()
-            plant.is_active = False
-            plant.save()
-            
-            # Résoudre automatiquement les paris sur cette plante
-            active_bets = Bet.objects.filter(plant=plant, is_resolved=False)
-            for bet in active_bets:
-                bet.resolve_bet()
-            
-            updated_count += 1
+        resolved_count = 0
+        # Classements recalculés une seule fois pour toute la sélection
+        with transaction.atomic(), ranking.bulk_ranking():
+            for plant in queryset.filter(is_active=True):
+                # Résoudre automatiquement les paris sur cette plante
+                result = settle_plant(plant, death_date=timezone.now())
+                resolved_count += result.resolved
+                updated_count += 1
         
         messages.success(
             request, 
-            f"{updated_count} plante(s) marquée(s) comme morte(s). {active_bets.count()} pari(s) résolu(s)."
+            f"{updated_count} plante(s) marquée(s) comme morte(s). {resolved_count} pari(s) résolu(s)."
         )
     
     mark_as_dead.short_description = "Marquer comme mortes (résout les paris)"
@@ -79,10 +80,25 @@ class PlantAdmin(admin.ModelAdmin):
         """
         Réactiver des plantes marquées comme mortes
         """
-        updated_count = queryset.filter(is_active=False).update(
-            is_active=True,
-            death_date=None
-        )
+        with transaction.atomic():
+            dead_plants = queryset.filter(is_active=False).select_for_update()
+            states = [
+                (owner_id, False, death_date is not None)
+                for owner_id, death_date in dead_plants.values_list('owner_id', 'death_date')
+            ]
+            revived = set(dead_plants.filter(death_date__isnull=False).values_list('species', 'category'))
+            updated_count = dead_plants.update(
+                is_active=True,
+                death_date=None
+            )
+            # update() n'émet pas de signaux : compteurs ajustés ici
+            counters.add(counters.merge(
+                counters.plant_deltas(states, -1),
+                counters.plant_deltas([(owner_id, True, False) for owner_id, _, _ in states], 1),
+            ))
+            # ... ni les courbes de survie
+            for species, category in revived:
+                survival.refresh_for(species, category)
         
         messages.success(
             request, 
@@ -211,6 +227,32 @@ class PlantMeasurementAdmin(admin.ModelAdmin):
         """
         return super().get_queryset(request).select_related('plant', 'criterion')
 
+class SensorGatewayAdmin(admin.ModelAdmin):
+    list_display = ['name', 'owner', 'is_active', 'last_seen_at', 'created_at']
+    list_filter = ['is_active']
+    search_fields = ['name', 'owner__username']
+    readonly_fields = ['token', 'created_at', 'last_seen_at']
+    
+    def get_queryset(self, request):
+        """
+        Optimisation des requêtes pour l'admin
+        """
+        return super().get_queryset(request).select_related('owner')
+
+class SurvivalCurveAdmin(admin.ModelAdmin):
+    """Lecture seule : courbes ajustées par plants.survival (reconstruction : fit_survival)"""
+    list_display = ['key', 'group', 'subjects', 'deaths', 'fitted_at']
+    list_filter = ['group']
+    search_fields = ['key']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
 admin.site.register(Plant, PlantAdmin)
 admin.site.register(Criterion, CriterionAdmin)
-admin.site.register(PlantMeasurement, PlantMeasurementAdmin)
\ No newline at end of file
+admin.site.register(PlantMeasurement, PlantMeasurementAdmin)
+admin.site.register(SensorGateway, SensorGatewayAdmin)
+admin.site.register(SurvivalCurve, SurvivalCurveAdmin)
@@ -1,4 +1,7 @@
 from django import forms
+from django.core.exceptions import ValidationError
+from django.utils.choices import CallableChoiceIterator
+from core import refdata
 from .models import Plant, PlantMeasurement, Criterion
 
 class PlantForm(forms.ModelForm):
@@ -23,10 +26,42 @@ class PlantForm(forms.ModelForm):
             }),
         }
 
+class CachedCriterionField(forms.ModelChoiceField):
+    """
+    Choix parmi les critères actifs, servis depuis le cache de référence :
+    ni l'affichage ni la validation ne font de requête
+    """
+    def _cached_choices(self):
+        if self.empty_label is not None:
+            yield ('', self.empty_label)
+        for criterion in refdata.active_criteria.get():
+            yield (criterion.pk, self.label_from_instance(criterion))
+
+    def _get_choices(self):
+        # Évaluation paresseuse, à chaque rendu
+        return CallableChoiceIterator(self._cached_choices)
+
+    choices = property(_get_choices, forms.ChoiceField.choices.fset)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, Criterion):
+            value = value.pk
+        for criterion in refdata.active_criteria.get():
+            if str(criterion.pk) == str(value):
+                return criterion
+        raise ValidationError(
+            self.error_messages['invalid_choice'],
+            code='invalid_choice',
+            params={'value': value},
+        )
+
 class MeasurementForm(forms.ModelForm):
     class Meta:
         model = PlantMeasurement
         fields = ['criterion', 'value', 'notes']
+        field_classes = {'criterion': CachedCriterionField}
         widgets = {
             'criterion': forms.Select(attrs={
                 'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-green-500 focus:border-transparent bg-white'
@@ -42,6 +77,8 @@ class MeasurementForm(forms.ModelForm):
             }),
         }
     
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.fields['criterion'].queryset = Criterion.objects.filter(is_active=True)
\ No newline at end of file
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        # Le critère est déjà validé contre le cache : pas de requête d'existence
+        exclude.add('criterion')
+        return exclude
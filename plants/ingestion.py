@@ -0,0 +1,103 @@
+"""
+Ingestion groupée de mesures (passerelles de capteurs).
+
+Un lot de tuples (plante, critère, valeur, date) est validé en mémoire contre
+le cache des critères actifs et les plantes du propriétaire (une seule
+requête), puis écrit par `bulk_create` en lots avec la mise à jour des
+agrégats (plants.rollups). Chaque ligne refusée est
+signalée avec son index et la raison du refus.
+"""
+import math
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core import refdata
+
+from . import rollups
+from .models import Plant, PlantMeasurement
+
+BATCH_SIZE = 500
+MAX_ROWS = 5000
+
+
+def _parse_row(row, plant_ids, criteria, now):
+    """Retourne (PlantMeasurement, None) ou (None, liste d'erreurs)"""
+    if not isinstance(row, dict):
+        return None, ["Ligne invalide (objet attendu)."]
+
+    errors = []
+    try:
+        plant_id = int(row.get('plant'))
+        if plant_id not in plant_ids:
+            errors.append("Plante inconnue ou n'appartenant pas au propriétaire.")
+    except (TypeError, ValueError):
+        errors.append("Plante invalide.")
+
+    try:
+        criterion = criteria.get(int(row.get('criterion')))
+        if criterion is None:
+            errors.append("Critère inconnu ou inactif.")
+    except (TypeError, ValueError):
+        errors.append("Critère invalide.")
+
+    try:
+        value = float(row.get('value'))
+        if not math.isfinite(value):
+            raise ValueError
+    except (TypeError, ValueError):
+        errors.append("Valeur invalide.")
+
+    measured_at = row.get('measured_at')
+    if measured_at in (None, ''):
+        measured_at = now
+    else:
+        measured_at = parse_datetime(str(measured_at))
+        if measured_at is None:
+            errors.append("Date de mesure invalide.")
+        elif timezone.is_naive(measured_at):
+            measured_at = timezone.make_aware(measured_at)
+
+    if errors:
+        return None, errors
+
+    return PlantMeasurement(
+        plant_id=plant_id,
+        criterion=criterion,
+        value=value,
+        measured_at=measured_at,
+        notes=str(row.get('notes') or ''),
+    ), None
+
+
+def ingest_measurements(owner, rows):
+    """
+    Valide et enregistre un lot de mesures pour les plantes de `owner`.
+    Retourne (mesures créées, refus) où refus = [{'index': i, 'errors': [...]}].
+    """
+    requested = set()
+    for row in rows:
+        try:
+            requested.add(int(row.get('plant')))
+        except (AttributeError, TypeError, ValueError):
+            pass
+    plant_ids = set(
+        Plant.objects.filter(owner=owner, pk__in=requested).values_list('pk', flat=True)
+    )
+    criteria = {criterion.pk: criterion for criterion in refdata.active_criteria.get()}
+
+    now = timezone.now()
+    accepted, rejected = [], []
+    for index, row in enumerate(rows):
+        measurement, errors = _parse_row(row, plant_ids, criteria, now)
+        if errors:
+            rejected.append({'index': index, 'errors': errors})
+        else:
+            accepted.append(measurement)
+
+    with transaction.atomic():
+        created = PlantMeasurement.objects.bulk_create(accepted, batch_size=BATCH_SIZE)
+        # bulk_create n'envoie pas post_save : agrégats mis à jour en un lot
+        rollups.apply_measurements(created)
+    return created, rejected
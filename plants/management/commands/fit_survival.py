@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from plants import survival
+
+
+class Command(BaseCommand):
+    help = "Ajuste les courbes de survie (Kaplan–Meier) de toutes les espèces et catégories"
+
+    def handle(self, *args, **options):
+        fitted = survival.fit_all()
+        self.stdout.write(self.style.SUCCESS(f"{fitted} courbe(s) de survie ajustée(s)."))
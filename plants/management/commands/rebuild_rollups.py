@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from plants import rollups
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les agrégats horaires et journaliers des mesures"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plant', type=int, action='append', dest='plants',
+                            help="Limiter à une plante (option répétable)")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        created = rollups.rebuild_all(plant_ids=options['plants'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"{created} agrégat(s) reconstruit(s)."))
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:55
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plants', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='plant',
+            name='category',
+            field=models.CharField(choices=[('indoor', "Plante d'intérieur"), ('outdoor', "Plante d'extérieur"), ('succulent', 'Succulente / Cactus'), ('tropical', 'Tropicale'), ('vegetable', 'Potager / Aromatique'), ('flowering', 'Plante à fleurs'), ('tree', 'Arbre / Arbuste'), ('other', 'Autre')], default='indoor', max_length=100, verbose_name='Catégorie'),
+        ),
+        migrations.AlterField(
+            model_name='plant',
+            name='death_date',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Date de mort'),
+        ),
+        migrations.AlterField(
+            model_name='plant',
+            name='image',
+            field=models.ImageField(upload_to='plants/', verbose_name='Photo'),
+        ),
+        migrations.AlterField(
+            model_name='plant',
+            name='name',
+            field=models.CharField(max_length=200, verbose_name='Nom'),
+        ),
+        migrations.AlterField(
+            model_name='plant',
+            name='obtaining_date',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name="Date d'acquisition"),
+        ),
+        migrations.AlterField(
+            model_name='plant',
+            name='species',
+            field=models.CharField(max_length=200, verbose_name='Espèce'),
+        ),
+        migrations.AddIndex(
+            model_name='plant',
+            index=models.Index(fields=['is_active', 'created_at', 'id'], name='plant_active_created_idx'),
+        ),
+    ]
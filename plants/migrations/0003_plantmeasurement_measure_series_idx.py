@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plants', '0002_alter_plant_category_alter_plant_death_date_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='plantmeasurement',
+            index=models.Index(fields=['plant', 'criterion', 'measured_at'], name='measure_series_idx'),
+        ),
+    ]
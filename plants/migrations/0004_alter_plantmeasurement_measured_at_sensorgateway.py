@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:57
+
+import django.db.models.deletion
+import django.utils.timezone
+import plants.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plants', '0003_plantmeasurement_measure_series_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='plantmeasurement',
+            name='measured_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.CreateModel(
+            name='SensorGateway',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Nom')),
+                ('token', models.CharField(default=plants.models.generate_gateway_token, max_length=64, unique=True, verbose_name='Jeton')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_seen_at', models.DateTimeField(blank=True, null=True, verbose_name='Dernier envoi')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sensor_gateways', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:57
+
+from datetime import timezone as dt_timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_rollups(apps, schema_editor):
+    """Agrégats initiaux depuis les mesures existantes (même calcul que plants.rollups.rebuild_all)"""
+    PlantMeasurement = apps.get_model('plants', 'PlantMeasurement')
+    MeasurementRollup = apps.get_model('plants', 'MeasurementRollup')
+
+    def bucket_start(moment, granularity):
+        moment = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+        return moment.replace(hour=0) if granularity == 'day' else moment
+
+    pending = {}
+    current = None
+    rows = PlantMeasurement.objects.order_by('plant_id', 'criterion_id', 'measured_at').values_list(
+        'plant_id', 'criterion_id', 'value', 'measured_at'
+    )
+    for plant_id, criterion_id, value, measured_at in rows.iterator(chunk_size=5000):
+        # Lots écrits à une frontière de série : tranches complètes
+        if (plant_id, criterion_id) != current and len(pending) >= 5000:
+            MeasurementRollup.objects.bulk_create(pending.values(), batch_size=500)
+            pending = {}
+        current = (plant_id, criterion_id)
+        for granularity in ('hour', 'day'):
+            key = (plant_id, criterion_id, granularity, bucket_start(measured_at, granularity))
+            rollup = pending.get(key)
+            if rollup is None:
+                pending[key] = MeasurementRollup(
+                    plant_id=plant_id, criterion_id=criterion_id, granularity=granularity,
+                    bucket_start=key[3], count=1, sum=value, min=value, max=value,
+                    last_value=value, last_measured_at=measured_at,
+                )
+            else:
+                rollup.count += 1
+                rollup.sum += value
+                rollup.min = min(rollup.min, value)
+                rollup.max = max(rollup.max, value)
+                rollup.last_value = value
+                rollup.last_measured_at = measured_at
+    MeasurementRollup.objects.bulk_create(pending.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plants', '0004_alter_plantmeasurement_measured_at_sensorgateway'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeasurementRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Heure'), ('day', 'Jour')], max_length=10)),
+                ('bucket_start', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('sum', models.FloatField(default=0.0)),
+                ('min', models.FloatField()),
+                ('max', models.FloatField()),
+                ('last_value', models.FloatField()),
+                ('last_measured_at', models.DateTimeField()),
+                ('criterion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='plants.criterion')),
+                ('plant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='plants.plant')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('plant', 'criterion', 'granularity', 'bucket_start'), name='unique_measurement_rollup')],
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
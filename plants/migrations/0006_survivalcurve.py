@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:29
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plants', '0005_measurementrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SurvivalCurve',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.CharField(choices=[('species', 'Espèce'), ('category', 'Catégorie')], max_length=10)),
+                ('key', models.CharField(max_length=200)),
+                ('subjects', models.PositiveIntegerField(default=0)),
+                ('deaths', models.PositiveIntegerField(default=0)),
+                ('quantiles', models.JSONField(default=list)),
+                ('fitted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('group', 'key'), name='unique_survival_curve')],
+            },
+        ),
+    ]
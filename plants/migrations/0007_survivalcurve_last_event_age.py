@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plants', '0006_survivalcurve'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='survivalcurve',
+            name='last_event_age',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
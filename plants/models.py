@@ -1,6 +1,24 @@
+import secrets
+
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
+from django.db.models import DurationField, ExpressionWrapper, F
+from django.db.models.functions import Coalesce, Now
+
+def generate_gateway_token():
+    return secrets.token_hex(32)
+
+class PlantQuerySet(models.QuerySet):
+    def with_days_alive(self):
+        """Annote la durée de vie calculée en base (lue par Plant.days_alive)"""
+        return self.annotate(
+            alive_for=ExpressionWrapper(
+                Coalesce(F('death_date'), Now()) - F('obtaining_date'),
+                output_field=DurationField()
+            )
+        )
 
 class Plant(models.Model):
 
@@ -33,11 +51,45 @@ class Plant(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = PlantQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            # Pagination par curseur du catalogue (is_active, created_at, id)
+            models.Index(fields=['is_active', 'created_at', 'id'], name='plant_active_created_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.name} ({self.species})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # État connu en base : les compteurs (core.counters) ne reportent que les changements
+        if all(name in instance.__dict__ for name in ('owner_id', 'is_active', 'death_date')):
+            instance._counted_state = instance.counter_state()
+        # Date de mort connue en base : si elle change, les courbes de survie sont réajustées
+        if 'death_date' in instance.__dict__:
+            instance._loaded_death_date = instance.death_date
+        return instance
+    
+    def counter_state(self):
+        """(propriétaire, active, morte) : ce que comptent les compteurs dénormalisés"""
+        return (self.owner_id, self.is_active, self.death_date is not None)
+    
+    @property
+    def pool(self):
+        """Pool des paris (bets.BetPool, à charger par select_related('bet_pool')) ; None sans pari"""
+        try:
+            return self.bet_pool
+        except ObjectDoesNotExist:
+            return None
+    
     @property
     def days_alive(self):
+        # Valeur déjà calculée en base (PlantQuerySet.with_days_alive)
+        if getattr(self, 'alive_for', None) is not None:
+            return self.alive_for.days
         if self.death_date:
             return (self.death_date - self.obtaining_date).days
         return (timezone.now() - self.obtaining_date).days
@@ -62,8 +114,106 @@ class PlantMeasurement(models.Model):
     plant = models.ForeignKey(Plant, on_delete=models.CASCADE)
     criterion = models.ForeignKey(Criterion, on_delete=models.CASCADE)
     value = models.FloatField()
-    measured_at = models.DateTimeField(auto_now_add=True)
+    # Date explicite possible (passerelles de capteurs), maintenant par défaut
+    measured_at = models.DateTimeField(default=timezone.now)
     notes = models.TextField(blank=True)
     
     class Meta:
-        ordering = ['-measured_at']
\ No newline at end of file
+        ordering = ['-measured_at']
+        indexes = [
+            # Séries temporelles : une plante, un critère, une fenêtre de temps
+            models.Index(fields=['plant', 'criterion', 'measured_at'], name='measure_series_idx'),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Série et date connues en base : si elles changent, l'ancienne tranche d'agrégat est recalculée
+        instance._loaded_plant_id = instance.__dict__.get('plant_id')
+        instance._loaded_criterion_id = instance.__dict__.get('criterion_id')
+        instance._loaded_measured_at = instance.__dict__.get('measured_at')
+        return instance
+
+class SensorGateway(models.Model):
+    """
+    Passerelle de capteurs autorisée à envoyer des mesures par lot
+    pour les plantes de son propriétaire
+    """
+    name = models.CharField(max_length=100, verbose_name="Nom")
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sensor_gateways')
+    token = models.CharField(max_length=64, unique=True, default=generate_gateway_token, verbose_name="Jeton")
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_seen_at = models.DateTimeField(null=True, blank=True, verbose_name="Dernier envoi")
+    
+    def __str__(self):
+        return f"{self.name} ({self.owner.username})"
+
+
+class MeasurementRollup(models.Model):
+    """
+    Agrégat des mesures par plante, critère et tranche de temps (heure ou jour, UTC).
+    Tenu à jour à chaque nouvelle mesure (plants.rollups), reconstructible
+    par la commande `rebuild_rollups`.
+    """
+    GRANULARITIES = [
+        ('hour', 'Heure'),
+        ('day', 'Jour'),
+    ]
+    
+    plant = models.ForeignKey(Plant, on_delete=models.CASCADE)
+    criterion = models.ForeignKey(Criterion, on_delete=models.CASCADE)
+    granularity = models.CharField(max_length=10, choices=GRANULARITIES)
+    bucket_start = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+    sum = models.FloatField(default=0.0)
+    min = models.FloatField()
+    max = models.FloatField()
+    last_value = models.FloatField()
+    last_measured_at = models.DateTimeField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['plant', 'criterion', 'granularity', 'bucket_start'],
+                name='unique_measurement_rollup',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.plant_id}/{self.criterion_id} {self.granularity} {self.bucket_start:%Y-%m-%d %H:%M}"
+    
+    @property
+    def avg(self):
+        return self.sum / self.count if self.count else None
+
+
+class SurvivalCurve(models.Model):
+    """
+    Courbe de survie (Kaplan–Meier) d'une espèce ou d'une catégorie, réduite à
+    une table de quantiles : quantiles[i] est le premier âge (jours) où la
+    survie passe sous plants.survival.LEVELS[i], None au-delà du dernier décès
+    observé (à partir de last_event_age, la courbe ne dit plus rien). Ajustée
+    par plants.survival (commande `fit_survival`).
+    """
+    GROUPS = [
+        ('species', 'Espèce'),
+        ('category', 'Catégorie'),
+    ]
+    
+    group = models.CharField(max_length=10, choices=GROUPS)
+    key = models.CharField(max_length=200)
+    subjects = models.PositiveIntegerField(default=0)
+    deaths = models.PositiveIntegerField(default=0)
+    quantiles = models.JSONField(default=list)
+    # Âge (jours) du dernier décès observé ; None avant le premier réajustement
+    last_event_age = models.PositiveIntegerField(null=True, blank=True)
+    fitted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['group', 'key'], name='unique_survival_curve'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_group_display()} {self.key} ({self.deaths}/{self.subjects})"
@@ -0,0 +1,168 @@
+"""
+Agrégats horaires et journaliers des mesures (MeasurementRollup).
+
+- `apply_measurements` fusionne un lot de nouvelles mesures dans les agrégats
+  existants : une lecture des tranches concernées, puis `bulk_create` /
+  `bulk_update`, le tout dans une transaction.
+- `rebuild_buckets` recalcule quelques tranches depuis les mesures brutes
+  (mesure modifiée ou supprimée : min / max ne se « défont » pas).
+- `rebuild_all` reconstruit la table en parcourant les mesures dans l'ordre de
+  l'index (plant, criterion, measured_at), en mémoire constante.
+"""
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from .models import MeasurementRollup, PlantMeasurement
+
+GRANULARITIES = ('hour', 'day')
+BATCH_SIZE = 500
+UPDATE_FIELDS = ['count', 'sum', 'min', 'max', 'last_value', 'last_measured_at']
+
+
+def bucket_start(moment, granularity):
+    """Début (UTC) de la tranche contenant `moment`"""
+    moment = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def _merge(rollup, value, measured_at):
+    rollup.count += 1
+    rollup.sum += value
+    rollup.min = min(rollup.min, value)
+    rollup.max = max(rollup.max, value)
+    if measured_at >= rollup.last_measured_at:
+        rollup.last_value = value
+        rollup.last_measured_at = measured_at
+
+
+def _aggregate(measurements):
+    """Regroupe des mesures par clé de tranche -> MeasurementRollup non sauvegardé"""
+    groups = {}
+    for m in measurements:
+        for granularity in GRANULARITIES:
+            key = (m.plant_id, m.criterion_id, granularity, bucket_start(m.measured_at, granularity))
+            rollup = groups.get(key)
+            if rollup is None:
+                groups[key] = MeasurementRollup(
+                    plant_id=m.plant_id, criterion_id=m.criterion_id,
+                    granularity=granularity, bucket_start=key[3],
+                    count=1, sum=m.value, min=m.value, max=m.value,
+                    last_value=m.value, last_measured_at=m.measured_at,
+                )
+            else:
+                _merge(rollup, m.value, m.measured_at)
+    return groups
+
+
+def _keys_filter(keys):
+    condition = Q()
+    for plant_id, criterion_id, granularity, start in keys:
+        condition |= Q(plant_id=plant_id, criterion_id=criterion_id,
+                       granularity=granularity, bucket_start=start)
+    return condition
+
+
+def apply_measurements(measurements):
+    """Répercute des mesures nouvellement créées sur les agrégats"""
+    groups = _aggregate(measurements)
+    if not groups:
+        return
+
+    keys = list(groups)
+    with transaction.atomic():
+        existing = {}
+        for start in range(0, len(keys), BATCH_SIZE):
+            chunk = keys[start:start + BATCH_SIZE]
+            for rollup in MeasurementRollup.objects.select_for_update().filter(_keys_filter(chunk)):
+                existing[(rollup.plant_id, rollup.criterion_id, rollup.granularity, rollup.bucket_start)] = rollup
+
+        to_create, to_update = [], []
+        for key, delta in groups.items():
+            rollup = existing.get(key)
+            if rollup is None:
+                to_create.append(delta)
+                continue
+            rollup.count += delta.count
+            rollup.sum += delta.sum
+            rollup.min = min(rollup.min, delta.min)
+            rollup.max = max(rollup.max, delta.max)
+            if delta.last_measured_at >= rollup.last_measured_at:
+                rollup.last_value = delta.last_value
+                rollup.last_measured_at = delta.last_measured_at
+            to_update.append(rollup)
+
+        MeasurementRollup.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        MeasurementRollup.objects.bulk_update(to_update, UPDATE_FIELDS, batch_size=BATCH_SIZE)
+
+
+def rebuild_buckets(plant_id, criterion_id, moments):
+    """Recalcule depuis les mesures brutes les tranches contenant `moments`"""
+    with transaction.atomic():
+        for granularity in GRANULARITIES:
+            starts = {bucket_start(moment, granularity) for moment in moments}
+            MeasurementRollup.objects.filter(
+                plant_id=plant_id, criterion_id=criterion_id,
+                granularity=granularity, bucket_start__in=starts,
+            ).delete()
+            for start in starts:
+                raw = PlantMeasurement.objects.filter(
+                    plant_id=plant_id, criterion_id=criterion_id,
+                    measured_at__gte=start, measured_at__lt=_next_bucket(start, granularity),
+                ).order_by().only('plant_id', 'criterion_id', 'value', 'measured_at')
+                rollup = _aggregate(raw).get((plant_id, criterion_id, granularity, start))
+                if rollup is not None:
+                    rollup.save()
+
+
+def _next_bucket(start, granularity):
+    return start + (timedelta(days=1) if granularity == 'day' else timedelta(hours=1))
+
+
+def rebuild_all(plant_ids=None, chunk_size=5000):
+    """
+    Reconstruit les agrégats (de toutes les plantes ou de `plant_ids`).
+    Les mesures sont lues dans l'ordre de l'index ; les agrégats sont écrits
+    par lots, toujours à une frontière de journée (tranches complètes).
+    Retourne le nombre d'agrégats créés.
+    """
+    rollups = MeasurementRollup.objects.all()
+    measurements = PlantMeasurement.objects.all()
+    if plant_ids is not None:
+        rollups = rollups.filter(plant_id__in=plant_ids)
+        measurements = measurements.filter(plant_id__in=plant_ids)
+
+    created = 0
+    with transaction.atomic():
+        rollups.delete()
+
+        pending, current_day = [], None
+        rows = measurements.order_by('plant_id', 'criterion_id', 'measured_at').only(
+            'plant_id', 'criterion_id', 'value', 'measured_at'
+        )
+        for measurement in rows.iterator(chunk_size=chunk_size):
+            day = (measurement.plant_id, measurement.criterion_id,
+                   bucket_start(measurement.measured_at, 'day'))
+            if day != current_day and len(pending) >= chunk_size:
+                created += _flush(pending)
+                pending = []
+            current_day = day
+            pending.append(measurement)
+        created += _flush(pending)
+    return created
+
+
+def _flush(measurements):
+    rollups = list(_aggregate(measurements).values())
+    MeasurementRollup.objects.bulk_create(rollups, batch_size=BATCH_SIZE)
+    return len(rollups)
+
+
+def measurement_count(plant):
+    """Nombre de mesures d'une plante, lu sur les agrégats journaliers"""
+    return MeasurementRollup.objects.filter(plant=plant, granularity='day').aggregate(
+        total=Sum('count')
+    )['total'] or 0
@@ -0,0 +1,58 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from plants.models import Plant, PlantMeasurement
+from plants import rollups, survival
+
+
+@receiver(post_save, sender=PlantMeasurement)
+def update_measurement_rollups(sender, instance, created, **kwargs):
+    """
+    Met à jour les agrégats horaires / journaliers à chaque mesure enregistrée
+    """
+    if kwargs.get('raw', False):
+        return
+
+    if created:
+        rollups.apply_measurements([instance])
+    else:
+        # Mesure modifiée : tranches recalculées depuis les mesures brutes,
+        # dans l'ancienne série aussi si la plante ou le critère a changé
+        loaded = (
+            getattr(instance, '_loaded_plant_id', None) or instance.plant_id,
+            getattr(instance, '_loaded_criterion_id', None) or instance.criterion_id,
+        )
+        current = (instance.plant_id, instance.criterion_id)
+        loaded_at = getattr(instance, '_loaded_measured_at', None)
+        moments = {instance.measured_at}
+        if loaded == current and loaded_at is not None:
+            moments.add(loaded_at)
+        rollups.rebuild_buckets(*current, moments)
+        if loaded != current:
+            rollups.rebuild_buckets(*loaded, {loaded_at or instance.measured_at})
+    instance._loaded_plant_id = instance.plant_id
+    instance._loaded_criterion_id = instance.criterion_id
+    instance._loaded_measured_at = instance.measured_at
+
+
+@receiver(post_delete, sender=PlantMeasurement)
+def remove_measurement_from_rollups(sender, instance, **kwargs):
+    """
+    Mesure supprimée (admin, inline, queryset, cascade) : ses tranches sont
+    recalculées depuis les mesures brutes restantes
+    """
+    rollups.rebuild_buckets(instance.plant_id, instance.criterion_id, {instance.measured_at})
+
+
+@receiver(post_save, sender=Plant)
+def refresh_survival_curves(sender, instance, created, **kwargs):
+    """
+    Mort déclarée (ou annulée) : courbes de survie de l'espèce et de la
+    catégorie réajustées par la file de tâches
+    """
+    if kwargs.get('raw', False):
+        return
+
+    loaded = None if created else getattr(instance, '_loaded_death_date', instance.death_date)
+    if (loaded is None) != (instance.death_date is None):
+        survival.refresh_for(instance.species, instance.category)
+    instance._loaded_death_date = instance.death_date
@@ -0,0 +1,252 @@
+"""
+Courbes de survie par espèce et par catégorie (estimateur de Kaplan–Meier).
+
+- `kaplan_meier` ajuste toutes les courbes d'un coup, en NumPy sur la table
+  entière : une plante morte est un décès à son âge de mort, une plante
+  vivante une observation censurée à son âge actuel.
+- Chaque courbe est réduite à une table de quantiles (SurvivalCurve) : l'âge
+  où la survie passe sous chaque niveau de LEVELS. `outlook` en déduit, pour
+  une plante vivante de cet âge, la durée de vie restante médiane et la
+  fenêtre où se concentrent ses décès probables, sans recalcul.
+- `fit_all` reconstruit toutes les tables (commande `fit_survival`, à
+  planifier chaque nuit : les plantes vivantes vieillissent). Une mort
+  déclarée ne réajuste que l'espèce et la catégorie de la plante
+  (`refresh_for`, par la file de tâches).
+"""
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Plant, SurvivalCurve
+
+# Niveaux de survie 99 %, 98 %, ..., 1 %
+LEVELS = np.round(np.arange(99, 0, -1) / 100, 2)
+# En dessous, une courbe d'espèce n'est pas affichée (repli sur la catégorie)
+MIN_DEATHS = 5
+REFRESH_DELAY = timedelta(seconds=30)
+SECONDS_PER_DAY = 86400
+
+Curve = namedtuple('Curve', ['group', 'key', 'subjects', 'deaths', 'quantiles', 'last_event_age'])
+# Âges en jours depuis aujourd'hui ; None quand la courbe ne va pas si loin
+Outlook = namedtuple('Outlook', [
+    'group', 'key', 'subjects', 'deaths', 'median_remaining', 'window_start', 'window_end', 'risk_30',
+])
+
+
+def species_key(species):
+    return ' '.join(species.split()).lower()
+
+
+def group_keys(species, category):
+    """Groupes (group, key) auxquels appartient une plante"""
+    return [('species', species_key(species)), ('category', category)]
+
+
+def _observations(rows, now):
+    """(espèce, catégorie, acquisition, mort) -> clés, âges (jours entiers), décès"""
+    rows = list(rows)
+    if not rows:
+        return [], [], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+    species, categories, obtained, died = zip(*rows)
+    obtained = np.array([moment.timestamp() for moment in obtained])
+    events = np.array([moment is not None for moment in died])
+    ends = np.array([(moment or now).timestamp() for moment in died])
+    ages = np.maximum((ends - obtained) // SECONDS_PER_DAY, 0).astype(np.int64)
+    return [species_key(value) for value in species], list(categories), ages, events
+
+
+def kaplan_meier(labels, ages, events):
+    """
+    Courbes de Kaplan–Meier de tous les groupes en une passe.
+    labels : numéro de groupe de chaque observation. Retourne, pour chaque
+    (groupe, âge) distinct trié : (groupes, âges, survie après cet âge).
+    """
+    order = np.lexsort((ages, labels))
+    labels, ages, events = labels[order], ages[order], events[order]
+    if not len(labels):
+        return labels, ages, np.zeros(0)
+
+    distinct = np.ones(len(labels), dtype=bool)
+    distinct[1:] = (labels[1:] != labels[:-1]) | (ages[1:] != ages[:-1])
+    starts = np.flatnonzero(distinct)
+    pair_labels, pair_ages = labels[starts], ages[starts]
+    leaving = np.diff(np.append(starts, len(labels)))
+    deaths = np.add.reduceat(events.astype(np.int64), starts)
+
+    # Exposés au risque : taille du groupe moins ceux sortis à un âge inférieur
+    first = np.ones(len(starts), dtype=bool)
+    first[1:] = pair_labels[1:] != pair_labels[:-1]
+    group = np.cumsum(first) - 1
+    sizes = np.bincount(group, weights=leaving)
+    left_before = np.cumsum(leaving) - leaving
+    at_risk = sizes[group] - (left_before - left_before[first][group])
+
+    # Produit cumulé par groupe, en somme de logarithmes (survie nulle : plancher)
+    log_factor = np.log(np.clip(1 - deaths / at_risk, 1e-12, 1))
+    cumulative = np.cumsum(log_factor)
+    offset = (cumulative - log_factor)[first][group]
+    return pair_labels, pair_ages, np.exp(cumulative - offset)
+
+
+def quantile_table(ages, survival):
+    """Premier âge où la survie passe sous chaque niveau de LEVELS (None : jamais observé)"""
+    index = np.searchsorted(-survival, -LEVELS - 1e-9, side='left')
+    return [int(ages[i]) if i < len(ages) else None for i in index]
+
+
+def fit(rows, now=None):
+    """Ajuste les courbes de toutes les espèces et catégories des lignes (espèce, catégorie, acquisition, mort)"""
+    now = now or timezone.now()
+    species, categories, ages, events = _observations(rows, now)
+    curves = []
+    for group, keys in (('species', species), ('category', categories)):
+        if not keys:
+            continue
+        names, labels = np.unique(np.array(keys, dtype=object), return_inverse=True)
+        pair_labels, pair_ages, survival = kaplan_meier(labels, ages, events)
+        bounds = np.searchsorted(pair_labels, np.arange(len(names) + 1))
+        subjects = np.bincount(labels, minlength=len(names))
+        deaths = np.bincount(labels, weights=events, minlength=len(names)).astype(np.int64)
+        last_events = np.full(len(names), -1, dtype=np.int64)
+        np.maximum.at(last_events, labels[events], ages[events])
+        for label, name in enumerate(names):
+            start, end = bounds[label], bounds[label + 1]
+            curves.append(Curve(
+                group, name, int(subjects[label]), int(deaths[label]),
+                quantile_table(pair_ages[start:end], survival[start:end]),
+                int(last_events[label]) if deaths[label] else None,
+            ))
+    return curves
+
+
+def _rows(queryset):
+    return queryset.values_list('species', 'category', 'obtaining_date', 'death_date').iterator(chunk_size=5000)
+
+
+def save_curves(curves, replace=False):
+    """Enregistre les courbes ; replace : supprime celles des groupes disparus"""
+    fitted_at = timezone.now()
+    with transaction.atomic():
+        if replace:
+            SurvivalCurve.objects.all().delete()
+        else:
+            keys = Q()
+            for curve in curves:
+                keys |= Q(group=curve.group, key=curve.key)
+            if curves:
+                SurvivalCurve.objects.filter(keys).delete()
+        SurvivalCurve.objects.bulk_create([
+            SurvivalCurve(
+                group=curve.group, key=curve.key, subjects=curve.subjects,
+                deaths=curve.deaths, quantiles=curve.quantiles,
+                last_event_age=curve.last_event_age, fitted_at=fitted_at,
+            )
+            for curve in curves
+        ], batch_size=500)
+    return len(curves)
+
+
+def fit_all():
+    """Reconstruit toutes les courbes depuis la table des plantes"""
+    return save_curves(fit(_rows(Plant.objects.all())), replace=True)
+
+
+def refresh_group(group, key):
+    """Réajuste une seule courbe (espèce ou catégorie)"""
+    if group == 'category':
+        plants = Plant.objects.filter(category=key)
+    else:
+        # Valeurs brutes de l'espèce choisies en Python (species_key) : LIKE sous
+        # SQLite ne replie la casse que pour l'ASCII (« ORCHIDÉE »)
+        species = [
+            value for value in Plant.objects.order_by().values_list('species', flat=True).distinct()
+            if species_key(value) == key
+        ]
+        plants = Plant.objects.filter(species__in=species)
+    curves = [curve for curve in fit(_rows(plants)) if (curve.group, curve.key) == (group, key)]
+    with transaction.atomic():
+        SurvivalCurve.objects.filter(group=group, key=key).delete()
+        save_curves(curves)
+    return len(curves)
+
+
+def refresh_for(species, category):
+    """Planifie le réajustement des courbes d'une espèce et d'une catégorie (après le commit en cours)"""
+    from core import jobs
+
+    from .tasks import refresh_survival_curve
+
+    for group, key in group_keys(species, category):
+        jobs.enqueue(
+            refresh_survival_curve, {'group': group, 'key': key},
+            key=f"survival:{group}:{key}"[:200], delay=REFRESH_DELAY,
+        )
+
+
+def _survival_at(quantiles, age):
+    """Survie S(âge) lue dans la table (par excès, à 1 % près)"""
+    crossed = bisect_right([float('inf') if day is None else day for day in quantiles], age)
+    return 1.0 if not crossed else float(LEVELS[crossed - 1])
+
+
+def _age_below(quantiles, level):
+    """Premier âge où la survie passe sous `level` (niveau de la grille arrondi vers le bas)"""
+    index = int(np.ceil(round((1 - level) * 100, 6))) - 1
+    if level <= 0 or index >= len(quantiles):
+        return None
+    return quantiles[max(index, 0)]
+
+
+def outlook(plant, curves):
+    """
+    Pronostic d'une plante vivante depuis ses courbes {(group, key): SurvivalCurve} :
+    courbe de l'espèce si assez de décès, sinon de la catégorie ; None sans courbe utilisable
+    """
+    if plant.death_date is not None:
+        return None
+    species, category = group_keys(plant.species, plant.category)
+    curve = curves.get(species)
+    if curve is None or curve.deaths < MIN_DEATHS:
+        curve = curves.get(category)
+    if curve is None or not curve.deaths:
+        return None
+
+    age = plant.days_alive
+    if curve.quantiles[-1] is not None and curve.quantiles[-1] <= age:
+        # Plus âgée que tout ce que décrit la courbe
+        return None
+    if curve.last_event_age is not None and age >= curve.last_event_age:
+        # Au-delà du dernier décès observé, la queue censurée est plate :
+        # ni durée restante ni risque n'y sont estimables
+        return None
+    alive = _survival_at(curve.quantiles, age)
+
+    def remaining(fraction):
+        # Survie conditionnelle : S(t) / S(âge) = fraction
+        day = _age_below(curve.quantiles, alive * fraction)
+        return None if day is None else max(day - age, 0)
+
+    later = _survival_at(curve.quantiles, age + 30)
+    return Outlook(
+        group=curve.group, key=curve.key, subjects=curve.subjects, deaths=curve.deaths,
+        median_remaining=remaining(0.5),
+        window_start=remaining(0.75),
+        window_end=remaining(0.25),
+        risk_30=max(0.0, 1 - later / alive),
+    )
+
+
+def outlook_for(plant):
+    """Pronostic d'une plante : une requête (courbes de son espèce et de sa catégorie)"""
+    if plant.death_date is not None:
+        return None
+    keys = Q()
+    for group, key in group_keys(plant.species, plant.category):
+        keys |= Q(group=group, key=key)
+    curves = {(curve.group, curve.key): curve for curve in SurvivalCurve.objects.filter(keys)}
+    return outlook(plant, curves)
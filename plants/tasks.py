@@ -0,0 +1,12 @@
+"""
+Tâches de fond des plantes (voir core.jobs)
+"""
+from core import jobs
+
+from . import survival
+
+
+@jobs.task(name='plants.refresh_survival_curve')
+def refresh_survival_curve(group, key):
+    """Réajuste la courbe de survie d'une espèce ou d'une catégorie (idempotente)"""
+    survival.refresh_group(group, key)
@@ -0,0 +1,216 @@
+"""
+Séries temporelles des mesures d'une plante.
+
+Une série (plante, critère, fenêtre de temps) est réduite côté serveur au
+nombre de points demandé :
+- `buckets` : min / max / moyenne par tranches de temps, calculés en SQL
+  (au plus `points` lignes remontent de la base), sur les agrégats horaires /
+  journaliers dès que les tranches sont assez larges ;
+- `lttb` : Largest-Triangle-Three-Buckets en NumPy sur les valeurs brutes,
+  qui conserve la forme visuelle de la courbe.
+Les requêtes s'appuient sur l'index (plant, criterion, measured_at).
+"""
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.db.models import (
+    BigIntegerField, Count, ExpressionWrapper, Func, IntegerField, Max, Min, Sum, Value,
+)
+
+from .models import MeasurementRollup, PlantMeasurement
+
+DOWNSAMPLING_METHODS = ('buckets', 'lttb')
+
+
+class EpochSeconds(Func):
+    """Secondes depuis le 01/01/1970 (UTC) d'une colonne date/heure"""
+    output_field = BigIntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template="CAST(strftime('%%%%s', %(expressions)s) AS INTEGER)",
+            **extra_context
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template="CAST(EXTRACT(EPOCH FROM %(expressions)s) AS BIGINT)",
+            **extra_context
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, template="UNIX_TIMESTAMP(%(expressions)s)", **extra_context
+        )
+
+
+def series_queryset(plant, criterion, start, end):
+    return PlantMeasurement.objects.filter(
+        plant=plant, criterion=criterion, measured_at__gte=start, measured_at__lt=end
+    ).order_by()
+
+
+def _bucket_start(start_epoch, width, bucket):
+    return datetime.fromtimestamp(start_epoch + bucket * width, tz=dt_timezone.utc)
+
+
+ROLLUP_SECONDS = {'hour': 3600, 'day': 86400}
+
+
+def _rollup_granularity(width):
+    """Agrégats utilisables pour des tranches de `width` secondes (ou None)"""
+    if width >= 86400:
+        return 'day'
+    if width >= 3600:
+        return 'hour'
+    return None
+
+
+def _grouped(rows, time_field, aggregates, origin, width):
+    """{numéro de tranche: agrégats} ; au plus une ligne par tranche remonte de la base"""
+    bucket = (EpochSeconds(time_field) - Value(origin)) / Value(width)
+    rows = (
+        rows.order_by()
+        .annotate(bucket=ExpressionWrapper(bucket, output_field=IntegerField()))
+        .values('bucket')
+        .annotate(**aggregates)
+    )
+    return {row['bucket']: row for row in rows}
+
+
+def _merge(target, rows):
+    for bucket, row in rows.items():
+        current = target.get(bucket)
+        if current is None:
+            target[bucket] = dict(row)
+            continue
+        current['min'] = min(current['min'], row['min'])
+        current['max'] = max(current['max'], row['max'])
+        current['total'] += row['total']
+        current['count'] += row['count']
+
+
+RAW_AGGREGATES = {
+    'min': Min('value'), 'max': Max('value'), 'total': Sum('value'), 'count': Count('id'),
+}
+ROLLUP_AGGREGATES = {
+    'min': Min('min'), 'max': Max('max'), 'total': Sum('sum'), 'count': Sum('count'),
+}
+
+
+def bucket_series(plant, criterion, start, end, points):
+    """
+    Agrège la série en `points` tranches de durée égale (min, max, moyenne, nombre).
+    Dès qu'une tranche couvre au moins une heure, sa durée est arrondie à un
+    multiple de l'heure (ou du jour) et les tranches sont alignées sur les
+    agrégats (UTC) : la partie de la fenêtre couverte par des agrégats
+    complets est lue sur MeasurementRollup, les bords restants sur les
+    mesures brutes. Les tranches vides sont omises.
+    """
+    start_epoch = int(start.timestamp())
+    end_epoch = int(end.timestamp())
+    width = max((end_epoch - start_epoch) // points + 1, 1)
+
+    buckets = {}
+    granularity = _rollup_granularity(width)
+    if granularity:
+        step = ROLLUP_SECONDS[granularity]
+        width = -(-width // step) * step
+        origin = start_epoch // step * step
+        # Agrégats entièrement compris dans [start, end)
+        covered_start = -(-start_epoch // step) * step
+        covered_end = end_epoch // step * step
+    else:
+        origin = start_epoch
+
+    if granularity and covered_start < covered_end:
+        covered_start = datetime.fromtimestamp(covered_start, tz=dt_timezone.utc)
+        covered_end = datetime.fromtimestamp(covered_end, tz=dt_timezone.utc)
+        rollups = MeasurementRollup.objects.filter(
+            plant=plant, criterion=criterion, granularity=granularity,
+            bucket_start__gte=covered_start, bucket_start__lt=covered_end,
+        )
+        _merge(buckets, _grouped(rollups, 'bucket_start', ROLLUP_AGGREGATES, origin, width))
+        raw_ranges = [(start, covered_start), (covered_end, end)]
+    else:
+        raw_ranges = [(start, end)]
+
+    for raw_start, raw_end in raw_ranges:
+        if raw_start < raw_end:
+            raw = series_queryset(plant, criterion, raw_start, raw_end)
+            _merge(buckets, _grouped(raw, 'measured_at', RAW_AGGREGATES, origin, width))
+
+    return [
+        {
+            't': _bucket_start(origin, width, bucket).isoformat(),
+            'min': row['min'],
+            'max': row['max'],
+            'avg': row['total'] / row['count'] if row['count'] else None,
+            'count': row['count'],
+        }
+        for bucket, row in sorted(buckets.items())
+    ]
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets : retourne les indices des points conservés.
+    Le premier et le dernier point sont toujours gardés.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Point moyen de la tranche suivante (ou le dernier point)
+        if i + 2 < len(edges):
+            next_start, next_stop = edges[i + 1], edges[i + 2]
+            avg_x = x[next_start:next_stop].mean()
+            avg_y = y[next_start:next_stop].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+
+    return selected
+
+
+def lttb_series(plant, criterion, start, end, points):
+    """Série réduite par LTTB : liste de {t, value}"""
+    rows = series_queryset(plant, criterion, start, end).order_by('measured_at').values_list(
+        'measured_at', 'value'
+    )
+    timestamps, values = [], []
+    for measured_at, value in rows.iterator(chunk_size=5000):
+        timestamps.append(measured_at.timestamp())
+        values.append(value)
+    if not timestamps:
+        return []
+
+    x = np.asarray(timestamps, dtype=np.float64)
+    y = np.asarray(values, dtype=np.float64)
+    keep = lttb(x, y, points)
+    return [
+        {'t': datetime.fromtimestamp(x[i], tz=dt_timezone.utc).isoformat(), 'value': float(y[i])}
+        for i in keep
+    ]
+
+
+def downsample(plant, criterion, start, end, points, method='buckets'):
+    if method == 'lttb':
+        return lttb_series(plant, criterion, start, end, points)
+    return bucket_series(plant, criterion, start, end, points)
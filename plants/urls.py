@@ -6,4 +6,6 @@ urlpatterns = [
     path('<int:pk>/', views.plant_detail, name='plant_detail'),
     path('add/', views.add_plant, name='add_plant'),
     path('<int:plant_id>/add-measurement/', views.add_measurement, name='add_measurement'),
+    path('<int:pk>/series/', views.measurement_series, name='measurement_series'),
+    path('measurements/ingest/', views.ingest_measurements_api, name='ingest_measurements'),
 ]
\ No newline at end of file
@@ -2,30 +2,68 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+import json
+from datetime import timedelta
+from core.pagination import paginate_keyset, InvalidCursor
+from core.replicas import replica_reads
 
 # --- IMPORTS DES MODÈLES ---
-from .models import Plant, PlantMeasurement
+from .models import Plant, PlantMeasurement, Criterion, SensorGateway
+from .ingestion import ingest_measurements, MAX_ROWS
+from .timeseries import downsample, DOWNSAMPLING_METHODS
+from . import rollups, survival
 from bets.models import Bet
+from bets.settlement import declare_death
+from bets.placement import place_bet, PlacementError
+from bets import pools
 from leaderboard.models import UserScore
 
 # --- IMPORTS DES FORMULAIRES ---
 from .forms import PlantForm, MeasurementForm
 from bets.forms import BetForm
 
+PLANTS_PER_PAGE = 12
+RECENT_MEASUREMENTS = 20
+SERIES_DEFAULT_POINTS = 200
+SERIES_MAX_POINTS = 2000
+SERIES_DEFAULT_WINDOW = timedelta(days=7)
+
 @login_required
+@replica_reads
 def plant_list(request):
-    """ PAGE 1 : Liste de toutes les plantes actives """
-    plants = Plant.objects.filter(is_active=True).order_by('-created_at')
-    return render(request, 'plants/plant_list.html', {'plants': plants})
+    """ PAGE 1 : Liste de toutes les plantes actives (pagination par curseur) """
+    # Pool de paris joint à chaque carte : aucune requête par carte
+    plants = Plant.objects.filter(is_active=True).select_related('owner', 'bet_pool').with_days_alive()
+    try:
+        page_obj = paginate_keyset(
+            plants,
+            PLANTS_PER_PAGE,
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+    except InvalidCursor:
+        return redirect('plant_list')
+    
+    return render(request, 'plants/plant_list.html', {
+        'plants': page_obj.object_list,
+        'page_obj': page_obj,
+        'is_paginated': page_obj.has_other_pages,
+    })
 
 @login_required
+@replica_reads
 def plant_detail(request, pk):
     """ PAGE 2 : Détail avec Logique Propriétaire (Gestion) vs Parieur (Jeu) """
-    plant = get_object_or_404(Plant, pk=pk)
+    plant = get_object_or_404(Plant.objects.select_related('bet_pool'), pk=pk)
     is_owner = (plant.owner == request.user)
     
-    # Récupération des données
-    measurements = PlantMeasurement.objects.filter(plant=plant).order_by('-measured_at')
+    # Récupération des données (dernières mesures seulement ; historique via l'API de séries et les agrégats)
+    measurements = PlantMeasurement.objects.filter(plant=plant).select_related('criterion').order_by('-measured_at')[:RECENT_MEASUREMENTS]
+    measurements_count = rollups.measurement_count(plant)
     
     # On récupère le score du visiteur actuel (pour le formulaire de pari)
     user_score, created = UserScore.objects.get_or_create(user=request.user)
@@ -53,27 +91,11 @@ def plant_detail(request, pk):
             
         # 2. GESTION DE LA MORT (SIMPLIFIÉE GRÂCE À TON MODÈLE)
         if request.method == 'POST' and 'declare_death' in request.POST:
-            death_date = timezone.now()
-            
             # A. Marquer la plante comme morte
-            plant.death_date = death_date
-            plant.is_active = False
-            plant.save()
-            
-            # B. Résoudre les paris en attente
-            active_bets = Bet.objects.filter(plant=plant, is_resolved=False)
-            count_winners = 0
+            # B. Résolution des paris, notifications et classement : file de tâches (run_workers)
+            declare_death(plant, death_date=timezone.now())
             
-            for bet in active_bets:
-                # APPEL DE TA MÉTHODE DU MODÈLE BET
-                # C'est elle qui calcule les points et met à jour le UserScore
-                bet.resolve_bet()
-                
-                # On vérifie juste le résultat pour l'affichage du message
-                if bet.won:
-                    count_winners += 1
-            
-            messages.warning(request, f'Plante déclarée morte. {count_winners} pari(s) gagnant(s) ont été payés !')
+            messages.warning(request, 'Plante déclarée morte. Les paris seront résolus dans quelques instants.')
             return redirect('plant_detail', pk=pk)
 
     # =================================================
@@ -87,23 +109,18 @@ def plant_detail(request, pk):
             bet_form = BetForm(request.POST, user_points=user_score.total_points)
             
             if bet_form.is_valid():
-                amount = bet_form.cleaned_data['bet_amount']
+                bet = bet_form.save(commit=False)
+                bet.user = request.user
+                bet.plant = plant
                 
-                # Vérification ultime du solde
-                if user_score.total_points >= amount:
-                    bet = bet_form.save(commit=False)
-                    bet.user = request.user
-                    bet.plant = plant
-                    bet.save()
-                    
-                    # Débit immédiat de la mise
-                    user_score.total_points -= amount
-                    user_score.save()
-                    
+                # Débit conditionnel de la mise et insertion du pari (une transaction)
+                try:
+                    place_bet(bet)
+                except PlacementError as error:
+                    messages.error(request, str(error))
+                else:
                     messages.success(request, 'Pari validé ! Bonne chance 🍀')
                     return redirect('plant_detail', pk=pk)
-                else:
-                    messages.error(request, 'Pas assez de points !')
             else:
                 messages.error(request, 'Erreur dans le formulaire.')
         else:
@@ -114,10 +131,16 @@ def plant_detail(request, pk):
         'plant': plant,
         'is_owner': is_owner,
         'measurements': measurements,
+        'measurements_count': measurements_count,
         'measurement_form': measurement_form,
         'bet_form': bet_form,
         'user_has_bet': user_has_bet,
         'user_points': user_score.total_points,
+        # Courbes de survie précalculées : une requête, aucun calcul
+        'outlook': survival.outlook_for(plant),
+        # Pool des paris tenu à jour à chaque pari : histogramme lu en une requête
+        'pool': plant.pool,
+        'pool_favourites': pools.favourites(plant.pool, pools.days(plant)) if plant.pool else [],
     }
     return render(request, 'plants/plant_detail.html', context)
 
@@ -157,4 +180,70 @@ def add_measurement(request, plant_id):
     else:
         form = MeasurementForm()
     
-    return render(request, 'plants/add_measurement.html', {'form': form, 'plant': plant})
\ No newline at end of file
+    return render(request, 'plants/add_measurement.html', {'form': form, 'plant': plant})
+
+def _parse_series_datetime(value, default):
+    if not value:
+        return default
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+@login_required
+def measurement_series(request, pk):
+    """ API JSON : série d'un critère sur une fenêtre de temps, réduite à `points` points """
+    plant = get_object_or_404(Plant, pk=pk)
+    
+    try:
+        criterion_id = int(request.GET.get('criterion') or 0)
+        end = _parse_series_datetime(request.GET.get('end'), timezone.now())
+        start = _parse_series_datetime(request.GET.get('start'), end - SERIES_DEFAULT_WINDOW)
+        points = int(request.GET.get('points', SERIES_DEFAULT_POINTS))
+    except ValueError:
+        return JsonResponse({'error': 'Paramètres invalides.'}, status=400)
+    
+    method = request.GET.get('method', 'buckets')
+    if method not in DOWNSAMPLING_METHODS or start >= end or points < 1:
+        return JsonResponse({'error': 'Paramètres invalides.'}, status=400)
+    points = min(points, SERIES_MAX_POINTS)
+    criterion = get_object_or_404(Criterion, pk=criterion_id)
+    
+    return JsonResponse({
+        'plant': plant.pk,
+        'criterion': criterion.pk,
+        'unit': criterion.unit,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'method': method,
+        'points': downsample(plant, criterion, start, end, points, method),
+    })
+
+@csrf_exempt
+@require_POST
+def ingest_measurements_api(request):
+    """ API JSON : envoi d'un lot de mesures par une passerelle (Authorization: Bearer <jeton>) """
+    auth = request.headers.get('Authorization', '')
+    token = auth[len('Bearer '):] if auth.startswith('Bearer ') else ''
+    gateway = SensorGateway.objects.select_related('owner').filter(token=token, is_active=True).first() if token else None
+    if gateway is None:
+        return JsonResponse({'error': 'Jeton de passerelle invalide.'}, status=401)
+    
+    try:
+        rows = json.loads(request.body).get('measurements')
+    except (ValueError, AttributeError):
+        rows = None
+    if not isinstance(rows, list):
+        return JsonResponse({'error': 'Corps JSON attendu : {"measurements": [...]}'}, status=400)
+    if len(rows) > MAX_ROWS:
+        return JsonResponse({'error': f'Au plus {MAX_ROWS} mesures par envoi.'}, status=400)
+    
+    created, rejected = ingest_measurements(gateway.owner, rows)
+    SensorGateway.objects.filter(pk=gateway.pk).update(last_seen_at=timezone.now())
+    
+    return JsonResponse(
+        {'accepted': len(created), 'rejected': rejected},
+        status=400 if rejected and not created else 201,
+    )
\ No newline at end of file